@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Backfill the country and region of stored registrations and feedback.
+Locates each row's ip_address in the local IP range database (GEOIP_DATABASE,
+see utils/geoip.py) and stores the result. No network calls are made.
+
+Rows are updated in batches, each committed on its own, and only rows
+without a country are touched, so the script can run against a live
+database, be resumed at any time, and be run again after downloading a
+newer database to place addresses the old one didn't know.
+
+    python backfill_locations.py                          # both tables
+    python backfill_locations.py --table feedback --batch-size 5000
+"""
+
+import sys
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from storage import verify_storage
+from storage.cache import shared_cache
+from utils.geoip import GEOIP_BACKFILL_BATCH_SIZE, backfill_locations, geoip
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TABLES = ('user_registrations', 'feedback')
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Locate stored rows by IP address")
+    parser.add_argument('--table', choices=TABLES, help='Only backfill this table')
+    parser.add_argument('--batch-size', type=int, default=GEOIP_BACKFILL_BATCH_SIZE,
+                        help='Rows updated per transaction')
+    parser.add_argument('--since-id', type=int, default=0, help='Resume after this row id')
+    args = parser.parse_args()
+
+    try:
+        verify_storage()
+        if not len(geoip.index):
+            logger.error(f"❌ No IP ranges loaded from {geoip.path}")
+            sys.exit(1)
+
+        for table in ([args.table] if args.table else TABLES):
+            logger.info(f"Backfilling {table}...")
+            scanned, updated = backfill_locations(table, args.batch_size, args.since_id)
+            shared_cache.invalidate(table)
+            logger.info(f"✓ {table}: {updated} of {scanned} rows located")
+    except Exception as e:
+        logger.error(f"❌ Backfill failed: {str(e)}")
+        sys.exit(1)
+
+    logger.info("🎉 Backfill completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
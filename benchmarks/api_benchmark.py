@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the LawVriksh API
+Drives the public submission endpoints and the admin list endpoints in
+process against the configured storage backend. Defaults to the in-memory
+backend so it runs without any external service.
+
+Usage:
+    python benchmarks/api_benchmark.py [--requests 2000] [--backend memory|sqlite|mysql]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REGISTRATION = {
+    'name': 'Benchmark User',
+    'email': 'benchmark@example.com',
+    'phone': '+911234567890',
+    'gender': 'Other',
+    'profession': 'Lawyer',
+    'userType': 'USER',
+}
+
+FEEDBACK = {
+    'visualDesign': 4,
+    'easeOfNavigation': 2,
+    'easeOfNavigationIssue': 'Menus are hard to find',
+    'mobileResponsiveness': 5,
+    'overallSatisfaction': 4,
+    'easeOfTasks': 4,
+    'qualityOfServices': 5,
+    'likeMost': 'Clean interface',
+    'improvements': 'Better search',
+    'features': 'Document templates',
+    'legalChallenges': 'Finding precedents quickly',
+    'contactWilling': 'no',
+}
+
+
+async def run_scenario(app, label, method, path, body, count, headers=None):
+    """Issue ``count`` sequential requests and print latency statistics"""
+    from asgi_client import request
+
+    latencies = []
+    sizes = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        status, _, payload = await request(app, method, path, body, headers)
+        latencies.append(time.perf_counter() - t0)
+        sizes.append(len(payload))
+        if status >= 400:
+            raise RuntimeError(f'{method} {path} returned {status}: {payload[:200]!r}')
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<28} {count / elapsed:9.0f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:7.3f} ms   "
+          f"p99 {p99 * 1000:7.3f} ms   "
+          f"{statistics.mean(sizes):9.0f} B/resp")
+
+
+async def run(args):
+    from main import app
+    from storage import verify_storage
+
+    verify_storage()
+    admin = {'x-api-key': os.environ.get('ADMIN_API_KEY', 'admin-key-123')}
+
+    print(f"API benchmark ({args.backend} backend, {args.requests} requests per scenario)")
+    print("=" * 90)
+    await run_scenario(app, 'POST /api/register', 'POST', '/api/register', REGISTRATION, args.requests)
+    await run_scenario(app, 'POST /api/feedback', 'POST', '/api/feedback', FEEDBACK, args.requests)
+    await run_scenario(app, 'GET /api/registrations', 'GET', '/api/registrations?per_page=100',
+                       None, args.requests, admin)
+    await run_scenario(app, 'GET /api/feedback', 'GET', '/api/feedback?per_page=100',
+                       None, args.requests, admin)
+
+    # Projections: compare payload size and latency with the full listings above
+    await run_scenario(app, 'GET registrations summary', 'GET',
+                       '/api/registrations?per_page=100&view=summary', None, args.requests, admin)
+    await run_scenario(app, 'GET feedback summary', 'GET',
+                       '/api/feedback?per_page=100&view=summary', None, args.requests, admin)
+    await run_scenario(app, 'GET feedback fields=2', 'GET',
+                       '/api/feedback?per_page=100&fields=overall_satisfaction,submitted_at',
+                       None, args.requests, admin)
+
+    # Full dumps: every stored row per request, in one NDJSON stream
+    dumps = max(args.requests // 200, 1)
+    await run_scenario(app, 'GET /api/feedback/stream', 'GET', '/api/feedback/stream',
+                       None, dumps, admin)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per scenario')
+    parser.add_argument('--backend', default=os.environ.get('STORAGE_BACKEND', 'memory'),
+                        choices=['memory', 'sqlite', 'mysql'], help='Storage backend to exercise')
+    args = parser.parse_args()
+
+    # Must be set before the application (and so the storage package) is imported
+    os.environ['STORAGE_BACKEND'] = args.backend
+    if args.backend == 'sqlite' and 'SQLITE_PATH' not in os.environ:
+        # Keep benchmark rows out of the real database file
+        os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    os.environ['FLASK_ENV'] = 'production'
+    sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
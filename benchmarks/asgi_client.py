@@ -0,0 +1,66 @@
+"""
+Minimal in-process ASGI client used by the benchmarks
+Calls the application directly so measurements exclude network and server
+overhead, and no extra HTTP client dependency is needed.
+"""
+
+import json
+import asyncio
+from typing import Dict, Optional, Tuple
+
+
+async def request(app, method: str, path: str, body: Optional[object] = None,
+                  headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+    """Send a single request to an ASGI app and return (status, headers, body)"""
+    path, _, query = path.partition('?')
+    payload = json.dumps(body).encode() if body is not None else b''
+    raw_headers = [(b'host', b'benchmark'), (b'user-agent', b'lawvriksh-benchmark/1.0')]
+    if body is not None:
+        raw_headers.append((b'content-type', b'application/json'))
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode(), value.encode()))
+
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'headers': raw_headers,
+        'client': ('127.0.0.1', 50000),
+        'server': ('benchmark', 80),
+    }
+
+    sent = False
+    # Streaming responses listen for a disconnect; only report one once done
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    status = 0
+    response_headers = {}
+    chunks = []
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            response_headers.update(
+                (name.decode(), value.decode()) for name, value in message.get('headers', [])
+            )
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return status, response_headers, b''.join(chunks)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the bulk registration import endpoint
+Posts a JSON array of synthetic registrations to /api/registrations/bulk and
+reports rows per second. The target is 10k rows/sec against a local DB.
+
+Usage:
+    python benchmarks/bulk_import_benchmark.py [--rows 50000] [--chunk-size 1000] [--backend sqlite]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGET_ROWS_PER_SECOND = 10000
+
+
+def build_rows(count):
+    """Build ``count`` valid registration rows"""
+    return [
+        {
+            'name': f'Partner User {i}',
+            'email': f'partner{i}@example.com',
+            'phone': f'+91{9000000000 + i}',
+            'gender': 'Prefer not to say',
+            'profession': 'Advocate',
+            'userType': 'USER' if i % 4 else 'Creator',
+        }
+        for i in range(count)
+    ]
+
+
+async def run(args):
+    from asgi_client import request
+    from main import app
+    from storage import verify_storage
+
+    verify_storage()
+    rows = build_rows(args.rows)
+    headers = {'x-api-key': os.environ.get('ADMIN_API_KEY', 'admin-key-123')}
+
+    start = time.perf_counter()
+    status, _, body = await request(
+        app, 'POST', f'/api/registrations/bulk?chunk_size={args.chunk_size}', rows, headers
+    )
+    elapsed = time.perf_counter() - start
+
+    if status != 200:
+        raise RuntimeError(f'Import failed with {status}: {body[:200]!r}')
+    report = json.loads(body)
+    rate = report['imported'] / elapsed
+
+    print(f"Bulk import benchmark ({args.backend} backend, chunk size {args.chunk_size})")
+    print("=" * 60)
+    print(f"rows imported        {report['imported']}")
+    print(f"elapsed              {elapsed:.2f} s")
+    print(f"throughput           {rate:,.0f} rows/s "
+          f"({'meets' if rate >= TARGET_ROWS_PER_SECOND else 'below'} {TARGET_ROWS_PER_SECOND:,} target)")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='Rows to import')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per transaction')
+    parser.add_argument('--backend', default=os.environ.get('STORAGE_BACKEND', 'sqlite'),
+                        choices=['memory', 'sqlite', 'mysql'], help='Storage backend to exercise')
+    args = parser.parse_args()
+
+    os.environ['STORAGE_BACKEND'] = args.backend
+    if args.backend == 'sqlite' and 'SQLITE_PATH' not in os.environ:
+        # Keep benchmark rows out of the real database file
+        os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Parallel export benchmark
+Loads generated rows into a throwaway database and times exports of the
+feedback table with serialization in threads (0 processes) and in CPU pools
+of increasing size (see utils/executor.py). On a machine with several cores the xlsx and csv.gz
+times should drop roughly with the process count until fetching or the
+final zip deflate becomes the limit.
+
+Usage:
+    python benchmarks/export_benchmark.py [--rows 200000] [--processes 0,1,2,4] [--formats xlsx,csv.gz] [--backend sqlite]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_rows(count):
+    from storage import get_repository, verify_storage
+    from utils.synthetic import SyntheticData
+
+    verify_storage()
+    repository = get_repository('feedback')
+    rows = SyntheticData(seed=42).feedback(count)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == 10000:
+            repository.insert_many(batch)
+            batch = []
+    if batch:
+        repository.insert_many(batch)
+
+
+def time_export(export_format):
+    from utils import export
+
+    start = time.perf_counter()
+    size = 0
+    if export_format == 'xlsx':
+        with tempfile.TemporaryFile() as f:
+            export.write_xlsx(f, ('feedback',))
+            size = f.tell()
+    elif export_format == 'parquet':
+        with tempfile.TemporaryFile() as f:
+            export.write_parquet(f, 'feedback')
+            size = f.tell()
+    else:
+        for chunk in export.export_rows('feedback', export_format):
+            size += len(chunk)
+    return time.perf_counter() - start, size
+
+
+def run(args):
+    from utils import export
+    from utils.executor import cpu_executor
+
+    load_rows(args.rows)
+    formats = args.formats.split(',')
+    processes = [int(p) for p in args.processes.split(',')]
+
+    print(f"Export benchmark ({args.backend} backend, {args.rows} feedback rows, "
+          f"{export.EXPORT_FETCH_CONNECTIONS} fetch connections, {os.cpu_count()} cores)")
+    print("=" * 72)
+    print(f"{'format':<10}{'processes':>10}{'seconds':>12}{'rows/s':>14}{'MB':>10}{'speedup':>10}")
+    for export_format in formats:
+        baseline = None
+        for count in processes:
+            cpu_executor.reset(processes=count)
+            if count:
+                time_export(export_format)  # warm up: start the processes
+            runs = [time_export(export_format) for _ in range(args.rounds)]
+            elapsed, size = min(runs)
+            baseline = baseline or elapsed
+            print(f"{export_format:<10}{count:>10}{elapsed:>12.2f}{args.rows / elapsed:>14,.0f}"
+                  f"{size / 1e6:>10.1f}{baseline / elapsed:>9.2f}x")
+    cpu_executor.shutdown()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000, help='Feedback rows to load and export')
+    parser.add_argument('--processes', default='0,1,2,4', help='Comma-separated serializer process counts')
+    parser.add_argument('--formats', default='xlsx,csv.gz', help='Comma-separated formats to export')
+    parser.add_argument('--rounds', type=int, default=2, help='Runs per setting; the fastest is reported')
+    parser.add_argument('--backend', default=os.environ.get('STORAGE_BACKEND', 'sqlite'),
+                        choices=['memory', 'sqlite', 'mysql'], help='Storage backend to exercise')
+    args = parser.parse_args()
+
+    os.environ['STORAGE_BACKEND'] = args.backend
+    if args.backend == 'sqlite' and 'SQLITE_PATH' not in os.environ:
+        # Keep benchmark rows out of the real database file
+        os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Per-request logging overhead benchmark
+Posts feedback submissions to the app in-process and compares the time per
+request with logging off, with a synchronous stream handler (the old
+basicConfig setup, in text and JSON) and with the queue-based pipeline.
+Each request also emits an access log line, as uvicorn does.
+--sink-latency adds a delay to every flush, like stdout piped to a log
+collector that is slow to read.
+
+Usage:
+    python benchmarks/logging_benchmark.py [--requests 5000] [--rounds 3] [--sink-latency 0] [--backend memory]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ('off', 'sync-text', 'sync-json', 'queue')
+
+FEEDBACK = {
+    'visualDesign': '4', 'easeOfNavigation': '5', 'mobileResponsiveness': '4',
+    'overallSatisfaction': '5', 'easeOfTasks': '4', 'qualityOfServices': '5',
+    'likeMost': 'Clear layout', 'contactWilling': 'no',
+}
+
+
+class SlowSink:
+    """File whose flushes block for ``latency`` seconds, releasing the GIL"""
+
+    def __init__(self, f, latency):
+        self.f = f
+        self.latency = latency
+
+    def write(self, data):
+        return self.f.write(data)
+
+    def flush(self):
+        if self.latency:
+            time.sleep(self.latency)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+async def time_requests(app, count):
+    from asgi_client import request
+
+    access_log = logging.getLogger('uvicorn.access')
+    start = time.perf_counter()
+    for _ in range(count):
+        status, _, _ = await request(app, 'POST', '/api/feedback', FEEDBACK)
+        if status not in (200, 201, 202):
+            raise RuntimeError(f'Submission failed with {status}')
+        access_log.info('%s - "%s %s HTTP/%s" %d', '127.0.0.1:50000', 'POST', '/api/feedback', '1.1', status)
+    return time.perf_counter() - start
+
+
+def configure(mode, sink, queue_handler):
+    from utils.logging_config import JsonFormatter, TEXT_FORMAT
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+
+    if mode == 'off':
+        root.setLevel(logging.CRITICAL)
+        return
+    root.setLevel(logging.INFO)
+    if mode == 'queue':
+        root.addHandler(queue_handler)
+        return
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(JsonFormatter() if mode == 'sync-json' else logging.Formatter(TEXT_FORMAT))
+    root.addHandler(handler)
+
+
+async def run(args):
+    from utils import logging_config
+
+    # The pipeline writes to a throwaway file instead of the terminal
+    sink = SlowSink(open(os.path.join(tempfile.mkdtemp(), 'benchmark.log'), 'w'), args.sink_latency / 1e6)
+    logging_config.setup_logging(sink)
+    queue_handler = logging_config._handler
+
+    from main import app
+    from storage import verify_storage
+
+    verify_storage()
+    configure('off', sink, queue_handler)
+    await time_requests(app, min(args.requests, 500))  # warm up
+
+    # Modes are interleaved over several rounds and the best round kept, so
+    # drift in machine load doesn't favour whichever mode ran first
+    results = {}
+    for _ in range(args.rounds):
+        for mode in MODES:
+            configure(mode, sink, queue_handler)
+            elapsed = await time_requests(app, args.requests)
+            drain = 0.0
+            if mode == 'queue':
+                start = time.perf_counter()
+                queue_handler.queue.join()
+                drain = time.perf_counter() - start
+            if mode not in results or elapsed < results[mode][0]:
+                results[mode] = (elapsed, drain)
+
+    baseline = results['off'][0] / args.requests * 1e6
+    print(f"Logging overhead benchmark ({args.backend} backend, "
+          f"best of {args.rounds} rounds of {args.requests} requests per mode, "
+          f"{args.sink_latency:g} us sink latency)")
+    print("=" * 72)
+    print(f"{'mode':<12}{'us/request':>14}{'overhead us':>14}{'drain after':>16}")
+    for mode in MODES:
+        elapsed, drain = results[mode]
+        per_request = elapsed / args.requests * 1e6
+        drained = f"{drain * 1000:.1f} ms" if mode == 'queue' else '-'
+        print(f"{mode:<12}{per_request:>14.1f}{per_request - baseline:>14.1f}{drained:>16}")
+    if queue_handler.dropped:
+        print(f"queue dropped {queue_handler.dropped} records")
+
+    logging_config.stop_logging()
+    sink.close()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000, help='Requests per logging mode')
+    parser.add_argument('--rounds', type=int, default=3, help='Rounds per mode; the fastest is reported')
+    parser.add_argument('--sink-latency', type=float, default=0, help='Microseconds each flush blocks for')
+    parser.add_argument('--backend', default=os.environ.get('STORAGE_BACKEND', 'memory'),
+                        choices=['memory', 'sqlite', 'mysql'], help='Storage backend to exercise')
+    args = parser.parse_args()
+
+    os.environ['STORAGE_BACKEND'] = args.backend
+    if args.backend == 'sqlite' and 'SQLITE_PATH' not in os.environ:
+        # Keep benchmark rows out of the real database file
+        os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
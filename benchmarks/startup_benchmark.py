@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the LawVriksh API
+Measures the cost of importing the application module and the time it takes
+a fresh server process to answer its first request.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 5] [--skip-verify]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only be loaded on first use, never at startup
+HEAVY_MODULES = ['openpyxl', 'pandas']
+
+IMPORT_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'import_seconds': elapsed,
+    'heavy_modules': [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def build_env(skip_verify):
+    """Build the environment for child processes"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = PROJECT_DIR
+    if skip_verify:
+        # Pretend the gunicorn master already verified the schema
+        from database import SCHEMA_VERIFIED_ENV
+        env[SCHEMA_VERIFIED_ENV] = '1'
+    return env
+
+
+def measure_import(env):
+    """Import the application in a fresh interpreter and report the cost"""
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_PROBE % HEAVY_MODULES],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    """Pick a free local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(env, timeout=60.0):
+    """Start a server process and time until /api/health answers"""
+    port = free_port()
+    url = f'http://127.0.0.1:{port}/api/health'
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError('Server exited during startup (is the database reachable?)')
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f'Server did not answer within {timeout:.0f}s')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(label, samples):
+    """Print min/median/max for a list of timings in seconds"""
+    print(f"{label:<24} min {min(samples) * 1000:8.1f} ms   "
+          f"median {statistics.median(samples) * 1000:8.1f} ms   "
+          f"max {max(samples) * 1000:8.1f} ms")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Number of cold starts to measure')
+    parser.add_argument('--skip-verify', action='store_true',
+                        help='Skip the startup schema check (no database required)')
+    args = parser.parse_args()
+
+    sys.path.insert(0, PROJECT_DIR)
+    env = build_env(args.skip_verify)
+
+    import_times = []
+    heavy = set()
+    for _ in range(args.runs):
+        result = measure_import(env)
+        import_times.append(result['import_seconds'])
+        heavy.update(result['heavy_modules'])
+
+    first_request_times = [measure_first_request(env) for _ in range(args.runs)]
+
+    print(f"Startup benchmark ({args.runs} runs)")
+    print("=" * 50)
+    summarize('import main', import_times)
+    summarize('time to first request', first_request_times)
+    if heavy:
+        print(f"Heavy modules loaded at import time: {', '.join(sorted(heavy))}")
+    else:
+        print("Heavy modules loaded at import time: none")
+
+
+if __name__ == '__main__':
+    main()
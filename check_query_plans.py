@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for the MySQL database.
+Runs EXPLAIN on every read issued by models.py, the admin lists and the
+exports, fails on full scans, filesorts and temporary tables over
+PLAN_MAX_SCAN_ROWS estimated rows, and suggests the missing indexes.
+
+Row estimates come from table statistics, so check a database of realistic
+size, e.g. one loaded with generate_data.py:
+    python generate_data.py --registrations 1000000 --feedback 1000000
+    python check_query_plans.py --analyze
+
+Exits non-zero when any plan fails, so it can gate deployments in CI.
+"""
+
+import sys
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import get_db_connection
+from utils.query_plans import PLAN_MAX_SCAN_ROWS, check_query_plans
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def describe_step(step):
+    return (f"{step.get('table') or '-'}: {step.get('type') or '-'} "
+            f"key={step.get('key') or '-'} rows={step.get('rows')} {step.get('Extra') or ''}").rstrip()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="EXPLAIN application queries and flag bad plans")
+    parser.add_argument('--max-rows', type=int, default=PLAN_MAX_SCAN_ROWS,
+                        help='Estimated rows above which a scan or sort fails the check')
+    parser.add_argument('--analyze', action='store_true', help='Refresh table statistics first')
+    parser.add_argument('--verbose', action='store_true', help='Print the plan of every query')
+    args = parser.parse_args()
+
+    try:
+        with get_db_connection() as connection:
+            results = check_query_plans(connection, args.max_rows, args.analyze)
+    except Exception as e:
+        logger.error(f"❌ Query plan check failed: {str(e)}")
+        sys.exit(1)
+
+    failed = [r for r in results if r['problems']]
+    for result in results:
+        status = 'FAIL' if result['problems'] else 'ok'
+        print(f"{status:<5}{result['name']}")
+        if result['problems'] or args.verbose:
+            for step in result['plan']:
+                print(f"       {describe_step(step)}")
+        for problem in result['problems']:
+            print(f"     - {problem}")
+        for index in result['unmanaged_indexes']:
+            print(f"     ! relies on {index}, which storage/schema.py does not define")
+        if result['suggestion']:
+            print(f"     > {result['suggestion']}")
+        elif result['problems']:
+            print("     > an index already covers this query; try --analyze to refresh statistics")
+
+    print(f"\n{len(results) - len(failed)}/{len(results)} query plans ok (limit {args.max_rows} rows)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
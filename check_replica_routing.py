@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Check read-replica routing for the configured databases.
+Connects to the primary and every replica in DB_REPLICA_HOSTS, reports each
+server's identity and replication lag, then shows which server read-only and
+write connections are routed to.
+
+Example against two local MySQL instances:
+    DB_PORT=3306 DB_REPLICA_HOSTS=127.0.0.1:3307 python check_replica_routing.py
+"""
+
+import sys
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pymysql
+from database import (
+    DB_REPLICA_HOSTS, get_db_config, get_replica_config, get_replica_lag,
+    get_db_connection, replica_usable
+)
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def server_identity(connection):
+    """Return host:port and server_id reported by the server itself"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT @@hostname, @@port, @@server_id")
+    hostname, port, server_id = cursor.fetchone()
+    return f"{hostname}:{port} (server_id={server_id})"
+
+
+def describe_servers():
+    """Print identity and lag of the primary and each replica"""
+    config = get_db_config()
+    connection = pymysql.connect(**config)
+    primary = server_identity(connection)
+    connection.close()
+    print(f"Primary   {config['host']}:{config['port']} -> {primary}")
+
+    for replica in DB_REPLICA_HOSTS:
+        try:
+            connection = pymysql.connect(**get_replica_config(replica))
+        except pymysql.Error as e:
+            print(f"Replica   {replica} -> unreachable ({e})")
+            continue
+        lag = get_replica_lag(connection)
+        identity = server_identity(connection)
+        connection.close()
+        state = 'unknown lag' if lag is None else f'{lag:.0f}s behind'
+        usable = replica_usable(lag)
+        print(f"Replica   {replica} -> {identity}, {state}, {'usable' if usable else 'skipped'}")
+
+    return primary
+
+
+def check_routing(primary, attempts=4):
+    """Open read and write connections and report where they land"""
+    ok = True
+    for attempt in range(1, attempts + 1):
+        with get_db_connection(read_only=True) as connection:
+            read_server = server_identity(connection)
+        with get_db_connection() as connection:
+            write_server = server_identity(connection)
+
+        if write_server != primary:
+            ok = False
+        print(f"Attempt {attempt}: reads -> {read_server}, writes -> {write_server}")
+    return ok
+
+
+def main():
+    """Main function"""
+    if not DB_REPLICA_HOSTS:
+        print("DB_REPLICA_HOSTS is not set; all reads go to the primary.")
+
+    try:
+        primary = describe_servers()
+        print()
+        ok = check_routing(primary)
+    except Exception as e:
+        logger.error(f"Routing check failed: {str(e)}")
+        sys.exit(1)
+
+    if not ok:
+        print("\nWrites were routed away from the primary!")
+        sys.exit(1)
+    print("\nWrites always hit the primary.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Check registration sharding (storage/sharded.py).
+Inserts synthetic registrations through ShardedRepository and checks that
+each row sits on the shard its email hashes to, that pages merge into one
+(submitted_at, id) order, that export id ranges cover every row exactly
+once, that streams merge in id order, and that two processes never make
+the same id.
+
+The rows are dated in the year 2000 so they don't mix with real data, and
+are deleted again afterwards. Example against two local MySQL instances,
+both migrated with migrate.py:
+    DB_SHARDS=127.0.0.1:3306,127.0.0.1:3307 python check_sharding.py
+
+Without MySQL, --fake runs the same checks on in-process shards, plus the
+id generator lease takeover and expiry:
+    python check_sharding.py --fake
+
+Exits non-zero when any check fails.
+"""
+
+import sys
+import argparse
+import logging
+import multiprocessing
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import DB_SHARDS, get_shard_connection
+from storage.base import Repository, StorageUnavailable, STREAM_BATCH_SIZE
+from storage.sharded import GENERATORS, ID_BUCKET_WIDTH, IdGenerator, ShardedRepository, sharded_repository
+from utils.synthetic import SyntheticData
+
+# Set up logging
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TABLE = 'user_registrations'
+# Submission dates of the check's rows, far from any real data
+CHECK_END = date(2001, 1, 1)
+CHECK_SINCE = datetime(2000, 11, 1)
+CHECK_UNTIL = datetime(2001, 1, 2)
+EMAIL_DOMAIN = 'shard-check.invalid'
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise CheckFailed(message)
+
+
+def check_rows(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Synthetic registrations, with emails the cleanup can find"""
+    rows = []
+    for number, row in enumerate(SyntheticData(seed=seed, months=1, end=CHECK_END).registrations(count)):
+        rows.append(dict(row, email=f"{row['email'].split('@')[0]}.{seed}.{number}@{EMAIL_DOMAIN}"))
+    return rows
+
+
+def shard_contents(repository: ShardedRepository) -> List[List[tuple]]:
+    """(id, email, submitted_at) of each shard's rows in the check's date range"""
+    return [
+        shard.fetch_page(10 ** 9, 0, CHECK_SINCE, CHECK_UNTIL, ('id', 'email', 'submitted_at'))[0]
+        for shard in repository.shards
+    ]
+
+
+def check_placement(repository: ShardedRepository, rows: List[Dict[str, Any]]) -> None:
+    contents = shard_contents(repository)
+    stored = {}
+    for index, shard_rows in enumerate(contents):
+        for row_id, email, _ in shard_rows:
+            expect(repository.shard_index({'email': email}) == index,
+                   f"Row {row_id} ({email}) is on shard {index}, not shard {repository.shard_index({'email': email})}")
+            expect(email not in stored, f"{email} is stored twice")
+            stored[email] = index
+
+    missing = {row['email'] for row in rows} - set(stored)
+    expect(not missing, f"{len(missing)} inserted rows are on no shard")
+    per_shard = [sum(1 for row in rows if repository.shard_index(row) == index) for index in range(len(contents))]
+    expect(all(per_shard), f"Some shard got no rows: {per_shard}")
+    print(f"Placement: {len(rows)} rows on their email's shard, per shard {per_shard}")
+
+
+def check_pages(repository: ShardedRepository, page_size: int) -> None:
+    expected = sorted(
+        ((submitted_at, row_id) for shard_rows in shard_contents(repository) for row_id, _, submitted_at in shard_rows),
+        reverse=True
+    )
+    merged = []
+    offset = 0
+    while True:
+        page, total = repository.fetch_page(page_size, offset, CHECK_SINCE, CHECK_UNTIL, ('submitted_at', 'id'))
+        expect(total == len(expected), f"Page total {total}, but the shards hold {len(expected)} rows")
+        if not page:
+            break
+        merged.extend(page)
+        offset += page_size
+
+    expect(merged == expected, "Pages are not in global (submitted_at, id) order, or miss or repeat rows")
+    print(f"Pages: {len(merged)} rows in (submitted_at, id) order over {offset // page_size} pages")
+
+
+def check_ranges(repository: ShardedRepository, size: int) -> None:
+    expected = sorted(row_id for shard_rows in shard_contents(repository) for row_id, _, _ in shard_rows)
+    ranges = list(repository.id_ranges(size, CHECK_SINCE, CHECK_UNTIL))
+    for (low, high), (next_low, next_high) in zip(ranges, ranges[1:]):
+        expect(next_high <= low, f"Export ranges {low}-{high} and {next_low}-{next_high} overlap or are out of order")
+
+    exported = []
+    for low, high in ranges:
+        ids = [row[0] for row in repository.fetch_id_range(low, high, CHECK_SINCE, CHECK_UNTIL, ('id',))]
+        expect(ids == sorted(ids, reverse=True), f"Range {low}-{high} is not in descending id order")
+        expect(all(low <= row_id < high for row_id in ids), f"Range {low}-{high} returned an id outside it")
+        exported.extend(ids)
+
+    expect(sorted(exported) == expected, f"Export ranges returned {len(exported)} rows for {len(expected)}, "
+                                         f"{len(set(exported))} distinct")
+    print(f"Export ranges: {len(ranges)} ranges of up to a minute of ids cover {len(exported)} rows exactly once")
+
+
+def check_stream(repository: ShardedRepository, batch_size: int) -> None:
+    ours = {row_id for shard_rows in shard_contents(repository) for row_id, _, _ in shard_rows}
+    streamed = []
+    batches = repository.iter_rows(min(ours) - 1, ('id', 'email'), batch_size)
+    try:
+        for batch in batches:
+            expect(len(batch) <= batch_size, f"Stream batch of {len(batch)} rows exceeds {batch_size}")
+            streamed.extend(row[0] for row in batch)
+    finally:
+        batches.close()
+
+    expect(all(a < b for a, b in zip(streamed, streamed[1:])), "Stream is not in strictly ascending id order")
+    expect(ours <= set(streamed), f"Stream missed {len(ours - set(streamed))} rows")
+    print(f"Stream: {len(streamed)} rows merged in id order")
+
+
+def generate_ids(count: int) -> List[int]:
+    """Ids from a fresh generator in this process, for --processes"""
+    ids = IdGenerator(partial(get_shard_connection, DB_SHARDS[0]))
+    try:
+        return [ids.next_id() for _ in range(count)]
+    finally:
+        ids.release()
+
+
+def check_distinct_ids(id_lists: Sequence[List[int]]) -> None:
+    generated = [row_id for ids in id_lists for row_id in ids]
+    expect(len(set(generated)) == len(generated),
+           f"{len(generated) - len(set(generated))} ids were generated twice")
+    for ids in id_lists:
+        expect(all(a < b for a, b in zip(ids, ids[1:])), "A generator's ids don't increase")
+    print(f"Ids: {len(generated)} ids from {len(id_lists)} generators are all distinct")
+
+
+def run_checks(repository: ShardedRepository, rows: List[Dict[str, Any]], page_size: int) -> None:
+    repository.insert_many(rows)
+    check_placement(repository, rows)
+    check_pages(repository, page_size)
+    check_ranges(repository, max(len(rows) // 10, 1))
+    check_stream(repository, max(page_size // 2, 1))
+
+
+def check_mysql(count: int, page_size: int, processes: int) -> None:
+    expect(len(DB_SHARDS) > 1, "Set DB_SHARDS to at least two databases, or use --fake")
+    repository = sharded_repository(TABLE)
+    repository.verify()
+    try:
+        cleanup(repository)
+        run_checks(repository, check_rows(count, seed=1), page_size)
+
+        with multiprocessing.get_context('spawn').Pool(processes) as pool:
+            id_lists = pool.map(generate_ids, [count] * processes)
+        check_distinct_ids(id_lists + [[repository.ids.next_id() for _ in range(count)]])
+    finally:
+        cleanup(repository)
+        repository.close()
+
+
+def cleanup(repository: ShardedRepository) -> None:
+    """Delete the rows a check inserted, from every shard"""
+    for shard in repository.shards:
+        with shard.connect() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"DELETE FROM {TABLE} WHERE email LIKE %s", (f"%@{EMAIL_DOMAIN}",))
+            connection.commit()
+
+
+# In-process stand-ins for --fake
+
+
+class FakeShard(Repository):
+    """One shard's rows in memory, behaving like ShardRepository for the reads sharding uses"""
+
+    def __init__(self, table: str):
+        super().__init__(table)
+        self._rows: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _store(self, values: Dict[str, Any], submitted_at: datetime) -> tuple:
+        row = tuple(dict(values, submitted_at=values.get('submitted_at') or submitted_at).get(c) for c in self.columns)
+        with self._lock:
+            self._rows[values['id']] = row
+        return row
+
+    def _select(self, rows: List[tuple], columns: Optional[Sequence[str]]) -> List[tuple]:
+        positions = [self.columns.index(c) for c in (columns or self.columns)]
+        return [tuple(row[p] for p in positions) for row in rows]
+
+    def _in_range(self, since: Optional[datetime], until: Optional[datetime]) -> List[tuple]:
+        position = self.columns.index('submitted_at')
+        with self._lock:
+            rows = list(self._rows.values())
+        return [row for row in rows
+                if (since is None or row[position] >= since) and (until is None or row[position] < until)]
+
+    def verify(self) -> None:
+        pass
+
+    def insert(self, values: Dict[str, Any], submission_id: Optional[str] = None) -> tuple:
+        return self._store(values, datetime.now())
+
+    def insert_once(self, values: Dict[str, Any], submission_id: str, submitted_at: datetime) -> bool:
+        self._store(values, submitted_at)
+        return True
+
+    def prune_receipts(self, before: datetime) -> int:
+        return 0
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> int:
+        submitted_at = datetime.now()
+        for values in rows:
+            self._store(values, submitted_at)
+        return len(rows)
+
+    def count(self) -> int:
+        return len(self._rows)
+
+    def last_id(self) -> int:
+        return max(self._rows, default=0)
+
+    def fetch_page(self, limit: int, offset: int, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None,
+                   columns: Optional[Sequence[str]] = None) -> Tuple[List[tuple], int]:
+        position = self.columns.index('submitted_at')
+        rows = sorted(self._in_range(since, until), key=lambda row: (row[position], row[0]), reverse=True)
+        return self._select(rows[offset:offset + limit], columns), len(rows)
+
+    def id_bounds(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Tuple[int, int]:
+        ids = [row[0] for row in self._in_range(since, until)]
+        return (min(ids), max(ids)) if ids else (0, 0)
+
+    def fetch_id_range(self, low: int, high: int, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None,
+                       columns: Optional[Sequence[str]] = None) -> List[tuple]:
+        rows = sorted((row for row in self._in_range(since, until) if low <= row[0] < high), reverse=True)
+        return self._select(rows, columns)
+
+    def count_by_id_bucket(self, width: int, since: Optional[datetime] = None,
+                           until: Optional[datetime] = None) -> List[Tuple[int, int]]:
+        counts: Dict[int, int] = {}
+        for row in self._in_range(since, until):
+            counts[row[0] // width] = counts.get(row[0] // width, 0) + 1
+        return list(counts.items())
+
+    def count_by_period(self, period: str, since: datetime, max_id: int,
+                        group_by: Optional[str] = None) -> List[Tuple[datetime, Any, int]]:
+        raise NotImplementedError
+
+    def count_by_location(self, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> List[Tuple[Optional[str], Optional[str], int]]:
+        raise NotImplementedError
+
+    def set_locations(self, locations: Sequence[Tuple[int, Optional[str], Optional[str]]]) -> int:
+        raise NotImplementedError
+
+    def iter_rows(self, since_id: int = 0, columns: Optional[Sequence[str]] = None,
+                  batch_size: int = STREAM_BATCH_SIZE):
+        with self._lock:
+            rows = sorted(row for row_id, row in self._rows.items() if row_id > since_id)
+        for start in range(0, len(rows), batch_size):
+            yield self._select(rows[start:start + batch_size], columns)
+
+
+class FakeLeases:
+    """The id_generators table, answering the statements IdGenerator sends it
+
+    ``now`` is the database clock in seconds; move it forward to expire leases.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.leases: Dict[int, Tuple[Optional[str], Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def expired(self, generator: int) -> bool:
+        owner, leased_until = self.leases[generator]
+        return owner is None or leased_until < self.now
+
+    @contextmanager
+    def connect(self, read_only: bool = False):
+        with self._lock:
+            yield FakeLeaseConnection(self)
+
+
+class FakeLeaseConnection:
+    def __init__(self, leases: FakeLeases):
+        self.leases = leases
+        self.rowcount = 0
+        self._result: List[tuple] = []
+
+    def cursor(self):
+        return self
+
+    def commit(self) -> None:
+        pass
+
+    def fetchall(self) -> List[tuple]:
+        return self._result
+
+    def execute(self, sql: str, params: tuple = ()) -> None:
+        leases = self.leases
+        statement = ' '.join(sql.split())
+        self.rowcount = 0
+        if statement.startswith('CREATE TABLE'):
+            return
+        if statement.startswith('INSERT IGNORE INTO id_generators'):
+            for generator in params:
+                leases.leases.setdefault(generator, (None, None))
+        elif statement.startswith('SELECT generator FROM id_generators'):
+            self._result = [(generator,) for generator in sorted(leases.leases) if leases.expired(generator)]
+        elif statement.startswith('UPDATE id_generators SET owner = %s'):
+            owner, seconds, generator, same_owner = params
+            if leases.leases[generator][0] == same_owner or leases.expired(generator):
+                leases.leases[generator] = (owner, leases.now + seconds)
+                self.rowcount = 1
+        elif statement.startswith('UPDATE id_generators SET owner = NULL'):
+            generator, owner = params
+            if leases.leases[generator][0] == owner:
+                leases.leases[generator] = (None, None)
+                self.rowcount = 1
+        else:
+            raise AssertionError(f"Unexpected statement: {statement}")
+
+
+def check_leases() -> None:
+    leases = FakeLeases()
+    first, second = IdGenerator(leases.connect, lease_seconds=60), IdGenerator(leases.connect, lease_seconds=60)
+    first.next_id()
+    second.next_id()
+    expect(first._generator != second._generator, "Two live processes leased the same generator")
+
+    # A renewal within the lease keeps the number
+    held = first._generator
+    leases.now += 30
+    first._renew_at = 0
+    first.next_id()
+    expect(first._generator == held, "Renewing a live lease changed the generator")
+
+    # Once the first process stops renewing, its number is taken over
+    leases.now += 61
+    second._renew_at = 0
+    second.next_id()
+    others = [IdGenerator(leases.connect, lease_seconds=60) for _ in range(GENERATORS - 1)]
+    for ids in others:
+        ids.next_id()
+    taken = {ids._generator for ids in others}
+    expect(held in taken, "An expired lease was not taken over")
+    expect(len(taken | {second._generator}) == GENERATORS, "Two processes leased the same generator")
+
+    # Its own lease ran out too, so it must not keep making ids with the lost number
+    first._renew_at = first._expires_at = 0
+    try:
+        first.next_id()
+        raise CheckFailed("A process whose generator was taken over still made ids")
+    except StorageUnavailable:
+        pass
+
+    # Releasing frees the number for the next process at once
+    released = others[0]._generator
+    others[0].release()
+    newcomer = IdGenerator(leases.connect, lease_seconds=60)
+    newcomer.next_id()
+    expect(newcomer._generator == released, "A released generator was not reused")
+    print(f"Leases: renewal, takeover after expiry and release behave ({GENERATORS} generators)")
+
+
+def check_fake(count: int, page_size: int, shards: int) -> None:
+    leases = FakeLeases()
+    repository = ShardedRepository(TABLE, [FakeShard(TABLE) for _ in range(shards)],
+                                   IdGenerator(leases.connect))
+    rows = check_rows(count, seed=1)
+    # Every row in the same minute of ids, and some with equal submitted_at, to test the tie-breaks
+    for row in rows[::7]:
+        row['submitted_at'] = rows[0]['submitted_at']
+    run_checks(repository, rows, page_size)
+
+    # Ranges spanning minutes of ids: spread ids over several buckets
+    spread = ShardedRepository(TABLE, [FakeShard(TABLE) for _ in range(shards)], repository.ids)
+    for number, row in enumerate(check_rows(count, seed=2)):
+        values = dict(row, id=(number % 9) * ID_BUCKET_WIDTH + number + 1)
+        spread.shard_for(values).insert_many([values])
+    check_ranges(spread, max(count // 20, 1))
+
+    generators = [IdGenerator(leases.connect) for _ in range(2)]
+    id_lists: List[List[int]] = [[] for _ in generators]
+    threads = [
+        threading.Thread(target=lambda ids, out: out.extend(ids.next_id() for _ in range(count)), args=pair)
+        for pair in zip(generators, id_lists)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    check_distinct_ids(id_lists)
+    check_leases()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Check sharded registration storage')
+    parser.add_argument('--fake', action='store_true', help='Check in-process shards instead of DB_SHARDS')
+    parser.add_argument('--rows', type=int, default=2000, help='Registrations to insert (default: 2000)')
+    parser.add_argument('--page-size', type=int, default=70, help='Admin page size to merge (default: 70)')
+    parser.add_argument('--shards', type=int, default=3, help='In-process shards for --fake (default: 3)')
+    parser.add_argument('--processes', type=int, default=2, help='Processes generating ids (default: 2)')
+    args = parser.parse_args()
+
+    try:
+        if args.fake:
+            check_fake(args.rows, args.page_size, args.shards)
+        else:
+            check_mysql(args.rows, args.page_size, args.processes)
+    except CheckFailed as e:
+        print(f"\nFAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Sharding check failed: {str(e)}")
+        sys.exit(1)
+    print("\nSharding checks passed.")
+
+
+if __name__ == "__main__":
+    main()
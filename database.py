@@ -1,88 +1,441 @@
-import os
-import logging
-import pymysql
-from contextlib import contextmanager
-from typing import Generator
-
-logger = logging.getLogger(__name__)
-
-# Database configuration
-DB_HOST = os.environ.get('DB_HOST', 'localhost')
-DB_USER = os.environ.get('DB_USER', 'root')
-DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Sahil@123456')
-DB_NAME = os.environ.get('DB_NAME', 'lawvriksh_db')
-DB_PORT = int(os.environ.get('DB_PORT', '3306'))
-
-# SSL configuration for Aiven
-SSL_REQUIRED = 'ssl-mode=REQUIRED' in os.environ.get('DATABASE_URL', '') or 'aiven' in os.environ.get('DB_HOST', '')
-
-logger.info(f'Using MySQL database: {DB_HOST}:{DB_PORT}/{DB_NAME}')
-
-def get_db_config():
-    """Get database configuration"""
-    config = {
-        'host': DB_HOST,
-        'user': DB_USER,
-        'password': DB_PASSWORD,
-        'database': DB_NAME,
-        'port': DB_PORT,
-        'autocommit': False,
-        'charset': 'utf8mb4',
-        'connect_timeout': 30,
-    }
-
-    # Add SSL configuration for production (Aiven)
-    if SSL_REQUIRED:
-        config['ssl'] = {'ssl_disabled': False}
-
-    return config
-
-@contextmanager
-def get_db_connection() -> Generator[pymysql.Connection, None, None]:
-    """Get database connection context manager"""
-    connection = None
-    try:
-        config = get_db_config()
-        logger.info(f"Connecting to MySQL at {config['host']}:{config['port']}")
-        connection = pymysql.connect(**config)
-        logger.info("Database connection established successfully")
-        yield connection
-    except Exception as e:
-        logger.error(f"Database connection error: {e}")
-        if connection:
-            try:
-                connection.rollback()
-            except:
-                pass
-        raise
-    finally:
-        if connection:
-            connection.close()
-            logger.info("Database connection closed")
-
-def get_db():
-    """Dependency to get database connection for FastAPI"""
-    with get_db_connection() as connection:
-        yield connection
-
-def verify_database_connection():
-    """Verify database connection and tables exist"""
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
-
-            # Check if required tables exist
-            cursor.execute("SHOW TABLES LIKE 'user_registrations'")
-            if not cursor.fetchone():
-                raise Exception("Table 'user_registrations' does not exist. Please run migrations first.")
-
-            cursor.execute("SHOW TABLES LIKE 'feedback'")
-            if not cursor.fetchone():
-                raise Exception("Table 'feedback' does not exist. Please run migrations first.")
-
-            logger.info('Database connection verified successfully')
-            logger.info('Required tables exist: user_registrations, feedback')
-
-    except Exception as e:
-        logger.error(f'Database verification failed: {str(e)}')
-        raise
+import os
+import time
+import random
+import logging
+import itertools
+import threading
+import pymysql
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Generator, Optional, Set, Tuple
+from storage.base import StorageUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Database configuration
+DB_HOST = os.environ.get('DB_HOST', 'localhost')
+DB_USER = os.environ.get('DB_USER', 'root')
+DB_PASSWORD = os.environ.get('DB_PASSWORD', 'Sahil@123456')
+DB_NAME = os.environ.get('DB_NAME', 'lawvriksh_db')
+DB_PORT = int(os.environ.get('DB_PORT', '3306'))
+
+# SSL configuration for Aiven
+SSL_REQUIRED = 'ssl-mode=REQUIRED' in os.environ.get('DATABASE_URL', '') or 'aiven' in os.environ.get('DB_HOST', '')
+
+# Read replicas for admin reads and exports, e.g. "replica-1:3306,replica-2:3306".
+# Replicas share the primary's credentials unless DB_REPLICA_USER/PASSWORD are set.
+DB_REPLICA_HOSTS = [h.strip() for h in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if h.strip()]
+DB_REPLICA_USER = os.environ.get('DB_REPLICA_USER', DB_USER)
+DB_REPLICA_PASSWORD = os.environ.get('DB_REPLICA_PASSWORD', DB_PASSWORD)
+# Replicas further behind than this many seconds are skipped in favour of the primary
+DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', '5'))
+# Use replicas whose lag can't be read (SHOW REPLICA STATUS denied or empty);
+# otherwise they are skipped, since nothing tells how far behind they are
+DB_REPLICA_ALLOW_UNKNOWN_LAG = os.environ.get('DB_REPLICA_ALLOW_UNKNOWN_LAG', 'false').lower() in ('1', 'true', 'yes')
+# How long a replica's lag (or failure) is trusted before it is checked again
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_CHECK_INTERVAL', '10'))
+
+# Databases user_registrations is spread over by a hash of the email, e.g.
+# "shard-1:3306/lawvriksh_db,shard-2:3306/lawvriksh_db" (the database defaults
+# to DB_NAME). Empty keeps every table on the primary. The order decides where
+# rows live, so only change the list together with moving the rows.
+# Shards share the primary's credentials unless DB_SHARD_USER/PASSWORD are set.
+DB_SHARDS = [s.strip() for s in os.environ.get('DB_SHARDS', '').split(',') if s.strip()]
+DB_SHARD_USER = os.environ.get('DB_SHARD_USER', DB_USER)
+DB_SHARD_PASSWORD = os.environ.get('DB_SHARD_PASSWORD', DB_PASSWORD)
+
+# Socket timeouts in seconds; a dead server should fail a request quickly
+DB_CONNECT_TIMEOUT = float(os.environ.get('DB_CONNECT_TIMEOUT', '5'))
+DB_READ_TIMEOUT = float(os.environ.get('DB_READ_TIMEOUT', '30'))
+DB_WRITE_TIMEOUT = float(os.environ.get('DB_WRITE_TIMEOUT', '30'))
+
+# Extra connection attempts after a transient failure, with jittered backoff
+DB_CONNECT_RETRIES = int(os.environ.get('DB_CONNECT_RETRIES', '2'))
+DB_RETRY_BACKOFF = float(os.environ.get('DB_RETRY_BACKOFF', '0.1'))
+DB_RETRY_BACKOFF_MAX = float(os.environ.get('DB_RETRY_BACKOFF_MAX', '1'))
+
+# Circuit breaker: open once DB_BREAKER_FAILURE_RATE of the connection attempts
+# in the last DB_BREAKER_WINDOW seconds failed (with at least DB_BREAKER_MIN_CALLS
+# attempts), then let DB_BREAKER_PROBES requests through after DB_BREAKER_COOLDOWN
+DB_BREAKER_WINDOW = float(os.environ.get('DB_BREAKER_WINDOW', '30'))
+DB_BREAKER_MIN_CALLS = int(os.environ.get('DB_BREAKER_MIN_CALLS', '5'))
+DB_BREAKER_FAILURE_RATE = float(os.environ.get('DB_BREAKER_FAILURE_RATE', '0.5'))
+DB_BREAKER_COOLDOWN = float(os.environ.get('DB_BREAKER_COOLDOWN', '10'))
+DB_BREAKER_PROBES = int(os.environ.get('DB_BREAKER_PROBES', '1'))
+
+# MySQL errors worth another connection attempt: can't connect, server gone,
+# connection lost, too many connections
+TRANSIENT_ERROR_CODES = {2003, 2006, 2013, 1040, 1203}
+
+logger.info(f'Using MySQL database: {DB_HOST}:{DB_PORT}/{DB_NAME}')
+if DB_REPLICA_HOSTS:
+    logger.info(f"Using MySQL read replicas: {', '.join(DB_REPLICA_HOSTS)}")
+if DB_SHARDS:
+    logger.info(f"Sharding registrations over: {', '.join(DB_SHARDS)}")
+
+def get_db_config():
+    """Get database configuration"""
+    config = {
+        'host': DB_HOST,
+        'user': DB_USER,
+        'password': DB_PASSWORD,
+        'database': DB_NAME,
+        'port': DB_PORT,
+        'autocommit': False,
+        'charset': 'utf8mb4',
+        'connect_timeout': DB_CONNECT_TIMEOUT,
+        'read_timeout': DB_READ_TIMEOUT,
+        'write_timeout': DB_WRITE_TIMEOUT,
+    }
+
+    # Add SSL configuration for production (Aiven)
+    if SSL_REQUIRED:
+        config['ssl'] = {'ssl_disabled': False}
+
+    return config
+
+def get_replica_config(replica: str):
+    """Get database configuration for a read replica given as host[:port]"""
+    host, _, port = replica.partition(':')
+    config = get_db_config()
+    config.update({
+        'host': host,
+        'port': int(port) if port else DB_PORT,
+        'user': DB_REPLICA_USER,
+        'password': DB_REPLICA_PASSWORD,
+    })
+    return config
+
+def get_shard_config(shard: str):
+    """Get database configuration for a shard given as host[:port][/database]"""
+    address, _, database = shard.partition('/')
+    host, _, port = address.partition(':')
+    config = get_db_config()
+    config.update({
+        'host': host,
+        'port': int(port) if port else DB_PORT,
+        'database': database or DB_NAME,
+        'user': DB_SHARD_USER,
+        'password': DB_SHARD_PASSWORD,
+    })
+    return config
+
+# Last known state of each replica: (checked_at, usable)
+_replica_status: Dict[str, Tuple[float, bool]] = {}
+_replica_counter = itertools.count()
+# Replicas whose unknown lag has been logged, so it is reported once
+_unknown_lag_logged: Set[str] = set()
+
+
+def get_replica_lag(connection: pymysql.Connection) -> Optional[float]:
+    """Return how many seconds a replica is behind its source
+
+    Returns None when the replication status can't be read (no privilege or
+    not configured as a replica) and infinity when replication is stopped.
+    """
+    cursor = connection.cursor(pymysql.cursors.DictCursor)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except pymysql.err.ProgrammingError:
+            # MySQL before 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+        status = cursor.fetchone()
+    except pymysql.Error as e:
+        logger.warning(f"Could not read replication status: {e}")
+        return None
+    finally:
+        cursor.close()
+
+    if not status:
+        return None
+    lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    return float('inf') if lag is None else float(lag)
+
+
+def replica_usable(lag: Optional[float]) -> bool:
+    """Whether a replica with ``lag`` (None when unknown) may serve reads"""
+    if lag is None:
+        return DB_REPLICA_ALLOW_UNKNOWN_LAG
+    return lag <= DB_REPLICA_MAX_LAG
+
+
+def _connect_replica() -> Optional[pymysql.Connection]:
+    """Connect to the next usable replica in rotation, or return None
+
+    A replica is usable while it accepts connections and lags at most
+    DB_REPLICA_MAX_LAG seconds; one whose lag can't be read is only used
+    with DB_REPLICA_ALLOW_UNKNOWN_LAG. Its lag is re-checked on the acquired
+    connection once the last check is older than DB_REPLICA_CHECK_INTERVAL,
+    so healthy replicas cost no extra round trip on most requests.
+    """
+    for _ in range(len(DB_REPLICA_HOSTS)):
+        replica = DB_REPLICA_HOSTS[next(_replica_counter) % len(DB_REPLICA_HOSTS)]
+        now = time.monotonic()
+        checked_at, usable = _replica_status.get(replica, (None, True))
+        fresh = checked_at is not None and now - checked_at < DB_REPLICA_CHECK_INTERVAL
+        if fresh and not usable:
+            continue
+
+        try:
+            connection = pymysql.connect(**get_replica_config(replica))
+        except pymysql.Error as e:
+            logger.warning(f"Read replica {replica} unavailable: {e}")
+            _replica_status[replica] = (now, False)
+            continue
+
+        if not fresh:
+            lag = get_replica_lag(connection)
+            usable = replica_usable(lag)
+            _replica_status[replica] = (now, usable)
+            if lag is None and replica not in _unknown_lag_logged:
+                _unknown_lag_logged.add(replica)
+                logger.warning(f"Replication lag of read replica {replica} is unknown, "
+                               f"{'using it anyway' if usable else 'reading from the primary instead'}")
+            if not usable:
+                if lag is not None:
+                    logger.warning(f"Read replica {replica} is {lag}s behind, skipping")
+                connection.close()
+                continue
+
+        return connection
+
+    return None
+
+
+class DatabaseUnavailable(StorageUnavailable):
+    """Raised instead of connecting while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Fails connection attempts fast while the primary database is down
+
+    closed    - attempts go through; the outcomes of the last ``window``
+                seconds are kept, and the circuit opens once at least
+                ``min_calls`` attempts were made and ``failure_rate`` failed.
+    open      - attempts fail at once with DatabaseUnavailable until
+                ``cooldown`` seconds have passed.
+    half_open - up to ``probes`` requests try to connect; a success closes
+                the circuit and a failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window: float = DB_BREAKER_WINDOW, min_calls: int = DB_BREAKER_MIN_CALLS,
+                 failure_rate: float = DB_BREAKER_FAILURE_RATE, cooldown: float = DB_BREAKER_COOLDOWN,
+                 probes: int = DB_BREAKER_PROBES):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.probes = probes
+        self.state = self.CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise DatabaseUnavailable unless a connection attempt may proceed"""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.cooldown - time.monotonic()
+                if remaining > 0:
+                    raise DatabaseUnavailable(f"Database circuit open, retry in {remaining:.1f}s", remaining)
+                self.state = self.HALF_OPEN
+                self._probes_in_flight = 0
+                logger.info("Database circuit half-open, probing")
+
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.probes:
+                    raise DatabaseUnavailable("Database circuit half-open, probe in progress")
+                self._probes_in_flight += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+                logger.warning("Database circuit closed, connections restored")
+            self._record(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._open("probe failed")
+                return
+            self._record(False)
+            if (self.state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                    and self._failures >= self.failure_rate * len(self._outcomes)):
+                self._open(f"{self._failures} of {len(self._outcomes)} connection attempts failed")
+
+    def _record(self, ok: bool) -> None:
+        # Caller holds the lock
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        if not ok:
+            self._failures += 1
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            if not self._outcomes.popleft()[1]:
+                self._failures -= 1
+
+    def _open(self, reason: str) -> None:
+        # Caller holds the lock
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._failures = 0
+        logger.error(f"Database circuit opened for {self.cooldown:.0f}s: {reason}")
+
+
+circuit_breaker = CircuitBreaker()
+# Each shard fails on its own, so each has its own breaker
+shard_circuit_breakers: Dict[str, CircuitBreaker] = {shard: CircuitBreaker() for shard in DB_SHARDS}
+
+
+def _connect(config: dict, breaker: CircuitBreaker) -> pymysql.Connection:
+    """Connect through a circuit breaker, retrying transient errors"""
+    breaker.before_call()
+    logger.debug("Connecting to MySQL at %s:%s", config['host'], config['port'])
+
+    for attempt in range(DB_CONNECT_RETRIES + 1):
+        try:
+            connection = pymysql.connect(**config)
+        except pymysql.err.OperationalError as e:
+            if e.args[0] not in TRANSIENT_ERROR_CODES or attempt == DB_CONNECT_RETRIES:
+                breaker.record_failure()
+                raise
+            # Full jitter keeps workers from retrying in lockstep
+            delay = random.uniform(0, min(DB_RETRY_BACKOFF_MAX, DB_RETRY_BACKOFF * 2 ** attempt))
+            logger.warning(f"Transient MySQL connection error ({e.args[0]}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+        except Exception:
+            breaker.record_failure()
+            raise
+        else:
+            breaker.record_success()
+            return connection
+
+
+def _connect_primary() -> pymysql.Connection:
+    return _connect(get_db_config(), circuit_breaker)
+
+
+@contextmanager
+def get_db_connection(read_only: bool = False) -> Generator[pymysql.Connection, None, None]:
+    """Get database connection context manager
+
+    With ``read_only`` the connection comes from a read replica when one is
+    configured and caught up, falling back to the primary otherwise. Writes
+    must always use the default primary connection.
+
+    Raises DatabaseUnavailable straight away while the primary's circuit
+    breaker is open.
+    """
+    connection = None
+    try:
+        if read_only and DB_REPLICA_HOSTS:
+            connection = _connect_replica()
+            if connection is None:
+                logger.warning("No read replica available, reading from primary")
+
+        if connection is None:
+            connection = _connect_primary()
+        logger.debug("Database connection established")
+        yield connection
+    except DatabaseUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f"Database connection error: {e}")
+        if connection:
+            try:
+                connection.rollback()
+            except:
+                pass
+        raise
+    finally:
+        if connection:
+            connection.close()
+            logger.debug("Database connection closed")
+
+@contextmanager
+def get_shard_connection(shard: str, read_only: bool = False) -> Generator[pymysql.Connection, None, None]:
+    """Get a connection to one of DB_SHARDS, like get_db_connection() for the primary
+
+    Shards have no replicas, so ``read_only`` connections go to the shard
+    itself. Raises DatabaseUnavailable straight away while the shard's
+    circuit breaker is open.
+    """
+    connection = None
+    try:
+        connection = _connect(get_shard_config(shard), shard_circuit_breakers[shard])
+        yield connection
+    except DatabaseUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f"Shard {shard} connection error: {e}")
+        if connection:
+            try:
+                connection.rollback()
+            except:
+                pass
+        raise
+    finally:
+        if connection:
+            connection.close()
+
+def get_db():
+    """Dependency to get database connection for FastAPI"""
+    with get_db_connection() as connection:
+        yield connection
+
+# Set by the gunicorn master once the schema has been verified (see
+# gunicorn.conf.py) so forked workers can skip the check on startup.
+SCHEMA_VERIFIED_ENV = 'LAWVRIKSH_SCHEMA_VERIFIED'
+REQUIRED_TABLES = ('user_registrations', 'feedback', 'user_agents', 'submission_receipts')
+
+_schema_verified = False
+
+
+def verify_database_connection():
+    """Verify database connection and tables exist
+
+    The check runs at most once per process tree: the result is cached in the
+    module and exported through the environment so workers forked after a
+    successful check (gunicorn ``preload_app``) don't reconnect on startup.
+    """
+    global _schema_verified
+    if _schema_verified or os.environ.get(SCHEMA_VERIFIED_ENV) == '1':
+        _schema_verified = True
+        logger.info('Database schema already verified, skipping check')
+        return
+
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+
+            # Check all required tables exist with a single round trip
+            cursor.execute(
+                "SELECT table_name FROM information_schema.tables "
+                f"WHERE table_schema = DATABASE() AND table_name IN ({', '.join(['%s'] * len(REQUIRED_TABLES))})",
+                REQUIRED_TABLES
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+
+            for table in REQUIRED_TABLES:
+                if table not in existing:
+                    raise Exception(f"Table '{table}' does not exist. Run 'python migrate.py' first.")
+
+            logger.info('Database connection verified successfully')
+            logger.info(f"Required tables exist: {', '.join(REQUIRED_TABLES)}")
+
+    except Exception as e:
+        logger.error(f'Database verification failed: {str(e)}')
+        raise
+
+    _schema_verified = True
+    os.environ[SCHEMA_VERIFIED_ENV] = '1'
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for testing at production scale.
+Loads deterministic, realistic user_registrations and feedback rows into the
+configured storage backend, with submitted_at spread over past months.
+
+    python generate_data.py --registrations 1000000 --feedback 1000000
+    python generate_data.py --feedback 200000 --seed 7 --months 6 --end 2024-06-30
+    python generate_data.py --registrations 1000000 --load-data   # MySQL LOAD DATA fast path
+
+The same --seed, --months, --end and counts always produce the same rows.
+Rows are appended; run it against an empty test database. On MySQL, load
+the data before 'manage_partitions.py init', or partitions must already
+cover the oldest generated month.
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+import tempfile
+from datetime import date, datetime
+from itertools import islice
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from storage import STORAGE_BACKEND, get_repository, verify_storage
+from storage.cache import shared_cache
+from utils.synthetic import SyntheticData
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Every n-th generated row is also run through the API's request schema
+VALIDATE_EVERY = 1000
+
+
+def validate(table, row):
+    """Check a generated row against the schema the API validates submissions with"""
+    from schemas import FeedbackCreate, UserRegistrationCreate
+
+    schema = FeedbackCreate if table == 'feedback' else UserRegistrationCreate
+    schema(**{k: v for k, v in row.items() if k not in ('submitted_at', 'ip_address', 'user_agent')})
+
+
+def check_partitions(table, oldest):
+    """Fail early if a partitioned MySQL table can't hold the oldest rows"""
+    from database import get_db_connection
+    from utils.partitions import get_partitions, partition_month
+
+    with get_db_connection() as connection:
+        months = [partition_month(name) for name in get_partitions(connection.cursor(), table)]
+    months = [month for month in months if month]
+    if months and oldest < min(months):
+        raise ValueError(f"{table} has no partition before {min(months)}; generate fewer --months "
+                         f"or load the data before partitioning")
+
+
+def insert_batches(table, rows, batch_size):
+    """Insert through the repository, one transaction per batch"""
+    repository = get_repository(table)
+    loaded = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return loaded
+        loaded += repository.insert_many(batch)
+        if loaded % (batch_size * 20) < batch_size:
+            logger.info(f"  {table}: {loaded} rows")
+
+
+def _tsv_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def load_data_infile(table, rows, batch_size, user_agents):
+    """Bulk-load through LOAD DATA LOCAL INFILE, one file per chunk of rows
+
+    Needs local_infile enabled on the server; user agents are resolved to
+    their ids up front, since the file holds the encoded columns.
+    """
+    import pymysql
+    from database import get_db_config
+    from storage.user_agents import user_agent_dictionary
+
+    repository = get_repository(table)
+    columns = tuple(repository.write_columns) + ('submitted_at',)
+    # LOAD DATA is fastest with large files; batches are only a memory bound
+    chunk_size = max(batch_size, 100000)
+
+    connection = pymysql.connect(**get_db_config(), local_infile=True)
+    try:
+        cursor = connection.cursor()
+        user_agent_ids = {agent: user_agent_dictionary.resolve(cursor, agent) for agent in user_agents}
+        connection.commit()
+
+        loaded = 0
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f'{table}.tsv')
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    return loaded
+                with open(path, 'w', encoding='utf-8', newline='\n') as f:
+                    for row in chunk:
+                        encoded = dict(row, user_agent_id=user_agent_ids.get(row.get('user_agent')))
+                        f.write('\t'.join(_tsv_value(encoded.get(c)) for c in columns) + '\n')
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                    f"({', '.join(columns)})",
+                    (path,)
+                )
+                connection.commit()
+                loaded += len(chunk)
+                logger.info(f"  {table}: {loaded} rows")
+    finally:
+        connection.close()
+
+
+def generate(generator, table, count, args):
+    """Generate and load ``count`` rows into ``table``"""
+    rows = generator.registrations(count) if table == 'user_registrations' else generator.feedback(count)
+
+    def validated():
+        for number, row in enumerate(rows):
+            if number % VALIDATE_EVERY == 0:
+                validate(table, row)
+            yield row
+
+    if STORAGE_BACKEND == 'mysql':
+        check_partitions(table, generator.start)
+
+    logger.info(f"Loading {count} rows into {table}...")
+    start = time.perf_counter()
+    if args.load_data:
+        loaded = load_data_infile(table, validated(), args.batch_size, generator.user_agents)
+    else:
+        loaded = insert_batches(table, validated(), args.batch_size)
+    elapsed = time.perf_counter() - start
+    logger.info(f"✓ {table}: {loaded} rows in {elapsed:.1f}s ({loaded / elapsed:.0f} rows/s)")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Load synthetic registrations and feedback")
+    parser.add_argument('--registrations', type=int, default=0, help='user_registrations rows to generate')
+    parser.add_argument('--feedback', type=int, default=0, help='feedback rows to generate')
+    parser.add_argument('--seed', type=int, default=42, help='Seed; the same seed generates the same rows')
+    parser.add_argument('--months', type=int, default=12, help='Months of history to spread rows over')
+    parser.add_argument('--end', type=date.fromisoformat, default=date.today(),
+                        help='Last day of the generated period (YYYY-MM-DD, default today)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per transaction')
+    parser.add_argument('--load-data', action='store_true',
+                        help='MySQL only: bulk-load with LOAD DATA LOCAL INFILE')
+    args = parser.parse_args()
+
+    if not args.registrations and not args.feedback:
+        parser.error('nothing to generate; pass --registrations and/or --feedback')
+    if STORAGE_BACKEND == 'memory':
+        parser.error('the memory backend lives in the application process; use mysql or sqlite')
+    if args.load_data and STORAGE_BACKEND != 'mysql':
+        parser.error('--load-data needs the mysql backend')
+
+    generator = SyntheticData(args.seed, args.months, args.end)
+    logger.info(f"Generating data for {generator.start} to {generator.end} with seed {args.seed} "
+                f"into {STORAGE_BACKEND}")
+    try:
+        verify_storage()
+        for table, count in (('user_registrations', args.registrations), ('feedback', args.feedback)):
+            if count:
+                generate(generator, table, count, args)
+                shared_cache.invalidate(table)
+    except Exception as e:
+        logger.error(f"❌ Data generation failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,63 @@
-import os
-
-# Server socket
-bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
-backlog = 2048
-
-# Worker processes
-workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
-worker_class = 'uvicorn.workers.UvicornWorker'
-worker_connections = 1000
-timeout = 30
-keepalive = 2
-
-# Restart workers after this many requests, to help prevent memory leaks
-max_requests = 1000
-max_requests_jitter = 100
-
-# Logging
-accesslog = '-'
-errorlog = '-'
-loglevel = 'info'
-access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s'
-
-# Process naming
-proc_name = 'lawvriksh-feedback-fastapi'
-
-# Server mechanics
-daemon = False
-pidfile = None
-user = None
-group = None
-tmp_upload_dir = None
-
-# SSL (if needed)
-keyfile = None
-certfile = None
+import os
+
+# Server socket
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+backlog = 2048
+
+# Worker processes
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+worker_class = 'uvicorn.workers.UvicornWorker'
+worker_connections = 1000
+timeout = 30
+keepalive = 2
+
+# Load the application once in the master so workers fork with modules
+# already imported, and verify the database schema a single time there
+preload_app = True
+
+# Restart workers after this many requests, to help prevent memory leaks.
+# Once /api/memory shows no route retaining memory, set MAX_REQUESTS=0 to
+# keep workers warm instead
+max_requests = int(os.environ.get('MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', '100'))
+
+# Logging
+# Workers hand uvicorn's access and error logs to the application's
+# queue-based pipeline (see post_fork); errorlog covers the master only
+accesslog = '-'
+errorlog = '-'
+loglevel = 'info'
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s'
+
+# Process naming
+proc_name = 'lawvriksh-feedback-fastapi'
+
+# Server mechanics
+daemon = False
+pidfile = None
+user = None
+group = None
+tmp_upload_dir = None
+
+# SSL (if needed)
+keyfile = None
+certfile = None
+
+
+def on_starting(server):
+    """Verify the storage backend once before any worker is forked"""
+    from storage import verify_storage
+    from storage.cache import reset_shared_cache
+    try:
+        verify_storage()
+    except Exception as e:
+        # Workers will retry the check themselves during startup
+        server.log.warning(f'Schema verification in master failed: {e}')
+    # Cleared here so workers restarted later keep the entries they share
+    reset_shared_cache()
+
+
+def post_fork(server, worker):
+    """Move the worker's uvicorn loggers off gunicorn's blocking handlers"""
+    from utils.logging_config import route_server_logs
+    route_server_logs()
@@ -1,152 +1,209 @@
-import os
-import logging
-from datetime import datetime
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
-from contextlib import asynccontextmanager
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-from database import verify_database_connection
-from schemas import HealthResponse, HomeResponse, ErrorResponse
-from routers import users, feedback, admin
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
-    logger.info("Starting up FastAPI application...")
-    verify_database_connection()
-    yield
-    # Shutdown
-    logger.info("Shutting down FastAPI application...")
-
-
-# Create FastAPI app
-app = FastAPI(
-    title="LawVriksh Feedback API",
-    description="API for user registration and feedback collection",
-    version="2.0.0",
-    lifespan=lifespan
-)
-
-# CORS configuration
-cors_origins = [
-    "http://localhost:3000",
-    "http://localhost:5173",
-    "http://localhost:5174",
-    "http://localhost:5175",
-    "https://lawvrikshbetapage.onrender.com",
-    "https://preorder.lawvriksh.com/",
-    "https://lawvriksh.com"
-
-]
-
-# Add production origins from environment variable
-if os.environ.get('CORS_ORIGINS'):
-    production_origins = os.environ.get('CORS_ORIGINS').split(',')
-    cors_origins.extend([origin.strip() for origin in production_origins])
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Mount static files for templates
-app.mount("/static", StaticFiles(directory="templates"), name="static")
-
-# Include routers
-app.include_router(users.router, prefix="/api", tags=["users"])
-app.include_router(feedback.router, prefix="/api", tags=["feedback"])
-app.include_router(admin.router, prefix="/api", tags=["admin"])
-
-
-@app.get("/", response_model=HomeResponse)
-async def home():
-    """Root endpoint"""
-    return HomeResponse(
-        message="LawVriksh Feedback API",
-        version="2.0.0",
-        endpoints={
-            'health': '/api/health',
-            'register': '/api/register',
-            'feedback': '/api/feedback',
-            'admin': '/admin'
-        }
-    )
-
-
-@app.get("/admin", response_class=HTMLResponse)
-async def admin_dashboard():
-    """Admin dashboard for managing data and downloading Excel files"""
-    try:
-        with open("templates/admin.html", "r", encoding="utf-8") as f:
-            html_content = f.read()
-        return HTMLResponse(content=html_content)
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="Admin dashboard not found")
-
-
-@app.get("/api/health", response_model=HealthResponse)
-async def health_check():
-    """Health check endpoint"""
-    return HealthResponse(
-        status="healthy",
-        timestamp=datetime.utcnow()
-    )
-
-
-@app.get("/favicon.ico")
-async def favicon():
-    """Handle favicon requests to prevent 404 errors"""
-    return JSONResponse(status_code=204, content=None)
-
-
-@app.exception_handler(404)
-async def not_found_handler(request: Request, exc: HTTPException):
-    return JSONResponse(
-        status_code=404,
-        content={"error": "Endpoint not found"}
-    )
-
-
-@app.exception_handler(500)
-async def internal_error_handler(request: Request, exc: HTTPException):
-    return JSONResponse(
-        status_code=500,
-        content={"error": "Internal server error"}
-    )
-
-
-@app.exception_handler(Exception)
-async def general_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception: {str(exc)}")
-    return JSONResponse(
-        status_code=500,
-        content={"error": "Internal server error", "detail": "An unexpected error occurred"}
-    )
-
-
-if __name__ == "__main__":
-    import uvicorn
-    port = int(os.environ.get('PORT', 8000))
-    debug = os.environ.get('FLASK_ENV') == 'development'
-    
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=debug,
-        log_level="info"
-    )
+import os
+import logging
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging before anything else logs at import time
+from utils.logging_config import setup_logging
+setup_logging()
+
+from storage import STORAGE_BACKEND, close_storage, verify_storage
+from storage.base import StorageUnavailable
+from storage.cache import reset_shared_cache
+from storage.spool import spool, start_spool, stop_spool
+from utils.executor import CPUTaskError, cpu_executor
+from utils.memory import MemoryTrackingMiddleware
+from utils.profiling import ProfilingMiddleware, start_profiling, stop_profiling
+from utils.static_assets import StaticAssets, static_assets
+from utils.text_analytics import start_text_analytics, stop_text_analytics
+from utils.timeseries import start_timeseries, stop_timeseries
+from schemas import HealthResponse, HomeResponse, ErrorResponse
+from routers import users, feedback, admin
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    logger.info("Starting up FastAPI application...")
+    verify_storage()
+    reset_shared_cache()
+    start_spool()
+    start_profiling()
+    static_assets.load()
+    start_timeseries()
+    start_text_analytics()
+    yield
+    # Shutdown
+    logger.info("Shutting down FastAPI application...")
+    stop_text_analytics()
+    stop_timeseries()
+    stop_profiling()
+    stop_spool()
+    close_storage()
+    cpu_executor.shutdown()
+
+
+# Create FastAPI app
+app = FastAPI(
+    title="LawVriksh Feedback API",
+    description="API for user registration and feedback collection",
+    version="2.0.0",
+    lifespan=lifespan
+)
+
+# CORS configuration
+cors_origins = [
+    "http://localhost:3000",
+    "http://localhost:5173",
+    "http://localhost:5174",
+    "http://localhost:5175",
+    "https://lawvrikshbetapage.onrender.com",
+    "https://preorder.lawvriksh.com/",
+    "https://lawvriksh.com"
+
+]
+
+# Add production origins from environment variable
+if os.environ.get('CORS_ORIGINS'):
+    production_origins = os.environ.get('CORS_ORIGINS').split(',')
+    cors_origins.extend([origin.strip() for origin in production_origins])
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=cors_origins,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Memory retained per route, reported by /api/memory
+app.add_middleware(MemoryTrackingMiddleware)
+
+# Admins can profile a single request with an X-Profile header
+app.add_middleware(ProfilingMiddleware)
+
+# Static files are served precompressed from memory, see utils/static_assets.py
+app.mount("/static", StaticAssets(static_assets), name="static")
+
+# Include routers
+app.include_router(users.router, prefix="/api", tags=["users"])
+app.include_router(feedback.router, prefix="/api", tags=["feedback"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+
+
+@app.get("/", response_model=HomeResponse)
+async def home():
+    """Root endpoint"""
+    return HomeResponse(
+        message="LawVriksh Feedback API",
+        version="2.0.0",
+        endpoints={
+            'health': '/api/health',
+            'register': '/api/register',
+            'feedback': '/api/feedback',
+            'admin': '/admin'
+        }
+    )
+
+
+@app.get("/admin", response_class=HTMLResponse)
+async def admin_dashboard(request: Request):
+    """Admin dashboard for managing data and downloading Excel files"""
+    if static_assets.get("admin.html") is None:
+        raise HTTPException(status_code=404, detail="Admin dashboard not found")
+    # Revalidated on every load, so a new dashboard shows up at once
+    return static_assets.response(request, "admin.html", cache_control="no-cache")
+
+
+def _database_circuit_state():
+    if STORAGE_BACKEND != 'mysql':
+        return None
+    # Imported here so other backends never load the MySQL driver
+    from database import circuit_breaker
+    return circuit_breaker.state
+
+
+@app.get("/api/health", response_model=HealthResponse)
+async def health_check():
+    """Health check endpoint"""
+    return HealthResponse(
+        status="healthy",
+        timestamp=datetime.utcnow(),
+        spool_depth=spool.depth if spool.is_open else None,
+        database_circuit=_database_circuit_state(),
+        cpu_queue_depth=cpu_executor.queue_depth
+    )
+
+
+@app.get("/favicon.ico")
+async def favicon():
+    """Handle favicon requests to prevent 404 errors"""
+    return JSONResponse(status_code=204, content=None)
+
+
+@app.exception_handler(404)
+async def not_found_handler(request: Request, exc: HTTPException):
+    return JSONResponse(
+        status_code=404,
+        content={"error": "Endpoint not found"}
+    )
+
+
+@app.exception_handler(500)
+async def internal_error_handler(request: Request, exc: HTTPException):
+    return JSONResponse(
+        status_code=500,
+        content={"error": "Internal server error"}
+    )
+
+
+@app.exception_handler(StorageUnavailable)
+async def storage_unavailable_handler(request: Request, exc: StorageUnavailable):
+    # Answered without touching the database so clients back off instead of piling up
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Service temporarily unavailable"},
+        headers={"Retry-After": str(max(1, int(exc.retry_after + 0.999)))}
+    )
+
+
+@app.exception_handler(CPUTaskError)
+async def cpu_task_error_handler(request: Request, exc: CPUTaskError):
+    # A full pool sheds load like an unavailable database; timeouts are the caller's to retry
+    logger.warning(f"CPU task not completed: {str(exc)}")
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+    return JSONResponse(status_code=exc.status_code, content={"error": exc.error}, headers=headers)
+
+
+@app.exception_handler(Exception)
+async def general_exception_handler(request: Request, exc: Exception):
+    logger.error(f"Unhandled exception: {str(exc)}")
+    return JSONResponse(
+        status_code=500,
+        content={"error": "Internal server error", "detail": "An unexpected error occurred"}
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+    port = int(os.environ.get('PORT', 8000))
+    debug = os.environ.get('FLASK_ENV') == 'development'
+    
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        reload=debug,
+        log_level="info",
+        # Leave uvicorn's loggers to propagate into the queue-based pipeline
+        log_config=None
+    )
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Partition management for the user_registrations and feedback tables.
+
+    python manage_partitions.py init       # convert tables to monthly partitions (one-off)
+    python manage_partitions.py maintain   # pre-create future partitions, archive expired ones
+    python manage_partitions.py status     # list partitions and row estimates
+
+Run 'maintain' daily (e.g. from cron). Retention and look-ahead are set with
+PARTITION_RETENTION_MONTHS and PARTITION_PRECREATE_MONTHS; archives are written
+to ARCHIVE_DIR.
+"""
+
+import sys
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import get_db_connection
+from utils.partitions import (
+    PARTITIONED_TABLES, PARTITION_RETENTION_MONTHS, PARTITION_PRECREATE_MONTHS,
+    ARCHIVE_FORMATS, partition_table, maintain_partitions
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def show_status():
+    """Log every partition with its estimated row count"""
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        for table in PARTITIONED_TABLES:
+            cursor.execute("""
+                SELECT PARTITION_NAME, TABLE_ROWS
+                FROM INFORMATION_SCHEMA.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                ORDER BY PARTITION_ORDINAL_POSITION
+            """, (table,))
+            partitions = cursor.fetchall()
+            if not partitions or partitions[0][0] is None:
+                logger.info(f"{table}: not partitioned")
+                continue
+            logger.info(f"{table}: {len(partitions)} partitions")
+            for name, rows in partitions:
+                logger.info(f"  - {name}: ~{rows} rows")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Manage monthly partitions on submitted_at")
+    parser.add_argument('command', choices=['init', 'maintain', 'status'])
+    parser.add_argument('--format', choices=ARCHIVE_FORMATS, default='csv.gz',
+                        help='Archive file format for expired partitions')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'init':
+            for table in PARTITIONED_TABLES:
+                partition_table(table)
+        elif args.command == 'maintain':
+            logger.info(f"Keeping {PARTITION_PRECREATE_MONTHS} months ahead, "
+                        f"{PARTITION_RETENTION_MONTHS} months of retention")
+            maintain_partitions(args.format)
+        show_status()
+    except Exception as e:
+        logger.error(f"❌ Partition {args.command} failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
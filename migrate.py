@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for the MySQL database.
+
+    python migrate.py apply                       # apply pending migrations (the default)
+    python migrate.py apply --to 1                # apply up to and including version 1
+    python migrate.py status                      # applied/pending migrations and schema drift
+    python migrate.py sync-indexes [--drop-extra] # make indexes match storage/schema.py
+
+storage/schema.py is the one definition of the tables; migrations/ holds the
+numbered steps that bring a database to it, recorded in schema_migrations.
+Status exits non-zero when the database differs from the schema.
+"""
+
+import sys
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import get_db_connection
+from storage.schema import SCHEMA
+from utils.migrations import apply_migrations, migration_status, schema_drift, sync_indexes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def show_status():
+    """Log migrations and schema drift, returning True if the database matches the schema"""
+    for migration in migration_status():
+        state = 'applied' if migration['applied'] else 'pending'
+        if migration.get('missing'):
+            state += ', file missing'
+        elif migration['modified']:
+            state += ', file changed since'
+        logger.info(f"  {migration['name']}: {state}")
+
+    with get_db_connection() as connection:
+        drift = schema_drift(connection.cursor())
+    for table, kind, detail in drift:
+        logger.warning(f"  {table}: {kind.replace('_', ' ')} {detail}")
+    if not drift:
+        logger.info("✓ Database matches storage/schema.py")
+    return not drift
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Apply and check schema migrations")
+    parser.add_argument('command', nargs='?', default='apply', choices=['apply', 'status', 'sync-indexes'])
+    parser.add_argument('--to', type=int, help='Last migration version to apply')
+    parser.add_argument('--drop-extra', action='store_true',
+                        help='sync-indexes: also drop indexes storage/schema.py does not define')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'apply':
+            applied = apply_migrations(args.to)
+            logger.info(f"✓ Applied {len(applied)} migration(s)" if applied else "✓ No pending migrations")
+        elif args.command == 'sync-indexes':
+            with get_db_connection() as connection:
+                cursor = connection.cursor()
+                for table in SCHEMA:
+                    sync_indexes(cursor, table, args.drop_extra)
+                connection.commit()
+        if not show_status() and args.command == 'status':
+            sys.exit(1)
+    except Exception as e:
+        logger.error(f"❌ Migration {args.command} failed: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Migration script to dictionary-encode user agents.
+Moves the raw user_agent TEXT of user_registrations and feedback into the
+user_agents lookup table and points each row at it through user_agent_id.
+
+Rows are converted in small batches, each committed on its own, so the
+script can run against a live database and be resumed at any time.
+
+    python migrate_user_agents.py                      # create table/columns and backfill
+    python migrate_user_agents.py --drop-text-column   # backfill stragglers, then drop user_agent
+
+Deploy the application only after the backfill has run; drop the old column
+once the new version is serving traffic.
+"""
+
+import sys
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import get_db_connection, get_db_config
+from storage.user_agents import USER_AGENTS_TABLE_SQL, UserAgentDictionary
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TABLES = ('user_registrations', 'feedback')
+
+
+def check_column_exists(cursor, table_name, column_name):
+    """Check if a column exists in a table"""
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = %s
+        AND COLUMN_NAME = %s
+    """, (table_name, column_name))
+    return cursor.fetchone()[0] > 0
+
+
+def prepare_schema():
+    """Create the lookup table and the user_agent_id columns"""
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(USER_AGENTS_TABLE_SQL)
+        logger.info("✓ user_agents table ready")
+
+        for table in TABLES:
+            if not check_column_exists(cursor, table, 'user_agent_id'):
+                logger.info(f"Adding user_agent_id column to {table}...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN user_agent_id INT DEFAULT NULL AFTER ip_address")
+            logger.info(f"✓ {table}.user_agent_id column ready")
+        connection.commit()
+
+
+def backfill_table(table, dictionary, batch_size):
+    """Convert rows that still only have the TEXT user agent"""
+    converted = 0
+    last_id = 0
+    while True:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT id, user_agent FROM {table}
+                WHERE id > %s AND user_agent_id IS NULL AND user_agent IS NOT NULL
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            # One UPDATE per distinct browser in the batch rather than per row
+            ids_by_agent = {}
+            for row_id, user_agent in rows:
+                ids_by_agent.setdefault(user_agent, []).append(row_id)
+
+            resolved = {}
+            for user_agent, row_ids in ids_by_agent.items():
+                user_agent_id = dictionary.lookup(user_agent)
+                if user_agent_id is None:
+                    user_agent_id = resolved[user_agent] = dictionary.resolve(cursor, user_agent)
+                cursor.execute(
+                    f"UPDATE {table} SET user_agent_id = %s WHERE id IN ({', '.join(['%s'] * len(row_ids))})",
+                    (user_agent_id, *row_ids)
+                )
+            connection.commit()
+            for user_agent, user_agent_id in resolved.items():
+                dictionary.remember(user_agent, user_agent_id)
+
+        converted += len(rows)
+        last_id = rows[-1][0]
+        logger.info(f"  {table}: {converted} rows converted (up to id {last_id})")
+
+    return converted
+
+
+def drop_text_column(table):
+    """Drop the raw user_agent TEXT column"""
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        if check_column_exists(cursor, table, 'user_agent'):
+            logger.info(f"Dropping {table}.user_agent...")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN user_agent")
+            connection.commit()
+        logger.info(f"✓ {table}.user_agent column removed")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Dictionary-encode stored user agents")
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows converted per transaction')
+    parser.add_argument('--drop-text-column', action='store_true',
+                        help='Drop the raw user_agent column after the backfill')
+    args = parser.parse_args()
+
+    config = get_db_config()
+    logger.info(f"Database: {config['host']}:{config['port']}/{config['database']}")
+
+    try:
+        prepare_schema()
+        dictionary = UserAgentDictionary()
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            pending = [t for t in TABLES if check_column_exists(cursor, t, 'user_agent')]
+
+        for table in pending:
+            logger.info(f"Backfilling {table}...")
+            total = backfill_table(table, dictionary, args.batch_size)
+            logger.info(f"✓ {table}: {total} rows converted")
+            if args.drop_text_column:
+                drop_text_column(table)
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    logger.info("🎉 Migration completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
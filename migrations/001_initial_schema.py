@@ -0,0 +1,8 @@
+"""Create every table of storage/schema.py that doesn't exist yet"""
+
+from storage.schema import SCHEMA
+
+
+def upgrade(cursor):
+    for table in SCHEMA.values():
+        cursor.execute(table.create_sql())
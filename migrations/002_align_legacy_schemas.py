@@ -0,0 +1,17 @@
+"""Bring databases made by the old setup scripts in line with storage/schema.py
+
+init_mysql.py, complete_database_setup.sql and the original
+001_initial_schema.sql each created the tables with different indexes
+(idx_phone, idx_name, idx_overall_satisfaction, ...). This adds the columns
+and indexes the application relies on; indexes it doesn't use are left in
+place and listed by 'migrate.py status', to be dropped with
+'migrate.py sync-indexes --drop-extra' once nothing else needs them.
+"""
+
+from utils.migrations import add_column_if_missing, sync_indexes
+
+
+def upgrade(cursor):
+    for table in ('user_registrations', 'feedback'):
+        add_column_if_missing(cursor, table, 'user_agent_id')
+        sync_indexes(cursor, table)
@@ -0,0 +1,12 @@
+"""Add the country and region located from each row's ip_address
+
+Existing rows stay empty until 'python backfill_locations.py' fills them in.
+"""
+
+from utils.migrations import add_column_if_missing
+
+
+def upgrade(cursor):
+    for table in ('user_registrations', 'feedback'):
+        add_column_if_missing(cursor, table, 'country')
+        add_column_if_missing(cursor, table, 'region')
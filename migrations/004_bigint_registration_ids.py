@@ -0,0 +1,18 @@
+"""Widen user_registrations.id to BIGINT
+
+With DB_SHARDS set, registrations are stored under time-ordered ids made by
+the application (see storage/sharded.py), which don't fit an INT. MySQL
+rebuilds the table to change the type, so apply this in a quiet period on
+large tables; databases created from storage/schema.py already have BIGINT.
+"""
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        SELECT DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_registrations' AND COLUMN_NAME = 'id'
+    """)
+    row = cursor.fetchone()
+    if row and row[0].lower() != 'bigint':
+        # The primary key itself is kept, including (id, submitted_at) on partitioned tables
+        cursor.execute("ALTER TABLE user_registrations MODIFY id BIGINT NOT NULL AUTO_INCREMENT")
@@ -1,289 +1,379 @@
-from datetime import datetime
-from typing import Optional, Dict, Any
-import pymysql
-from database import get_db_connection
-import logging
-
-logger = logging.getLogger(__name__)
-
-
-class UserRegistration:
-    def __init__(self, id: Optional[int] = None, name: str = "", email: str = "",
-                 phone: str = "", gender: Optional[str] = None, profession: Optional[str] = None,
-                 user_type: str = "", submitted_at: Optional[datetime] = None,
-                 ip_address: Optional[str] = None, user_agent: Optional[str] = None):
-        self.id = id
-        self.name = name
-        self.email = email
-        self.phone = phone
-        self.gender = gender
-        self.profession = profession
-        self.user_type = user_type
-        self.submitted_at = submitted_at
-        self.ip_address = ip_address
-        self.user_agent = user_agent
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            'id': self.id,
-            'name': self.name,
-            'email': self.email,
-            'phone': self.phone,
-            'gender': self.gender,
-            'profession': self.profession,
-            'user_type': self.user_type,
-            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
-            'ip_address': self.ip_address,
-            'user_agent': self.user_agent
-        }
-
-    @classmethod
-    def create(cls, name: str, email: str, phone: str, user_type: str,
-               gender: Optional[str] = None, profession: Optional[str] = None,
-               ip_address: Optional[str] = None, user_agent: Optional[str] = None) -> 'UserRegistration':
-        """Create a new user registration"""
-        try:
-            with get_db_connection() as connection:
-                cursor = connection.cursor()
-
-                query = """
-                    INSERT INTO user_registrations
-                    (name, email, phone, gender, profession, user_type, ip_address, user_agent)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                values = (name, email, phone, gender, profession, user_type, ip_address, user_agent)
-
-                cursor.execute(query, values)
-                connection.commit()
-
-                # Get the created record
-                user_id = cursor.lastrowid
-                cursor.execute("SELECT * FROM user_registrations WHERE id = %s", (user_id,))
-                row = cursor.fetchone()
-
-                if row:
-                    return cls._from_row(row)
-                else:
-                    raise Exception("Failed to retrieve created user registration")
-
-        except Exception as e:
-            logger.error(f"Error creating user registration: {e}")
-            raise
-
-    @classmethod
-    def get_all(cls, page: int = 1, per_page: int = 50) -> tuple[list['UserRegistration'], int]:
-        """Get all user registrations with pagination"""
-        try:
-            with get_db_connection() as connection:
-                cursor = connection.cursor()
-
-                # Get total count
-                cursor.execute("SELECT COUNT(*) FROM user_registrations")
-                total = cursor.fetchone()[0]
-
-                # Get paginated results
-                offset = (page - 1) * per_page
-                query = """
-                    SELECT * FROM user_registrations
-                    ORDER BY submitted_at DESC
-                    LIMIT %s OFFSET %s
-                """
-                cursor.execute(query, (per_page, offset))
-                rows = cursor.fetchall()
-
-                registrations = [cls._from_row(row) for row in rows]
-                return registrations, total
-
-        except Exception as e:
-            logger.error(f"Error getting user registrations: {e}")
-            raise
-
-    @classmethod
-    def _from_row(cls, row: tuple) -> 'UserRegistration':
-        """Create UserRegistration instance from database row"""
-        return cls(
-            id=row[0],
-            name=row[1],
-            email=row[2],
-            phone=row[3],
-            gender=row[4],
-            profession=row[5],
-            user_type=row[6],
-            submitted_at=row[7],
-            ip_address=row[8],
-            user_agent=row[9]
-        )
-
-
-
-class Feedback:
-    def __init__(self, id: Optional[int] = None, visual_design: Optional[int] = None,
-                 ease_of_navigation: Optional[int] = None, mobile_responsiveness: Optional[int] = None,
-                 overall_satisfaction: Optional[int] = None, ease_of_tasks: Optional[int] = None,
-                 quality_of_services: Optional[int] = None, visual_design_issue: Optional[str] = None,
-                 ease_of_navigation_issue: Optional[str] = None, mobile_responsiveness_issue: Optional[str] = None,
-                 overall_satisfaction_issue: Optional[str] = None, ease_of_tasks_issue: Optional[str] = None,
-                 quality_of_services_issue: Optional[str] = None, like_most: Optional[str] = None,
-                 improvements: Optional[str] = None, features: Optional[str] = None,
-                 legal_challenges: Optional[str] = None, additional_comments: Optional[str] = None,
-                 contact_willing: Optional[str] = None, contact_email: Optional[str] = None,
-                 submitted_at: Optional[datetime] = None, ip_address: Optional[str] = None,
-                 user_agent: Optional[str] = None):
-        self.id = id
-        self.visual_design = visual_design
-        self.ease_of_navigation = ease_of_navigation
-        self.mobile_responsiveness = mobile_responsiveness
-        self.overall_satisfaction = overall_satisfaction
-        self.ease_of_tasks = ease_of_tasks
-        self.quality_of_services = quality_of_services
-        self.visual_design_issue = visual_design_issue
-        self.ease_of_navigation_issue = ease_of_navigation_issue
-        self.mobile_responsiveness_issue = mobile_responsiveness_issue
-        self.overall_satisfaction_issue = overall_satisfaction_issue
-        self.ease_of_tasks_issue = ease_of_tasks_issue
-        self.quality_of_services_issue = quality_of_services_issue
-        self.like_most = like_most
-        self.improvements = improvements
-        self.features = features
-        self.legal_challenges = legal_challenges
-        self.additional_comments = additional_comments
-        self.contact_willing = contact_willing
-        self.contact_email = contact_email
-        self.submitted_at = submitted_at
-        self.ip_address = ip_address
-        self.user_agent = user_agent
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            'id': self.id,
-            'visual_design': self.visual_design,
-            'ease_of_navigation': self.ease_of_navigation,
-            'mobile_responsiveness': self.mobile_responsiveness,
-            'overall_satisfaction': self.overall_satisfaction,
-            'ease_of_tasks': self.ease_of_tasks,
-            'quality_of_services': self.quality_of_services,
-            'visual_design_issue': self.visual_design_issue,
-            'ease_of_navigation_issue': self.ease_of_navigation_issue,
-            'mobile_responsiveness_issue': self.mobile_responsiveness_issue,
-            'overall_satisfaction_issue': self.overall_satisfaction_issue,
-            'ease_of_tasks_issue': self.ease_of_tasks_issue,
-            'quality_of_services_issue': self.quality_of_services_issue,
-            'like_most': self.like_most,
-            'improvements': self.improvements,
-            'features': self.features,
-            'legal_challenges': self.legal_challenges,
-            'additional_comments': self.additional_comments,
-            'contact_willing': self.contact_willing,
-            'contact_email': self.contact_email,
-            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
-            'ip_address': self.ip_address,
-            'user_agent': self.user_agent
-        }
-
-    @classmethod
-    def create(cls, visual_design: Optional[int] = None, ease_of_navigation: Optional[int] = None,
-               mobile_responsiveness: Optional[int] = None, overall_satisfaction: Optional[int] = None,
-               ease_of_tasks: Optional[int] = None, quality_of_services: Optional[int] = None,
-               visual_design_issue: Optional[str] = None, ease_of_navigation_issue: Optional[str] = None,
-               mobile_responsiveness_issue: Optional[str] = None, overall_satisfaction_issue: Optional[str] = None,
-               ease_of_tasks_issue: Optional[str] = None, quality_of_services_issue: Optional[str] = None,
-               like_most: Optional[str] = None, improvements: Optional[str] = None,
-               features: Optional[str] = None, legal_challenges: Optional[str] = None,
-               additional_comments: Optional[str] = None, contact_willing: Optional[str] = None,
-               contact_email: Optional[str] = None, ip_address: Optional[str] = None,
-               user_agent: Optional[str] = None) -> 'Feedback':
-        """Create a new feedback"""
-        try:
-            with get_db_connection() as connection:
-                cursor = connection.cursor()
-
-                query = """
-                    INSERT INTO feedback
-                    (visual_design, ease_of_navigation, mobile_responsiveness, overall_satisfaction,
-                     ease_of_tasks, quality_of_services, visual_design_issue, ease_of_navigation_issue,
-                     mobile_responsiveness_issue, overall_satisfaction_issue, ease_of_tasks_issue,
-                     quality_of_services_issue, like_most, improvements, features, legal_challenges,
-                     additional_comments, contact_willing, contact_email, ip_address, user_agent)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                values = (
-                    visual_design, ease_of_navigation, mobile_responsiveness, overall_satisfaction,
-                    ease_of_tasks, quality_of_services, visual_design_issue, ease_of_navigation_issue,
-                    mobile_responsiveness_issue, overall_satisfaction_issue, ease_of_tasks_issue,
-                    quality_of_services_issue, like_most, improvements, features, legal_challenges,
-                    additional_comments, contact_willing, contact_email, ip_address, user_agent
-                )
-
-                cursor.execute(query, values)
-                connection.commit()
-
-                # Get the created record
-                feedback_id = cursor.lastrowid
-                cursor.execute("SELECT * FROM feedback WHERE id = %s", (feedback_id,))
-                row = cursor.fetchone()
-
-                if row:
-                    return cls._from_row(row)
-                else:
-                    raise Exception("Failed to retrieve created feedback")
-
-        except pymysql.Error as e:
-            logger.error(f"Error creating feedback: {e}")
-            raise
-
-    @classmethod
-    def get_all(cls, page: int = 1, per_page: int = 50) -> tuple[list['Feedback'], int]:
-        """Get all feedback with pagination"""
-        try:
-            with get_db_connection() as connection:
-                cursor = connection.cursor()
-
-                # Get total count
-                cursor.execute("SELECT COUNT(*) FROM feedback")
-                total = cursor.fetchone()[0]
-
-                # Get paginated results
-                offset = (page - 1) * per_page
-                query = """
-                    SELECT * FROM feedback
-                    ORDER BY submitted_at DESC
-                    LIMIT %s OFFSET %s
-                """
-                cursor.execute(query, (per_page, offset))
-                rows = cursor.fetchall()
-
-                feedback_list = [cls._from_row(row) for row in rows]
-                return feedback_list, total
-
-        except Exception as e:
-            logger.error(f"Error getting feedback: {e}")
-            raise
-
-    @classmethod
-    def _from_row(cls, row: tuple) -> 'Feedback':
-        """Create Feedback instance from database row"""
-        return cls(
-            id=row[0],
-            visual_design=row[1],
-            ease_of_navigation=row[2],
-            mobile_responsiveness=row[3],
-            overall_satisfaction=row[4],
-            ease_of_tasks=row[5],
-            quality_of_services=row[6],
-            visual_design_issue=row[7],
-            ease_of_navigation_issue=row[8],
-            mobile_responsiveness_issue=row[9],
-            overall_satisfaction_issue=row[10],
-            ease_of_tasks_issue=row[11],
-            quality_of_services_issue=row[12],
-            like_most=row[13],
-            improvements=row[14],
-            features=row[15],
-            legal_challenges=row[16],
-            additional_comments=row[17],
-            contact_willing=row[18],
-            contact_email=row[19],
-            submitted_at=row[20],
-            ip_address=row[21],
-            user_agent=row[22]
-        )
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterator, List, Sequence
+from storage import get_repository
+from storage.base import REGISTRATION_COLUMNS, FEEDBACK_COLUMNS
+from storage.cache import shared_cache
+from utils.geoip import geoip
+from utils.text_analytics import feedback_terms
+from utils.timeseries import submission_timeseries
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UserRegistration:
+    FIELDS = REGISTRATION_COLUMNS
+    # Columns of the compact ``view=summary`` listing
+    SUMMARY_FIELDS = ('id', 'name', 'email', 'user_type', 'submitted_at')
+
+    def __init__(self, id: Optional[int] = None, name: str = "", email: str = "",
+                 phone: str = "", gender: Optional[str] = None, profession: Optional[str] = None,
+                 user_type: str = "", submitted_at: Optional[datetime] = None,
+                 ip_address: Optional[str] = None, user_agent: Optional[str] = None,
+                 country: Optional[str] = None, region: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.gender = gender
+        self.profession = profession
+        self.user_type = user_type
+        self.submitted_at = submitted_at
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.country = country
+        self.region = region
+
+    def to_dict(self, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'phone': self.phone,
+            'gender': self.gender,
+            'profession': self.profession,
+            'user_type': self.user_type,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'ip_address': self.ip_address,
+            'user_agent': self.user_agent,
+            'country': self.country,
+            'region': self.region
+        }
+        if fields:
+            return {field: data[field] for field in fields}
+        return data
+
+    @classmethod
+    def create(cls, name: str, email: str, phone: str, user_type: str,
+               gender: Optional[str] = None, profession: Optional[str] = None,
+               ip_address: Optional[str] = None, user_agent: Optional[str] = None,
+               submission_id: Optional[str] = None) -> 'UserRegistration':
+        """Create a new user registration
+
+        ``submission_id`` records a receipt so a spooled copy is never stored twice.
+        """
+        try:
+            # Located here so the stored row and the response carry it
+            row = get_repository('user_registrations').insert(geoip.with_location({
+                'name': name,
+                'email': email,
+                'phone': phone,
+                'gender': gender,
+                'profession': profession,
+                'user_type': user_type,
+                'ip_address': ip_address,
+                'user_agent': user_agent,
+            }), submission_id)
+            shared_cache.invalidate('user_registrations')
+            registration = cls._from_row(row)
+            submission_timeseries.record('user_registrations', registration.id, registration.submitted_at,
+                                         registration.user_type)
+            return registration
+
+        except Exception as e:
+            logger.error(f"Error creating user registration: {e}")
+            raise
+
+    @classmethod
+    def create_many(cls, registrations: List[Dict[str, Any]]) -> int:
+        """Create many user registrations in a single transaction"""
+        try:
+            created = get_repository('user_registrations').insert_many(
+                [geoip.with_location(values) for values in registrations]
+            )
+            shared_cache.invalidate('user_registrations')
+            return created
+
+        except Exception as e:
+            logger.error(f"Error creating {len(registrations)} user registrations: {e}")
+            raise
+
+    @classmethod
+    def get_all(cls, page: int = 1, per_page: int = 50, since: Optional[datetime] = None,
+                until: Optional[datetime] = None,
+                fields: Optional[Sequence[str]] = None) -> tuple[list['UserRegistration'], int]:
+        """Get all user registrations with pagination, optionally within a submitted_at range
+
+        With ``fields`` only those columns are read; other attributes stay None.
+        """
+        try:
+            # Get paginated results and total count
+            offset = (page - 1) * per_page
+            rows, total = get_repository('user_registrations').fetch_page(per_page, offset, since, until, fields)
+
+            if fields:
+                registrations = [cls(**dict(zip(fields, row))) for row in rows]
+            else:
+                registrations = [cls._from_row(row) for row in rows]
+            return registrations, total
+
+        except Exception as e:
+            logger.error(f"Error getting user registrations: {e}")
+            raise
+
+    @classmethod
+    def last_id(cls) -> int:
+        """Get the id of the most recent registration, or 0 if there is none"""
+        try:
+            return get_repository('user_registrations').last_id()
+
+        except Exception as e:
+            logger.error(f"Error getting last registration id: {e}")
+            raise
+
+    @classmethod
+    def stream(cls, since_id: int = 0,
+               fields: Optional[Sequence[str]] = None) -> Iterator[List['UserRegistration']]:
+        """Yield every registration with an id above ``since_id`` in id order, in batches
+
+        Closing the generator releases the underlying cursor immediately.
+        """
+        batches = get_repository('user_registrations').iter_rows(since_id, fields)
+        try:
+            for rows in batches:
+                if fields:
+                    yield [cls(**dict(zip(fields, row))) for row in rows]
+                else:
+                    yield [cls._from_row(row) for row in rows]
+        finally:
+            batches.close()
+
+    @classmethod
+    def _from_row(cls, row: tuple) -> 'UserRegistration':
+        """Create UserRegistration instance from database row"""
+        return cls(
+            id=row[0],
+            name=row[1],
+            email=row[2],
+            phone=row[3],
+            gender=row[4],
+            profession=row[5],
+            user_type=row[6],
+            submitted_at=row[7],
+            ip_address=row[8],
+            user_agent=row[9],
+            country=row[10],
+            region=row[11]
+        )
+
+
+
+class Feedback:
+    FIELDS = FEEDBACK_COLUMNS
+    # Columns of the compact ``view=summary`` listing
+    SUMMARY_FIELDS = (
+        'id', 'visual_design', 'ease_of_navigation', 'mobile_responsiveness', 'overall_satisfaction',
+        'ease_of_tasks', 'quality_of_services', 'contact_willing', 'submitted_at'
+    )
+
+    def __init__(self, id: Optional[int] = None, visual_design: Optional[int] = None,
+                 ease_of_navigation: Optional[int] = None, mobile_responsiveness: Optional[int] = None,
+                 overall_satisfaction: Optional[int] = None, ease_of_tasks: Optional[int] = None,
+                 quality_of_services: Optional[int] = None, visual_design_issue: Optional[str] = None,
+                 ease_of_navigation_issue: Optional[str] = None, mobile_responsiveness_issue: Optional[str] = None,
+                 overall_satisfaction_issue: Optional[str] = None, ease_of_tasks_issue: Optional[str] = None,
+                 quality_of_services_issue: Optional[str] = None, like_most: Optional[str] = None,
+                 improvements: Optional[str] = None, features: Optional[str] = None,
+                 legal_challenges: Optional[str] = None, additional_comments: Optional[str] = None,
+                 contact_willing: Optional[str] = None, contact_email: Optional[str] = None,
+                 submitted_at: Optional[datetime] = None, ip_address: Optional[str] = None,
+                 user_agent: Optional[str] = None, country: Optional[str] = None,
+                 region: Optional[str] = None):
+        self.id = id
+        self.visual_design = visual_design
+        self.ease_of_navigation = ease_of_navigation
+        self.mobile_responsiveness = mobile_responsiveness
+        self.overall_satisfaction = overall_satisfaction
+        self.ease_of_tasks = ease_of_tasks
+        self.quality_of_services = quality_of_services
+        self.visual_design_issue = visual_design_issue
+        self.ease_of_navigation_issue = ease_of_navigation_issue
+        self.mobile_responsiveness_issue = mobile_responsiveness_issue
+        self.overall_satisfaction_issue = overall_satisfaction_issue
+        self.ease_of_tasks_issue = ease_of_tasks_issue
+        self.quality_of_services_issue = quality_of_services_issue
+        self.like_most = like_most
+        self.improvements = improvements
+        self.features = features
+        self.legal_challenges = legal_challenges
+        self.additional_comments = additional_comments
+        self.contact_willing = contact_willing
+        self.contact_email = contact_email
+        self.submitted_at = submitted_at
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.country = country
+        self.region = region
+
+    def to_dict(self, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        data = {
+            'id': self.id,
+            'visual_design': self.visual_design,
+            'ease_of_navigation': self.ease_of_navigation,
+            'mobile_responsiveness': self.mobile_responsiveness,
+            'overall_satisfaction': self.overall_satisfaction,
+            'ease_of_tasks': self.ease_of_tasks,
+            'quality_of_services': self.quality_of_services,
+            'visual_design_issue': self.visual_design_issue,
+            'ease_of_navigation_issue': self.ease_of_navigation_issue,
+            'mobile_responsiveness_issue': self.mobile_responsiveness_issue,
+            'overall_satisfaction_issue': self.overall_satisfaction_issue,
+            'ease_of_tasks_issue': self.ease_of_tasks_issue,
+            'quality_of_services_issue': self.quality_of_services_issue,
+            'like_most': self.like_most,
+            'improvements': self.improvements,
+            'features': self.features,
+            'legal_challenges': self.legal_challenges,
+            'additional_comments': self.additional_comments,
+            'contact_willing': self.contact_willing,
+            'contact_email': self.contact_email,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'ip_address': self.ip_address,
+            'user_agent': self.user_agent,
+            'country': self.country,
+            'region': self.region
+        }
+        if fields:
+            return {field: data[field] for field in fields}
+        return data
+
+    @classmethod
+    def create(cls, visual_design: Optional[int] = None, ease_of_navigation: Optional[int] = None,
+               mobile_responsiveness: Optional[int] = None, overall_satisfaction: Optional[int] = None,
+               ease_of_tasks: Optional[int] = None, quality_of_services: Optional[int] = None,
+               visual_design_issue: Optional[str] = None, ease_of_navigation_issue: Optional[str] = None,
+               mobile_responsiveness_issue: Optional[str] = None, overall_satisfaction_issue: Optional[str] = None,
+               ease_of_tasks_issue: Optional[str] = None, quality_of_services_issue: Optional[str] = None,
+               like_most: Optional[str] = None, improvements: Optional[str] = None,
+               features: Optional[str] = None, legal_challenges: Optional[str] = None,
+               additional_comments: Optional[str] = None, contact_willing: Optional[str] = None,
+               contact_email: Optional[str] = None, ip_address: Optional[str] = None,
+               user_agent: Optional[str] = None, submission_id: Optional[str] = None) -> 'Feedback':
+        """Create a new feedback
+
+        ``submission_id`` records a receipt so a spooled copy is never stored twice.
+        """
+        try:
+            row = get_repository('feedback').insert(geoip.with_location({
+                'visual_design': visual_design,
+                'ease_of_navigation': ease_of_navigation,
+                'mobile_responsiveness': mobile_responsiveness,
+                'overall_satisfaction': overall_satisfaction,
+                'ease_of_tasks': ease_of_tasks,
+                'quality_of_services': quality_of_services,
+                'visual_design_issue': visual_design_issue,
+                'ease_of_navigation_issue': ease_of_navigation_issue,
+                'mobile_responsiveness_issue': mobile_responsiveness_issue,
+                'overall_satisfaction_issue': overall_satisfaction_issue,
+                'ease_of_tasks_issue': ease_of_tasks_issue,
+                'quality_of_services_issue': quality_of_services_issue,
+                'like_most': like_most,
+                'improvements': improvements,
+                'features': features,
+                'legal_challenges': legal_challenges,
+                'additional_comments': additional_comments,
+                'contact_willing': contact_willing,
+                'contact_email': contact_email,
+                'ip_address': ip_address,
+                'user_agent': user_agent,
+            }), submission_id)
+            shared_cache.invalidate('feedback')
+            feedback = cls._from_row(row)
+            submission_timeseries.record('feedback', feedback.id, feedback.submitted_at)
+            feedback_terms.record(feedback)
+            return feedback
+
+        except Exception as e:
+            logger.error(f"Error creating feedback: {e}")
+            raise
+
+    @classmethod
+    def get_all(cls, page: int = 1, per_page: int = 50, since: Optional[datetime] = None,
+                until: Optional[datetime] = None,
+                fields: Optional[Sequence[str]] = None) -> tuple[list['Feedback'], int]:
+        """Get all feedback with pagination, optionally within a submitted_at range
+
+        With ``fields`` only those columns are read; other attributes stay None.
+        """
+        try:
+            # Get paginated results and total count
+            offset = (page - 1) * per_page
+            rows, total = get_repository('feedback').fetch_page(per_page, offset, since, until, fields)
+
+            if fields:
+                feedback_list = [cls(**dict(zip(fields, row))) for row in rows]
+            else:
+                feedback_list = [cls._from_row(row) for row in rows]
+            return feedback_list, total
+
+        except Exception as e:
+            logger.error(f"Error getting feedback: {e}")
+            raise
+
+    @classmethod
+    def last_id(cls) -> int:
+        """Get the id of the most recent feedback, or 0 if there is none"""
+        try:
+            return get_repository('feedback').last_id()
+
+        except Exception as e:
+            logger.error(f"Error getting last feedback id: {e}")
+            raise
+
+    @classmethod
+    def stream(cls, since_id: int = 0,
+               fields: Optional[Sequence[str]] = None) -> Iterator[List['Feedback']]:
+        """Yield every feedback with an id above ``since_id`` in id order, in batches
+
+        Closing the generator releases the underlying cursor immediately.
+        """
+        batches = get_repository('feedback').iter_rows(since_id, fields)
+        try:
+            for rows in batches:
+                if fields:
+                    yield [cls(**dict(zip(fields, row))) for row in rows]
+                else:
+                    yield [cls._from_row(row) for row in rows]
+        finally:
+            batches.close()
+
+    @classmethod
+    def _from_row(cls, row: tuple) -> 'Feedback':
+        """Create Feedback instance from database row"""
+        return cls(
+            id=row[0],
+            visual_design=row[1],
+            ease_of_navigation=row[2],
+            mobile_responsiveness=row[3],
+            overall_satisfaction=row[4],
+            ease_of_tasks=row[5],
+            quality_of_services=row[6],
+            visual_design_issue=row[7],
+            ease_of_navigation_issue=row[8],
+            mobile_responsiveness_issue=row[9],
+            overall_satisfaction_issue=row[10],
+            ease_of_tasks_issue=row[11],
+            quality_of_services_issue=row[12],
+            like_most=row[13],
+            improvements=row[14],
+            features=row[15],
+            legal_challenges=row[16],
+            additional_comments=row[17],
+            contact_willing=row[18],
+            contact_email=row[19],
+            submitted_at=row[20],
+            ip_address=row[21],
+            user_agent=row[22],
+            country=row[23],
+            region=row[24]
+        )
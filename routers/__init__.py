@@ -1 +1 @@
-# Routers package
+# Routers package
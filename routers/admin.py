@@ -1,98 +1,544 @@
-import io
-import logging
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
-import pymysql
-from database import get_db
-from models import UserRegistration, Feedback
-from schemas import FeedbackListResponse, UserRegistrationListResponse
-from utils.excel import generate_excel_report
-from routers.auth import verify_admin_api_key
-
-logger = logging.getLogger(__name__)
-
-router = APIRouter()
-
-
-@router.get("/feedback", response_model=FeedbackListResponse)
-async def get_feedback(
-    page: int = Query(1, ge=1),
-    per_page: int = Query(50, ge=1, le=100),
-    db: pymysql.Connection = Depends(get_db),
-    _: bool = Depends(verify_admin_api_key)
-):
-    """Get all feedback (admin only)"""
-    try:
-        # Get feedback with pagination
-        feedback_list, total = Feedback.get_all(page=page, per_page=per_page)
-
-        # Calculate total pages
-        pages = (total + per_page - 1) // per_page
-
-        return FeedbackListResponse(
-            feedback=[f.to_dict() for f in feedback_list],
-            total=total,
-            pages=pages,
-            current_page=page,
-            per_page=per_page
-        )
-
-    except Exception as e:
-        logger.error(f'Error retrieving feedback: {str(e)}')
-        raise HTTPException(status_code=500, detail="Internal server error")
-
-
-@router.get("/registrations", response_model=UserRegistrationListResponse)
-async def get_registrations(
-    page: int = Query(1, ge=1),
-    per_page: int = Query(50, ge=1, le=100),
-    db: pymysql.Connection = Depends(get_db),
-    _: bool = Depends(verify_admin_api_key)
-):
-    """Get all user registrations (admin only)"""
-    try:
-        # Get registrations with pagination
-        registrations, total = UserRegistration.get_all(page=page, per_page=per_page)
-
-        # Calculate total pages
-        pages = (total + per_page - 1) // per_page
-
-        return UserRegistrationListResponse(
-            registrations=[r.to_dict() for r in registrations],
-            total=total,
-            pages=pages,
-            current_page=page,
-            per_page=per_page
-        )
-
-    except Exception as e:
-        logger.error(f'Error retrieving registrations: {str(e)}')
-        raise HTTPException(status_code=500, detail="Internal server error")
-
-
-@router.get("/download-excel")
-async def download_excel(
-    db: pymysql.Connection = Depends(get_db),
-    _: bool = Depends(verify_admin_api_key)
-):
-    """Download Excel file with all data (admin only)"""
-    try:
-        # Generate Excel file
-        excel_buffer = generate_excel_report()
-        if not excel_buffer:
-            raise HTTPException(status_code=500, detail="Failed to generate Excel file")
-
-        # Create filename with timestamp
-        filename = f'lawvriksh_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-
-        # Return file as streaming response
-        return StreamingResponse(
-            io.BytesIO(excel_buffer.getvalue()),
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-
-    except Exception as e:
-        logger.error(f'Error downloading Excel file: {str(e)}')
-        raise HTTPException(status_code=500, detail="Internal server error")
+import gc
+import io
+import os
+import json
+import tempfile
+import threading
+import tracemalloc
+import logging
+import itertools
+from functools import partial
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from models import UserRegistration, Feedback
+from schemas import (
+    FeedbackListResponse, UserRegistrationListResponse, ProfileListResponse, projected_list_response,
+    MemoryStatsResponse, TracemallocDiffResponse, CPUExecutorStatsResponse, CacheStatsResponse, TimeSeriesResponse,
+    LocationStatsResponse, TermStatsResponse
+)
+from routers.auth import verify_admin_api_key
+from storage import get_repository
+from storage.base import StorageUnavailable
+from storage.cache import shared_cache
+from utils.executor import CPUTaskError, cpu_executor, run_cancellable
+from utils.live_feed import live_feed_hub, parse_cursor
+from utils.memory import memory_tracker, object_type_counts, peak_rss_bytes, rss_bytes
+from utils.single_flight import shared_build, single_flight
+from utils.text_analytics import feedback_terms
+from utils.timeseries import submission_timeseries
+from utils.profiling import hot_path_sampler, list_profiles, profile_path, profile_report
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _projection(model, fields: Optional[str], view: str) -> Optional[Tuple[str, ...]]:
+    """Resolve the ``fields``/``view`` query parameters into the columns to read
+
+    Returns None for the full record. ``id`` is always included.
+    """
+    if fields:
+        requested = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in requested if f not in model.FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return tuple(dict.fromkeys(['id'] + requested))
+    if view == 'summary':
+        return model.SUMMARY_FIELDS
+    return None
+
+
+def _cached_page(model, table: str, **query):
+    """A list page from the shared cache, read from storage on a miss"""
+    key = f'{table}:page:' + ':'.join(f'{name}={value}' for name, value in sorted(query.items()))
+    return shared_cache.get_or_compute(key, partial(model.get_all, **query), tables=(table,))
+
+
+def _projected_response(list_model, items_field: str, items: list, columns: Tuple[str, ...], **page) -> Response:
+    """Serialize a list page whose items only carry ``columns``"""
+    response_model = projected_list_response(list_model, items_field, columns)
+    body = response_model(**{items_field: [item.to_dict(columns) for item in items]}, **page)
+    return Response(content=body.model_dump_json(), media_type="application/json")
+
+
+async def _ndjson_response(model, since_id: int, columns: Optional[Tuple[str, ...]],
+                          what: str) -> StreamingResponse:
+    """Stream every row after ``since_id`` as newline-delimited JSON"""
+    batches = model.stream(since_id, columns)
+    try:
+        # Fetched up front so a failing connection still answers with a 500; the
+        # first batch connects and runs the query, so it is read off the event loop
+        first = await run_in_threadpool(next, batches, [])
+    except StorageUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f'Error streaming {what}: {str(e)}')
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    def lines():
+        try:
+            with memory_tracker.track_peak(f'{what} stream'):
+                for batch in itertools.chain([first], batches):
+                    yield ''.join(json.dumps(item.to_dict(columns)) + '\n' for item in batch)
+        except Exception as e:
+            # Headers are already sent; aborting the response marks the dump as incomplete
+            logger.error(f'Error streaming {what}: {str(e)}')
+            raise
+
+    # The background task also runs when the client disconnects, so the
+    # server-side cursor and its connection are released straight away
+    return StreamingResponse(
+        lines(), media_type='application/x-ndjson', background=BackgroundTask(batches.close)
+    )
+
+
+@router.get("/feedback/stream")
+async def stream_feedback(
+    since_id: int = Query(0, ge=0, description="Resume after this id"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    view: str = Query("full", pattern="^(full|summary)$"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Stream all feedback in id order as NDJSON (admin only)"""
+    return await _ndjson_response(Feedback, since_id, _projection(Feedback, fields, view), 'feedback')
+
+
+@router.get("/registrations/stream")
+async def stream_registrations(
+    since_id: int = Query(0, ge=0, description="Resume after this id"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    view: str = Query("full", pattern="^(full|summary)$"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Stream all user registrations in id order as NDJSON (admin only)"""
+    return await _ndjson_response(
+        UserRegistration, since_id, _projection(UserRegistration, fields, view), 'registrations'
+    )
+
+
+@router.get("/live")
+async def live_feed(
+    last_event_id: Optional[str] = Header(None),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Push new registrations and feedback as server-sent events (admin only)"""
+    subscriber = await live_feed_hub.subscribe()
+    # Runs after the stream ends or the client disconnects
+    return StreamingResponse(
+        live_feed_hub.events(subscriber, parse_cursor(last_event_id)),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        background=BackgroundTask(live_feed_hub.unsubscribe, subscriber)
+    )
+
+
+@router.get("/feedback", response_model=FeedbackListResponse)
+async def get_feedback(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=100),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    view: str = Query("full", pattern="^(full|summary)$"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Get all feedback (admin only)"""
+    columns = _projection(Feedback, fields, view)
+    try:
+        # Get feedback with pagination; identical concurrent requests share one query
+        feedback_list, total = await single_flight.run(
+            ('feedback', page, per_page, since, until, columns), _cached_page, Feedback, 'feedback',
+            page=page, per_page=per_page, since=since, until=until, fields=columns
+        )
+
+        # Calculate total pages
+        pages = (total + per_page - 1) // per_page
+
+        if columns:
+            return _projected_response(
+                FeedbackListResponse, 'feedback', feedback_list, columns,
+                total=total, pages=pages, current_page=page, per_page=per_page
+            )
+
+        return FeedbackListResponse(
+            feedback=[f.to_dict() for f in feedback_list],
+            total=total,
+            pages=pages,
+            current_page=page,
+            per_page=per_page
+        )
+
+    except StorageUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f'Error retrieving feedback: {str(e)}')
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/registrations", response_model=UserRegistrationListResponse)
+async def get_registrations(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=100),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    view: str = Query("full", pattern="^(full|summary)$"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Get all user registrations (admin only)"""
+    columns = _projection(UserRegistration, fields, view)
+    try:
+        # Get registrations with pagination; identical concurrent requests share one query
+        registrations, total = await single_flight.run(
+            ('registrations', page, per_page, since, until, columns), _cached_page, UserRegistration,
+            'user_registrations', page=page, per_page=per_page, since=since, until=until, fields=columns
+        )
+
+        # Calculate total pages
+        pages = (total + per_page - 1) // per_page
+
+        if columns:
+            return _projected_response(
+                UserRegistrationListResponse, 'registrations', registrations, columns,
+                total=total, pages=pages, current_page=page, per_page=per_page
+            )
+
+        return UserRegistrationListResponse(
+            registrations=[r.to_dict() for r in registrations],
+            total=total,
+            pages=pages,
+            current_page=page,
+            per_page=per_page
+        )
+
+    except StorageUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f'Error retrieving registrations: {str(e)}')
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _build_excel(since: Optional[datetime], until: Optional[datetime]) -> Optional[bytes]:
+    # Imported lazily so the export pipeline is only loaded when a report is built
+    from utils.excel import generate_excel_report
+
+    with memory_tracker.track_peak('excel'):
+        excel_buffer = generate_excel_report(since=since, until=until)
+    return excel_buffer.getvalue() if excel_buffer else None
+
+
+def _cached_excel(since: Optional[datetime], until: Optional[datetime]) -> Optional[bytes]:
+    key = f'excel:{since}:{until}'
+    return shared_cache.get_or_compute(
+        key, partial(shared_build, key, partial(_build_excel, since, until)),
+        tables=('user_registrations', 'feedback')
+    )
+
+
+@router.get("/download-excel")
+async def download_excel(
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Download Excel file with all data (admin only)"""
+    try:
+        # A burst of downloads builds the workbook once, across workers too
+        # when SINGLE_FLIGHT_SHARED is set
+        excel_bytes = await single_flight.run(('excel', since, until), _cached_excel, since, until)
+        if not excel_bytes:
+            raise HTTPException(status_code=500, detail="Failed to generate Excel file")
+
+        # Create filename with timestamp
+        filename = f'lawvriksh_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+
+        # Return file as streaming response
+        return StreamingResponse(
+            io.BytesIO(excel_bytes),
+            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+
+    except (StorageUnavailable, CPUTaskError):
+        raise
+    except Exception as e:
+        logger.error(f'Error downloading Excel file: {str(e)}')
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# Table names as used in the admin routes
+EXPORT_TABLE_NAMES = {'registrations': 'user_registrations', 'feedback': 'feedback'}
+
+
+def _build_export_file(table: str, export_format: str, since: Optional[datetime], until: Optional[datetime],
+                       cancelled: threading.Event) -> tempfile.SpooledTemporaryFile:
+    # Imported lazily so the export pipeline is only loaded when an export is built
+    from utils.export import write_parquet, write_xlsx
+
+    # Parquet and xlsx end with an index of their contents, so they are built before sending
+    output = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    with memory_tracker.track_peak(f'{table} {export_format} export'):
+        try:
+            if export_format == 'parquet':
+                write_parquet(output, table, since, until, cancelled)
+            else:
+                write_xlsx(output, (table,), since, until, cancelled)
+        except BaseException:
+            output.close()
+            raise
+    output.seek(0)
+    return output
+
+
+@router.get("/export/{table}")
+async def export_table(
+    request: Request,
+    table: str,
+    format: str = Query("csv", pattern="^(csv|csv\\.gz|parquet|xlsx)$"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Export every row of one table, newest first (admin only)
+
+    Id ranges are read over several connections and serialized in the
+    shared CPU pool. csv and csv.gz stream as the ranges complete.
+    """
+    if table not in EXPORT_TABLE_NAMES:
+        raise HTTPException(status_code=404, detail="Unknown table")
+    from utils.export import MEDIA_TYPES, export_rows
+
+    filename = f'lawvriksh_{table}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{format}'
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    try:
+        if format in ('csv', 'csv.gz'):
+            chunks = export_rows(EXPORT_TABLE_NAMES[table], format, since, until)
+            # The first range is read up front so a failing backend still answers with a 500
+            first = await run_in_threadpool(next, chunks)
+            return StreamingResponse(
+                itertools.chain([first], chunks), media_type=MEDIA_TYPES[format], headers=headers,
+                background=BackgroundTask(chunks.close)
+            )
+
+        # Stopped between ranges if the client goes away while it is built
+        output = await run_cancellable(request, _build_export_file, EXPORT_TABLE_NAMES[table], format, since, until)
+        return StreamingResponse(
+            iter(partial(output.read, 64 * 1024), b''), media_type=MEDIA_TYPES[format], headers=headers,
+            background=BackgroundTask(output.close)
+        )
+
+    except (StorageUnavailable, CPUTaskError):
+        raise
+    except Exception as e:
+        logger.error(f'Error exporting {table}: {str(e)}')
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/executor", response_model=CPUExecutorStatsResponse)
+async def get_executor_stats(_: bool = Depends(verify_admin_api_key)):
+    """CPU pool load of the worker serving this request (admin only)
+
+    ``queued`` tasks wait for a free process; ``rejected`` requests found the
+    queue full and were answered with a 503.
+    """
+    return CPUExecutorStatsResponse(pid=os.getpid(), **cpu_executor.stats())
+
+
+@router.get("/cache", response_model=CacheStatsResponse)
+async def get_cache_stats(_: bool = Depends(verify_admin_api_key)):
+    """Shared cache size, and hits and misses of the worker serving this request (admin only)"""
+    stats = await run_in_threadpool(shared_cache.stats)
+    lookups = stats['hits'] + stats['misses']
+    return CacheStatsResponse(
+        pid=os.getpid(), hit_rate=round(stats['hits'] / lookups, 3) if lookups else None, **stats
+    )
+
+
+@router.get("/stats/timeseries", response_model=TimeSeriesResponse)
+async def get_submission_timeseries(
+    resolution: str = Query("minute", pattern="^(minute|hour)$"),
+    buckets: int = Query(60, ge=1, description="Buckets to return, up to the retained window"),
+    until: Optional[datetime] = Query(None, description="Last bucket to return; defaults to now"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Registrations and feedback per minute or hour, oldest bucket first (admin only)
+
+    Served from memory: ``user_registrations:<user_type>`` series split the
+    registrations, and rows stored by other workers appear within
+    ``TIMESERIES_SYNC_INTERVAL`` seconds. ``seeded`` is false until the
+    history has been read at startup.
+    """
+    return TimeSeriesResponse(pid=os.getpid(), **submission_timeseries.query(resolution, buckets, until))
+
+
+def _location_counts(table: str, since: Optional[datetime], until: Optional[datetime]):
+    key = f'{table}:locations:since={since}:until={until}'
+    return shared_cache.get_or_compute(
+        key, partial(get_repository(table).count_by_location, since, until), tables=(table,)
+    )
+
+
+@router.get("/stats/locations", response_model=LocationStatsResponse)
+async def get_location_stats(
+    table: str = Query("registrations", pattern="^(registrations|feedback)$"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Submissions per country and region, most first (admin only)
+
+    Rows whose address isn't in the IP range database, or that predate it
+    and haven't been backfilled, are counted with a null country.
+    """
+    table = EXPORT_TABLE_NAMES[table]
+    try:
+        counts = await single_flight.run(
+            (table, 'locations', since, until), _location_counts, table, since, until
+        )
+        counts = sorted(counts, key=lambda row: (-row[2], row[0] or '', row[1] or ''))
+        return LocationStatsResponse(
+            table=table,
+            total=sum(row[2] for row in counts),
+            locations=[{'country': country, 'region': region, 'count': count} for country, region, count in counts]
+        )
+
+    except StorageUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f'Error counting {table} locations: {str(e)}')
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/stats/terms", response_model=TermStatsResponse)
+async def get_feedback_terms(
+    field: str = Query("improvements", pattern="^(improvements|features|legal_challenges)$"),
+    since: Optional[datetime] = Query(None, description="First day counted"),
+    until: Optional[datetime] = Query(None, description="Last day counted"),
+    limit: int = Query(20, ge=1, le=200),
+    min_documents: int = Query(3, ge=1, description="Answers a term needs to be ranked against low ratings"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Most used terms and bigrams of a feedback field, and the terms most tied to low ratings (admin only)
+
+    Served from counts kept in memory; ``lift`` is how much likelier an
+    answer using the term is to come with a rating of ``LOW_RATING_MAX`` or
+    less than answers overall. ``seeded`` is false until the stored
+    feedback has been counted at startup.
+    """
+    return TermStatsResponse(
+        pid=os.getpid(), **feedback_terms.query(field, since, until, limit, min_documents)
+    )
+
+
+@router.get("/profiles", response_model=ProfileListResponse)
+async def get_profiles(_: bool = Depends(verify_admin_api_key)):
+    """List stored request profiles, newest first (admin only)"""
+    return ProfileListResponse(profiles=list_profiles())
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|raw)$"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Download a stored request profile (admin only)
+
+    ``raw`` returns the pstats file or folded stacks as stored; ``text``
+    renders pstats as a table sorted by cumulative time.
+    """
+    try:
+        path = profile_path(profile_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid profile id")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == 'raw':
+        return FileResponse(path, filename=profile_id, media_type='application/octet-stream')
+    return PlainTextResponse(await run_in_threadpool(profile_report, profile_id))
+
+
+@router.get("/profiling/hot-paths")
+async def get_hot_paths(
+    format: str = Query("text", pattern="^(text|collapsed)$"),
+    limit: int = Query(50, ge=1, le=1000),
+    reset: bool = Query(False),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Stacks seen by this worker's always-on sampler (admin only)
+
+    ``collapsed`` returns folded stacks for flamegraph tools; ``text`` the
+    busiest functions by self and total samples. ``reset`` clears the counts
+    after reading them.
+    """
+    body = hot_path_sampler.collapsed() if format == 'collapsed' else hot_path_sampler.report(limit)
+    if reset:
+        hot_path_sampler.reset()
+    return PlainTextResponse(body)
+
+
+@router.get("/memory", response_model=MemoryStatsResponse)
+async def get_memory_stats(
+    types: bool = Query(False, description="Also count live objects by type (walks the heap)"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Memory gauges of the worker serving this request (admin only)
+
+    ``routes`` lists the memory each route left behind after its requests;
+    ``flagged`` routes keep growing and are worth a tracemalloc diff.
+    """
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (None, None)
+    return MemoryStatsResponse(
+        pid=os.getpid(),
+        rss_bytes=rss_bytes(),
+        peak_rss_bytes=peak_rss_bytes(),
+        gc_counts=list(gc.get_count()),
+        gc_objects=len(gc.get_objects()),
+        tracemalloc_current=current,
+        tracemalloc_peak=peak,
+        routes=memory_tracker.route_report(),
+        exports=list(memory_tracker.exports),
+        object_types=object_type_counts() if types else None
+    )
+
+
+@router.post("/memory/tracemalloc/start")
+async def start_tracemalloc(
+    frames: int = Query(1, ge=1, le=50),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Start tracing allocations in this worker and take a baseline snapshot (admin only)
+
+    Tracing slows allocation-heavy code noticeably; stop it when done.
+    """
+    await run_in_threadpool(memory_tracker.start_tracing, frames)
+    return {"message": "tracemalloc started", "pid": os.getpid(), "frames": frames}
+
+
+@router.post("/memory/tracemalloc/stop")
+async def stop_tracemalloc(_: bool = Depends(verify_admin_api_key)):
+    """Stop tracing allocations in this worker (admin only)"""
+    memory_tracker.stop_tracing()
+    return {"message": "tracemalloc stopped", "pid": os.getpid()}
+
+
+@router.get("/memory/tracemalloc/diff", response_model=TracemallocDiffResponse)
+async def get_tracemalloc_diff(
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(25, ge=1, le=500),
+    rebase: bool = Query(False, description="Make this snapshot the new baseline"),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Allocations grown since the baseline snapshot, largest first (admin only)"""
+    try:
+        allocations = await run_in_threadpool(memory_tracker.snapshot_diff, group_by, limit, rebase)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="tracemalloc is not running in this worker")
+    return TracemallocDiffResponse(allocations=allocations)
@@ -1,62 +1,157 @@
-import os
-import logging
-from fastapi import APIRouter, Depends, HTTPException, Request
-import pymysql
-from database import get_db
-from models import UserRegistration
-from schemas import UserRegistrationCreate, SuccessResponse
-from utils.excel import generate_excel_report
-
-logger = logging.getLogger(__name__)
-
-router = APIRouter()
-
-
-@router.post("/register", response_model=SuccessResponse, status_code=201)
-async def register_user(
-    user_data: UserRegistrationCreate,
-    request: Request,
-    db: pymysql.Connection = Depends(get_db)
-):
-    """Register a new user (USER or Creator)"""
-    try:
-        # Get client IP and user agent
-        ip_address = request.headers.get("x-forwarded-for") or request.client.host
-        user_agent = request.headers.get("user-agent")
-
-        # Create user registration record
-        registration = UserRegistration.create(
-            name=user_data.name.strip(),
-            email=user_data.email,
-            phone=user_data.phone.strip(),
-            gender=user_data.gender.strip() if user_data.gender else None,
-            profession=user_data.profession.strip() if user_data.profession else None,
-            user_type=user_data.user_type.value,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-
-        # Generate updated Excel file (only save locally in development)
-        if os.environ.get('FLASK_ENV') == 'development':
-            excel_buffer = generate_excel_report()
-            if excel_buffer:
-                # Save Excel file to disk with error handling (development only)
-                try:
-                    with open('lawvriksh_data.xlsx', 'wb') as f:
-                        f.write(excel_buffer.getvalue())
-                except PermissionError:
-                    logger.warning('Could not update Excel file - file may be open in another program')
-                except Exception as e:
-                    logger.error(f'Error saving Excel file: {str(e)}')
-
-        logger.info(f'User registration submitted successfully with ID: {registration.id}')
-
-        return SuccessResponse(
-            message="Registration submitted successfully",
-            id=registration.id,
-            submitted_at=registration.submitted_at
-        )
-
-    except Exception as e:
-        logger.error(f'Error submitting registration: {str(e)}')
-        raise HTTPException(status_code=500, detail="Internal server error")
+import os
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from models import UserRegistration
+from schemas import (
+    UserRegistrationCreate, SuccessResponse, BulkImportResponse, BulkImportRowError
+)
+from utils.bulk_import import chunked, iter_upload_rows, registration_values, validate_registrations
+from utils.executor import CPUTaskError, cpu_executor
+from storage.base import StorageUnavailable
+from storage.spool import SpooledSubmission, store_submission
+from utils.live_feed import live_feed_hub
+from routers.auth import verify_admin_api_key
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/register", response_model=SuccessResponse, status_code=201)
+async def register_user(
+    user_data: UserRegistrationCreate,
+    request: Request
+):
+    """Register a new user (USER or Creator)"""
+    try:
+        # Get client IP and user agent
+        ip_address = request.headers.get("x-forwarded-for") or request.client.host
+        user_agent = request.headers.get("user-agent")
+
+        # Create user registration record, or spool it if the database is unavailable
+        registration = await store_submission('user_registrations', UserRegistration.create, {
+            **registration_values(user_data),
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+        })
+        if isinstance(registration, SpooledSubmission):
+            logger.info('User registration %s spooled', registration.submission_id)
+            return JSONResponse(status_code=202, content=SuccessResponse(
+                message="Registration received",
+                submitted_at=registration.submitted_at
+            ).model_dump(mode='json'))
+        live_feed_hub.publish('user_registrations', registration.to_dict())
+
+        # Generate updated Excel file (only save locally in development)
+        if os.environ.get('FLASK_ENV') == 'development':
+            # Imported lazily so the export pipeline is only loaded when a report is built
+            from utils.excel import generate_excel_report
+            excel_buffer = generate_excel_report()
+            if excel_buffer:
+                # Save Excel file to disk with error handling (development only)
+                try:
+                    with open('lawvriksh_data.xlsx', 'wb') as f:
+                        f.write(excel_buffer.getvalue())
+                except PermissionError:
+                    logger.warning('Could not update Excel file - file may be open in another program')
+                except Exception as e:
+                    logger.error(f'Error saving Excel file: {str(e)}')
+
+        logger.info('User registration submitted successfully with ID: %s', registration.id)
+
+        return SuccessResponse(
+            message="Registration submitted successfully",
+            id=registration.id,
+            submitted_at=registration.submitted_at
+        )
+
+    except StorageUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f'Error submitting registration: {str(e)}')
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/registrations/bulk", response_model=BulkImportResponse)
+async def bulk_register_users(
+    request: Request,
+    start_row: int = Query(1, ge=1),
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    _: bool = Depends(verify_admin_api_key)
+):
+    """Import many registrations from a JSON array or a CSV/XLSX upload (admin only)
+
+    Rows are validated individually and valid ones are inserted in chunks of
+    ``chunk_size``, each in its own transaction. If a chunk fails to insert
+    the import stops and ``resume_from`` gives the row to pass as
+    ``start_row`` when retrying; earlier chunks stay committed.
+    """
+    try:
+        content_type = request.headers.get('content-type', '')
+        if content_type.startswith('multipart/form-data'):
+            form = await request.form()
+            upload = form.get('file')
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(status_code=400, detail="Expected a CSV or XLSX upload in the 'file' field")
+            try:
+                rows = iter_upload_rows(upload.filename, upload.file)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        else:
+            try:
+                rows = await request.json()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Request body must be a JSON array or a file upload")
+            if not isinstance(rows, list):
+                raise HTTPException(status_code=400, detail="Request body must be a JSON array")
+
+        processed = 0
+        imported = 0
+        errors = []
+        resume_from = None
+
+        chunks = chunked(enumerate(rows, start=1), chunk_size)
+        while True:
+            # Parsing an upload is CPU work too, so it is kept off the event loop
+            chunk = await run_in_threadpool(next, chunks, None)
+            if chunk is None:
+                break
+            pending = [(row_number, row) for row_number, row in chunk if row_number >= start_row]
+            if not pending:
+                continue
+            processed += len(pending)
+
+            # Validated in the CPU pool; abandoned if the client disconnects
+            valid, invalid = await cpu_executor.run(validate_registrations, pending, request=request)
+            errors += [BulkImportRowError(row=row_number, errors=messages) for row_number, messages in invalid]
+
+            if not valid:
+                continue
+            try:
+                imported += await run_in_threadpool(UserRegistration.create_many, valid)
+            except Exception as e:
+                logger.error(f'Bulk import stopped at row {chunk[0][0]}: {str(e)}')
+                resume_from = max(chunk[0][0], start_row)
+                break
+
+        logger.info(f'Bulk import finished: {imported} imported, {len(errors)} invalid rows')
+
+        return BulkImportResponse(
+            processed=processed,
+            imported=imported,
+            failed=len(errors),
+            completed=resume_from is None,
+            resume_from=resume_from,
+            errors=errors
+        )
+
+    except (HTTPException, StorageUnavailable, CPUTaskError):
+        raise
+    except ValueError as e:
+        # Raised while reading a malformed or wrongly encoded upload
+        raise HTTPException(status_code=400, detail=f"Could not read upload: {str(e)}")
+    except Exception as e:
+        logger.error(f'Error importing registrations: {str(e)}')
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,165 +1,345 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
-from typing import Optional, List
-from datetime import datetime
-from enum import Enum
-
-
-class UserTypeEnum(str, Enum):
-    USER = "USER"
-    CREATOR = "Creator"
-
-
-class ContactWillingEnum(str, Enum):
-    YES = "yes"
-    NO = "no"
-
-
-# User Registration Schemas
-class UserRegistrationCreate(BaseModel):
-    name: str = Field(..., min_length=1, max_length=255)
-    email: EmailStr
-    phone: str = Field(..., min_length=1, max_length=20)
-    gender: Optional[str] = Field(None, max_length=50)
-    profession: Optional[str] = Field(None, max_length=255)
-    user_type: UserTypeEnum = Field(..., alias="userType")
-
-    class Config:
-        populate_by_name = True
-
-
-class UserRegistrationResponse(BaseModel):
-    id: int
-    name: str
-    email: str
-    phone: str
-    gender: Optional[str]
-    profession: Optional[str]
-    user_type: str
-    submitted_at: datetime
-    ip_address: Optional[str]
-    user_agent: Optional[str]
-
-    class Config:
-        from_attributes = True
-
-
-# Feedback Schemas
-class FeedbackCreate(BaseModel):
-    # Rating questions (1-5 scale)
-    visual_design: Optional[int] = Field(None, ge=1, le=5, alias="visualDesign")
-    ease_of_navigation: Optional[int] = Field(None, ge=1, le=5, alias="easeOfNavigation")
-    mobile_responsiveness: Optional[int] = Field(None, ge=1, le=5, alias="mobileResponsiveness")
-    overall_satisfaction: Optional[int] = Field(None, ge=1, le=5, alias="overallSatisfaction")
-    ease_of_tasks: Optional[int] = Field(None, ge=1, le=5, alias="easeOfTasks")
-    quality_of_services: Optional[int] = Field(None, ge=1, le=5, alias="qualityOfServices")
-    
-    # Conditional fields for low ratings
-    visual_design_issue: Optional[str] = Field(None, alias="visualDesignIssue")
-    ease_of_navigation_issue: Optional[str] = Field(None, alias="easeOfNavigationIssue")
-    mobile_responsiveness_issue: Optional[str] = Field(None, alias="mobileResponsivenessIssue")
-    overall_satisfaction_issue: Optional[str] = Field(None, alias="overallSatisfactionIssue")
-    ease_of_tasks_issue: Optional[str] = Field(None, alias="easeOfTasksIssue")
-    quality_of_services_issue: Optional[str] = Field(None, alias="qualityOfServicesIssue")
-    
-    # Text area questions
-    like_most: Optional[str] = Field(None, alias="likeMost")
-    improvements: Optional[str] = None
-    features: Optional[str] = None
-    legal_challenges: Optional[str] = Field(None, alias="legalChallenges")
-    additional_comments: Optional[str] = Field(None, alias="additionalComments")
-    
-    # Follow-up questions
-    contact_willing: Optional[ContactWillingEnum] = Field(None, alias="contactWilling")
-    contact_email: Optional[EmailStr] = Field(None, alias="contactEmail")
-
-    class Config:
-        populate_by_name = True
-
-    @model_validator(mode='after')
-    def validate_feedback_data(self):
-        # Validate contact email
-        if self.contact_willing == ContactWillingEnum.YES and not self.contact_email:
-            raise ValueError('Email is required when willing to be contacted')
-
-        # Validate issue fields for low ratings
-        rating_issue_pairs = [
-            (self.visual_design, self.visual_design_issue, 'visual design'),
-            (self.ease_of_navigation, self.ease_of_navigation_issue, 'ease of navigation'),
-            (self.mobile_responsiveness, self.mobile_responsiveness_issue, 'mobile responsiveness'),
-            (self.overall_satisfaction, self.overall_satisfaction_issue, 'overall satisfaction'),
-            (self.ease_of_tasks, self.ease_of_tasks_issue, 'ease of tasks'),
-            (self.quality_of_services, self.quality_of_services_issue, 'quality of services')
-        ]
-
-        for rating, issue, field_name in rating_issue_pairs:
-            if rating and rating < 3 and not issue:
-                raise ValueError(f'Please explain what you didn\'t like for {field_name} (rating below 3)')
-
-        return self
-
-
-class FeedbackResponse(BaseModel):
-    id: int
-    visual_design: Optional[int]
-    ease_of_navigation: Optional[int]
-    mobile_responsiveness: Optional[int]
-    overall_satisfaction: Optional[int]
-    ease_of_tasks: Optional[int]
-    quality_of_services: Optional[int]
-    visual_design_issue: Optional[str]
-    ease_of_navigation_issue: Optional[str]
-    mobile_responsiveness_issue: Optional[str]
-    overall_satisfaction_issue: Optional[str]
-    ease_of_tasks_issue: Optional[str]
-    quality_of_services_issue: Optional[str]
-    like_most: Optional[str]
-    improvements: Optional[str]
-    features: Optional[str]
-    legal_challenges: Optional[str]
-    additional_comments: Optional[str]
-    contact_willing: Optional[str]
-    contact_email: Optional[str]
-    submitted_at: datetime
-    ip_address: Optional[str]
-    user_agent: Optional[str]
-
-    class Config:
-        from_attributes = True
-
-
-# Generic Response Schemas
-class SuccessResponse(BaseModel):
-    message: str
-    id: int
-    submitted_at: datetime
-
-
-class HealthResponse(BaseModel):
-    status: str
-    timestamp: datetime
-
-
-class PaginatedResponse(BaseModel):
-    total: int
-    pages: int
-    current_page: int
-    per_page: int
-
-
-class UserRegistrationListResponse(PaginatedResponse):
-    registrations: List[UserRegistrationResponse]
-
-
-class FeedbackListResponse(PaginatedResponse):
-    feedback: List[FeedbackResponse]
-
-
-class ErrorResponse(BaseModel):
-    error: str
-    details: Optional[List[str]] = None
-
-
-class HomeResponse(BaseModel):
-    message: str
-    version: str
-    endpoints: dict
+from functools import lru_cache
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator, create_model
+from typing import Dict, Optional, List, Tuple, Type
+from datetime import datetime
+from enum import Enum
+
+
+class UserTypeEnum(str, Enum):
+    USER = "USER"
+    CREATOR = "Creator"
+
+
+class ContactWillingEnum(str, Enum):
+    YES = "yes"
+    NO = "no"
+
+
+# User Registration Schemas
+class UserRegistrationCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    email: EmailStr
+    phone: str = Field(..., min_length=1, max_length=20)
+    gender: Optional[str] = Field(None, max_length=50)
+    profession: Optional[str] = Field(None, max_length=255)
+    user_type: UserTypeEnum = Field(..., alias="userType")
+
+    class Config:
+        populate_by_name = True
+
+
+class UserRegistrationResponse(BaseModel):
+    id: int
+    name: str
+    email: str
+    phone: str
+    gender: Optional[str]
+    profession: Optional[str]
+    user_type: str
+    submitted_at: datetime
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    country: Optional[str] = None
+    region: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Feedback Schemas
+class FeedbackCreate(BaseModel):
+    # Rating questions (1-5 scale)
+    visual_design: Optional[int] = Field(None, ge=1, le=5, alias="visualDesign")
+    ease_of_navigation: Optional[int] = Field(None, ge=1, le=5, alias="easeOfNavigation")
+    mobile_responsiveness: Optional[int] = Field(None, ge=1, le=5, alias="mobileResponsiveness")
+    overall_satisfaction: Optional[int] = Field(None, ge=1, le=5, alias="overallSatisfaction")
+    ease_of_tasks: Optional[int] = Field(None, ge=1, le=5, alias="easeOfTasks")
+    quality_of_services: Optional[int] = Field(None, ge=1, le=5, alias="qualityOfServices")
+    
+    # Conditional fields for low ratings
+    visual_design_issue: Optional[str] = Field(None, alias="visualDesignIssue")
+    ease_of_navigation_issue: Optional[str] = Field(None, alias="easeOfNavigationIssue")
+    mobile_responsiveness_issue: Optional[str] = Field(None, alias="mobileResponsivenessIssue")
+    overall_satisfaction_issue: Optional[str] = Field(None, alias="overallSatisfactionIssue")
+    ease_of_tasks_issue: Optional[str] = Field(None, alias="easeOfTasksIssue")
+    quality_of_services_issue: Optional[str] = Field(None, alias="qualityOfServicesIssue")
+    
+    # Text area questions
+    like_most: Optional[str] = Field(None, alias="likeMost")
+    improvements: Optional[str] = None
+    features: Optional[str] = None
+    legal_challenges: Optional[str] = Field(None, alias="legalChallenges")
+    additional_comments: Optional[str] = Field(None, alias="additionalComments")
+    
+    # Follow-up questions
+    contact_willing: Optional[ContactWillingEnum] = Field(None, alias="contactWilling")
+    contact_email: Optional[EmailStr] = Field(None, alias="contactEmail")
+
+    class Config:
+        populate_by_name = True
+
+    @model_validator(mode='after')
+    def validate_feedback_data(self):
+        # Validate contact email
+        if self.contact_willing == ContactWillingEnum.YES and not self.contact_email:
+            raise ValueError('Email is required when willing to be contacted')
+
+        # Validate issue fields for low ratings
+        rating_issue_pairs = [
+            (self.visual_design, self.visual_design_issue, 'visual design'),
+            (self.ease_of_navigation, self.ease_of_navigation_issue, 'ease of navigation'),
+            (self.mobile_responsiveness, self.mobile_responsiveness_issue, 'mobile responsiveness'),
+            (self.overall_satisfaction, self.overall_satisfaction_issue, 'overall satisfaction'),
+            (self.ease_of_tasks, self.ease_of_tasks_issue, 'ease of tasks'),
+            (self.quality_of_services, self.quality_of_services_issue, 'quality of services')
+        ]
+
+        for rating, issue, field_name in rating_issue_pairs:
+            if rating and rating < 3 and not issue:
+                raise ValueError(f'Please explain what you didn\'t like for {field_name} (rating below 3)')
+
+        return self
+
+
+class FeedbackResponse(BaseModel):
+    id: int
+    visual_design: Optional[int]
+    ease_of_navigation: Optional[int]
+    mobile_responsiveness: Optional[int]
+    overall_satisfaction: Optional[int]
+    ease_of_tasks: Optional[int]
+    quality_of_services: Optional[int]
+    visual_design_issue: Optional[str]
+    ease_of_navigation_issue: Optional[str]
+    mobile_responsiveness_issue: Optional[str]
+    overall_satisfaction_issue: Optional[str]
+    ease_of_tasks_issue: Optional[str]
+    quality_of_services_issue: Optional[str]
+    like_most: Optional[str]
+    improvements: Optional[str]
+    features: Optional[str]
+    legal_challenges: Optional[str]
+    additional_comments: Optional[str]
+    contact_willing: Optional[str]
+    contact_email: Optional[str]
+    submitted_at: datetime
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    country: Optional[str] = None
+    region: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Bulk Import Schemas
+class BulkImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class BulkImportResponse(BaseModel):
+    processed: int
+    imported: int
+    failed: int
+    completed: bool
+    resume_from: Optional[int] = None
+    errors: List[BulkImportRowError]
+
+
+class ProfileInfo(BaseModel):
+    id: str
+    format: str
+    size: int
+    created_at: datetime
+
+
+class ProfileListResponse(BaseModel):
+    profiles: List[ProfileInfo]
+
+
+class RouteMemoryStats(BaseModel):
+    route: str
+    requests: int
+    retained_bytes: int
+    retained_per_request: float
+    grew_fraction: float
+    flagged: bool
+
+
+class ExportMemoryStats(BaseModel):
+    name: str
+    started_at: datetime
+    duration_ms: float
+    rss_before: int
+    rss_after: int
+    peak_rss: int
+    peak_growth: int
+
+
+class MemoryStatsResponse(BaseModel):
+    pid: int
+    rss_bytes: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None
+    gc_counts: List[int]
+    gc_objects: int
+    tracemalloc_current: Optional[int] = None
+    tracemalloc_peak: Optional[int] = None
+    routes: List[RouteMemoryStats]
+    exports: List[ExportMemoryStats]
+    object_types: Optional[Dict[str, int]] = None
+
+
+class CPUTaskStats(BaseModel):
+    completed: int
+    failed: int
+    timed_out: int
+    cancelled: int
+    avg_run_ms: Optional[float] = None
+    max_run_ms: float
+    avg_wait_ms: Optional[float] = None
+
+
+class CPUExecutorStatsResponse(BaseModel):
+    pid: int
+    processes: int
+    mode: str
+    max_queue: int
+    running: int
+    queued: int
+    peak_in_flight: int
+    rejected: int
+    abandoned: int
+    restarts: int
+    tasks: Dict[str, CPUTaskStats]
+
+
+class CacheStatsResponse(BaseModel):
+    pid: int
+    enabled: bool
+    entries: Optional[int] = None
+    bytes: Optional[int] = None
+    max_bytes: int
+    hits: int
+    misses: int
+    hit_rate: Optional[float] = None
+
+
+class TimeSeriesResponse(BaseModel):
+    pid: int
+    resolution: str
+    start: datetime
+    bucket_seconds: int
+    seeded: bool
+    series: Dict[str, List[int]]
+
+
+class LocationCount(BaseModel):
+    country: Optional[str]
+    region: Optional[str]
+    count: int
+
+
+class LocationStatsResponse(BaseModel):
+    table: str
+    total: int
+    locations: List[LocationCount]
+
+
+class TermCount(BaseModel):
+    term: str
+    count: int
+    documents: int
+
+
+class LowRatingTerm(BaseModel):
+    term: str
+    documents: int
+    low_rated: int
+    low_rated_share: float
+    lift: float
+
+
+class TermStatsResponse(BaseModel):
+    pid: int
+    field: str
+    seeded: bool
+    answers: int
+    low_rated_answers: int
+    top_terms: List[TermCount]
+    top_bigrams: List[TermCount]
+    low_rating_terms: List[LowRatingTerm]
+
+
+class AllocationDiff(BaseModel):
+    location: str
+    size_diff: int
+    size: int
+    count_diff: int
+    count: int
+
+
+class TracemallocDiffResponse(BaseModel):
+    allocations: List[AllocationDiff]
+
+
+# Generic Response Schemas
+class SuccessResponse(BaseModel):
+    message: str
+    # None while the submission waits in the spool for the database
+    id: Optional[int] = None
+    submitted_at: datetime
+
+
+class HealthResponse(BaseModel):
+    status: str
+    timestamp: datetime
+    spool_depth: Optional[int] = None
+    database_circuit: Optional[str] = None
+    cpu_queue_depth: Optional[int] = None
+
+
+class PaginatedResponse(BaseModel):
+    total: int
+    pages: int
+    current_page: int
+    per_page: int
+
+
+class UserRegistrationListResponse(PaginatedResponse):
+    registrations: List[UserRegistrationResponse]
+
+
+class FeedbackListResponse(PaginatedResponse):
+    feedback: List[FeedbackResponse]
+
+
+@lru_cache(maxsize=128)
+def projected_list_response(list_model: Type[PaginatedResponse], items_field: str,
+                            fields: Tuple[str, ...]) -> Type[PaginatedResponse]:
+    """List response model whose items only carry the projected ``fields``
+
+    Built from the item model of ``list_model`` so field types stay in sync,
+    and cached per projection.
+    """
+    item_model = list_model.model_fields[items_field].annotation.__args__[0]
+    projected_item = create_model(
+        f"{item_model.__name__}Projection",
+        **{name: (item_model.model_fields[name].annotation, ...) for name in fields}
+    )
+    return create_model(
+        f"{list_model.__name__}Projection",
+        __base__=PaginatedResponse,
+        **{items_field: (List[projected_item], ...)}
+    )
+
+
+class ErrorResponse(BaseModel):
+    error: str
+    details: Optional[List[str]] = None
+
+
+class HomeResponse(BaseModel):
+    message: str
+    version: str
+    endpoints: dict
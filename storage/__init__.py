@@ -0,0 +1,67 @@
+# Storage package
+#
+# The backend is selected with the STORAGE_BACKEND environment variable:
+#   mysql  - production MySQL database (default)
+#   sqlite - local SQLite file at SQLITE_PATH, in WAL mode
+#   memory - process-local lists, for tests and benchmarks
+#
+# With the mysql backend, DB_SHARDS spreads the tables in SHARDED_TABLES over
+# several databases (see storage/sharded.py).
+import os
+import logging
+import threading
+from storage.base import Repository, TABLE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mysql').lower()
+
+# Tables that outgrow a single database; feedback stays on the primary
+SHARDED_TABLES = ('user_registrations',)
+
+_repositories = {}
+_lock = threading.Lock()
+
+
+def _create_repository(table: str) -> Repository:
+    if STORAGE_BACKEND == 'mysql':
+        from database import DB_SHARDS
+        if DB_SHARDS and table in SHARDED_TABLES:
+            from storage.sharded import sharded_repository
+            return sharded_repository(table)
+        from storage.mysql import MySQLRepository
+        return MySQLRepository(table)
+    if STORAGE_BACKEND == 'sqlite':
+        from storage.sqlite import SQLiteRepository
+        return SQLiteRepository(table)
+    if STORAGE_BACKEND == 'memory':
+        from storage.memory import MemoryRepository
+        return MemoryRepository(table)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}' (expected mysql, sqlite or memory)")
+
+
+def get_repository(table: str) -> Repository:
+    """Get the repository for a table from the configured backend"""
+    repository = _repositories.get(table)
+    if repository is None:
+        with _lock:
+            repository = _repositories.get(table)
+            if repository is None:
+                repository = _create_repository(table)
+                _repositories[table] = repository
+    return repository
+
+
+def verify_storage():
+    """Verify the configured backend is reachable and has every table"""
+    logger.info(f'Using {STORAGE_BACKEND} storage backend')
+    for table in TABLE_COLUMNS:
+        get_repository(table).verify()
+
+
+def close_storage():
+    """Release what the repositories of this process hold, on shutdown"""
+    with _lock:
+        repositories = list(_repositories.values())
+    for repository in repositories:
+        repository.close()
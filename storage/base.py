@@ -0,0 +1,186 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Column order of each table, matching ``SELECT *`` against the MySQL schema
+REGISTRATION_COLUMNS = (
+    'id', 'name', 'email', 'phone', 'gender', 'profession', 'user_type',
+    'submitted_at', 'ip_address', 'user_agent', 'country', 'region'
+)
+
+FEEDBACK_COLUMNS = (
+    'id', 'visual_design', 'ease_of_navigation', 'mobile_responsiveness',
+    'overall_satisfaction', 'ease_of_tasks', 'quality_of_services',
+    'visual_design_issue', 'ease_of_navigation_issue', 'mobile_responsiveness_issue',
+    'overall_satisfaction_issue', 'ease_of_tasks_issue', 'quality_of_services_issue',
+    'like_most', 'improvements', 'features', 'legal_challenges', 'additional_comments',
+    'contact_willing', 'contact_email', 'submitted_at', 'ip_address', 'user_agent',
+    'country', 'region'
+)
+
+TABLE_COLUMNS = {
+    'user_registrations': REGISTRATION_COLUMNS,
+    'feedback': FEEDBACK_COLUMNS,
+}
+
+# Columns filled in by the storage layer rather than by the caller
+GENERATED_COLUMNS = ('id', 'submitted_at')
+
+# Rows handed over per batch when streaming a whole table
+STREAM_BATCH_SIZE = 500
+
+# Periods count_by_period() can group submissions into
+COUNT_PERIODS = ('minute', 'hour')
+
+
+class StorageUnavailable(Exception):
+    """The backend is known to be down; raised without waiting on it"""
+
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Repository(ABC):
+    """Storage for the rows of a single table
+
+    Rows are returned as tuples in ``columns`` order so the models can build
+    instances positionally whichever backend is configured.
+
+    Inserts may carry a ``submission_id``: a receipt for it is stored in the
+    same transaction as the row, so a submission replayed from the spool
+    (see :mod:`storage.spool`) is written exactly once.
+    """
+
+    # Errors meaning the backend is unreachable rather than the row being bad
+    unavailable_errors: Tuple[type, ...] = (StorageUnavailable,)
+
+    def __init__(self, table: str):
+        self.table = table
+        self.columns = TABLE_COLUMNS[table]
+        self.insert_columns = tuple(c for c in self.columns if c not in GENERATED_COLUMNS)
+
+    @abstractmethod
+    def verify(self) -> None:
+        """Make sure the table is available, raising if it is not"""
+
+    @abstractmethod
+    def insert(self, values: Dict[str, Any], submission_id: Optional[str] = None) -> tuple:
+        """Insert a row and return it as stored"""
+
+    @abstractmethod
+    def insert_once(self, values: Dict[str, Any], submission_id: str, submitted_at: datetime) -> bool:
+        """Insert a row unless ``submission_id`` was already stored
+
+        ``submitted_at`` keeps the time the submission was accepted. Returns
+        False when the submission was already present.
+        """
+
+    @abstractmethod
+    def prune_receipts(self, before: datetime) -> int:
+        """Delete this table's submission receipts older than ``before``"""
+
+    @abstractmethod
+    def insert_many(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert rows in a single transaction and return how many were stored
+
+        Rows that carry a ``submitted_at`` keep it, as when loading historical
+        or generated data; the others are stamped with the current time.
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Return the total number of rows"""
+
+    @abstractmethod
+    def last_id(self) -> int:
+        """Return the highest id stored, or 0 when the table is empty"""
+
+    @abstractmethod
+    def fetch_page(self, limit: int, offset: int, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None,
+                   columns: Optional[Sequence[str]] = None) -> Tuple[List[tuple], int]:
+        """Return a page of rows ordered by ``submitted_at`` newest first, and the total
+
+        ``since`` (inclusive) and ``until`` (exclusive) restrict both to a
+        ``submitted_at`` range. ``columns`` selects a projection; rows then
+        hold only those columns, in that order.
+        """
+
+    @abstractmethod
+    def id_bounds(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Tuple[int, int]:
+        """Lowest and highest id in a ``submitted_at`` range, (0, 0) when it is empty"""
+
+    @abstractmethod
+    def fetch_id_range(self, low: int, high: int, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None,
+                       columns: Optional[Sequence[str]] = None) -> List[tuple]:
+        """Rows with ``low <= id < high`` in a ``submitted_at`` range, highest id first
+
+        Exports split a table into id ranges and read them concurrently.
+        """
+
+    def id_ranges(self, size: int, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None) -> Iterator[Tuple[int, int]]:
+        """Half-open id ranges of about ``size`` rows covering a ``submitted_at`` range, highest first
+
+        Ids of a single database are dense, so the id bounds are split evenly.
+        """
+        low, high = self.id_bounds(since, until)
+        if not high:
+            return
+        top = high + 1
+        while top > low:
+            yield max(top - size, low), top
+            top -= size
+
+    @abstractmethod
+    def count_by_period(self, period: str, since: datetime, max_id: int,
+                        group_by: Optional[str] = None) -> List[Tuple[datetime, Any, int]]:
+        """Rows per ``minute`` or ``hour`` of ``submitted_at`` as (period start, group, count)
+
+        Only rows submitted at or after ``since`` with an id up to ``max_id``
+        are counted. ``group_by`` names a column to split each period by;
+        without it the group is None.
+        """
+
+    @abstractmethod
+    def count_by_location(self, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> List[Tuple[Optional[str], Optional[str], int]]:
+        """Rows per (country, region), optionally within a ``submitted_at`` range"""
+
+    @abstractmethod
+    def set_locations(self, locations: Sequence[Tuple[int, Optional[str], Optional[str]]]) -> int:
+        """Store (id, country, region) for existing rows in one transaction, returning the rows updated"""
+
+    @abstractmethod
+    def iter_rows(self, since_id: int = 0, columns: Optional[Sequence[str]] = None,
+                  batch_size: int = STREAM_BATCH_SIZE) -> Iterator[List[tuple]]:
+        """Yield every row with an id above ``since_id`` in id order, in batches
+
+        Memory stays bounded by ``batch_size`` however large the table is.
+        Closing the generator early releases any cursor or connection at once.
+        """
+
+    def close(self) -> None:
+        """Release what the backend holds for this process, on shutdown"""
+
+    @staticmethod
+    def date_filter(since: Optional[datetime], until: Optional[datetime],
+                    placeholder: str = '%s') -> Tuple[str, tuple]:
+        """Build a ``WHERE`` clause on ``submitted_at`` for SQL backends
+
+        Comparing the bare column keeps the condition sargable, so MySQL can
+        prune monthly partitions and use ``idx_submitted_at``.
+        """
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append(f"submitted_at >= {placeholder}")
+            params.append(since)
+        if until is not None:
+            conditions.append(f"submitted_at < {placeholder}")
+            params.append(until)
+        if not conditions:
+            return '', ()
+        return 'WHERE ' + ' AND '.join(conditions), tuple(params)
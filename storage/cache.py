@@ -0,0 +1,208 @@
+import os
+import time
+import pickle
+import logging
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from storage import STORAGE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# Shared by every worker on the host; off by default for the process-local
+# memory backend, whose rows other processes can't see
+CACHE_ENABLED = os.environ.get(
+    'CACHE_ENABLED', 'false' if STORAGE_BACKEND == 'memory' else 'true'
+).lower() == 'true'
+CACHE_PATH = os.environ.get('CACHE_PATH', os.path.join('instance', 'cache.db'))
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# Default lifetime of an entry; invalidation makes local writes visible at
+# once, so this only bounds staleness from writes made on other hosts
+CACHE_TTL = float(os.environ.get('CACHE_TTL', '30'))
+# Hits refresh an entry's LRU position at most this often, to keep reads read-only
+CACHE_TOUCH_INTERVAL = 5.0
+
+# Set once the cache has been cleared, so forked workers don't clear it again
+CACHE_CLEARED_ENV = 'SHARED_CACHE_CLEARED'
+
+CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at);
+    CREATE TABLE IF NOT EXISTS cache_generations (
+        name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL
+    );
+"""
+
+
+class SharedCache:
+    """Cache in a local SQLite file shared by all worker processes
+
+    Entries are pickled values with a TTL, evicted least recently used first
+    once the file holds more than ``max_bytes``. Each table has a generation
+    counter that writes bump; entries are stored under the generations of
+    the tables they were computed from, so one cheap update invalidates
+    every dependent entry in every worker. Cache errors are logged and
+    treated as misses; they never fail the caller.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES, enabled: bool = CACHE_ENABLED):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        # Connections must not be shared with processes forked after they were opened
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Losing the last writes in a crash only costs a recomputation
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.executescript(CACHE_SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _versioned_key(self, connection: sqlite3.Connection, key: str, tables: Sequence[str]) -> str:
+        if not tables:
+            return key
+        placeholders = ', '.join('?' * len(tables))
+        generations = dict(connection.execute(
+            f"SELECT name, generation FROM cache_generations WHERE name IN ({placeholders})", tuple(tables)
+        ).fetchall())
+        return key + '@' + ','.join(f"{table}:{generations.get(table, 0)}" for table in tables)
+
+    def lookup(self, key: str, tables: Sequence[str] = ()) -> Tuple[bool, Any, Optional[str]]:
+        """Return (hit, value, versioned key); store a miss under the versioned key"""
+        if not self.enabled:
+            return False, None, None
+        try:
+            connection = self._connection()
+            versioned = self._versioned_key(connection, key, tables)
+            now = time.time()
+            row = connection.execute(
+                "SELECT value, accessed_at FROM cache_entries WHERE key = ? AND expires_at > ?", (versioned, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None, versioned
+            if now - row[1] > CACHE_TOUCH_INTERVAL:
+                connection.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, versioned))
+            self.hits += 1
+            return True, pickle.loads(row[0]), versioned
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f'Shared cache read failed for {key}: {e}')
+            return False, None, None
+
+    def store(self, versioned: str, value: Any, ttl: float = CACHE_TTL) -> None:
+        if not self.enabled or versioned is None:
+            return
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            if len(data) > self.max_bytes // 4:
+                return
+            now = time.time()
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)", (versioned, data, len(data), now + ttl, now)
+            )
+            self._evict(connection, now)
+        except (sqlite3.Error, pickle.PicklingError) as e:
+            logger.warning(f'Shared cache write failed for {versioned}: {e}')
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        connection.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        # Evict down to 90% so the next few writes don't each trigger a pass
+        excess = total - self.max_bytes * 0.9
+        victims = []
+        for key, size in connection.execute("SELECT key, size FROM cache_entries ORDER BY accessed_at"):
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+        connection.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], tables: Sequence[str] = (),
+                       ttl: float = CACHE_TTL) -> Any:
+        """Cached value of ``compute()``, valid until one of ``tables`` changes
+
+        The generations are read before computing, so a write that lands
+        meanwhile leaves the result stored under the old, invalid key.
+        """
+        hit, value, versioned = self.lookup(key, tables)
+        if hit:
+            return value
+        value = compute()
+        if value is not None:
+            self.store(versioned, value, ttl)
+        return value
+
+    def invalidate(self, *tables: str) -> None:
+        """Make every entry computed from ``tables`` stale, in every worker"""
+        if not self.enabled:
+            return
+        try:
+            connection = self._connection()
+            connection.executemany(
+                "INSERT INTO cache_generations (name, generation) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET generation = generation + 1",
+                [(table,) for table in tables]
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache invalidation failed for {', '.join(tables)}: {e}")
+
+    def clear(self) -> None:
+        if not self.enabled:
+            return
+        try:
+            connection = self._connection()
+            connection.execute("DELETE FROM cache_entries")
+            connection.execute("DELETE FROM cache_generations")
+        except sqlite3.Error as e:
+            logger.warning(f'Shared cache clear failed: {e}')
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries and size of the shared file, and this worker's hits and misses"""
+        stats = {'enabled': self.enabled, 'max_bytes': self.max_bytes, 'hits': self.hits, 'misses': self.misses}
+        if not self.enabled:
+            return stats
+        try:
+            stats['entries'], stats['bytes'] = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f'Shared cache stats failed: {e}')
+        return stats
+
+
+shared_cache = SharedCache()
+
+
+def reset_shared_cache() -> None:
+    """Drop entries left by a previous run, once per process tree
+
+    Generations restart with the cache, and rows may have changed while the
+    application was down.
+    """
+    if os.environ.get(CACHE_CLEARED_ENV) == '1':
+        return
+    shared_cache.clear()
+    os.environ[CACHE_CLEARED_ENV] = '1'
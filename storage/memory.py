@@ -0,0 +1,186 @@
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from storage.base import Repository, STREAM_BATCH_SIZE
+
+
+class MemoryRepository(Repository):
+    """Process-local storage for tests and benchmarks
+
+    Rows are kept in insertion order, so a row's id is its position + 1.
+    That is usually ``submitted_at`` order too, but replays and imports may
+    bring older timestamps; pages are then sorted on (submitted_at, id) like
+    the SQL backends. User agent strings are interned so repeated browsers
+    share one string object.
+    """
+
+    def __init__(self, table: str):
+        super().__init__(table)
+        self._rows: List[tuple] = []
+        # submission id -> time the receipt was stored
+        self._receipts: Dict[str, datetime] = {}
+        # Whether _rows is still in submitted_at order, letting pages be plain slices
+        self._in_order = True
+        self._lock = threading.Lock()
+
+    def verify(self) -> None:
+        pass
+
+    def insert(self, values: Dict[str, Any], submission_id: Optional[str] = None) -> tuple:
+        with self._lock:
+            if submission_id:
+                self._receipts[submission_id] = datetime.now()
+            return self._append(values, datetime.now())
+
+    def insert_once(self, values: Dict[str, Any], submission_id: str, submitted_at: datetime) -> bool:
+        with self._lock:
+            if submission_id in self._receipts:
+                return False
+            self._receipts[submission_id] = datetime.now()
+            self._append(values, submitted_at)
+            return True
+
+    def _append(self, values: Dict[str, Any], submitted_at: datetime) -> tuple:
+        # Caller holds the lock
+        stored = dict(values, id=len(self._rows) + 1, submitted_at=submitted_at)
+        if stored.get('user_agent'):
+            stored['user_agent'] = sys.intern(stored['user_agent'])
+        row = tuple(stored.get(c) for c in self.columns)
+        self._store(row)
+        return row
+
+    def _store(self, row: tuple) -> None:
+        # Caller holds the lock
+        position = self.columns.index('submitted_at')
+        if self._rows and row[position] < self._rows[-1][position]:
+            self._in_order = False
+        self._rows.append(row)
+
+    def prune_receipts(self, before: datetime) -> int:
+        with self._lock:
+            expired = [key for key, created_at in self._receipts.items() if created_at < before]
+            for key in expired:
+                del self._receipts[key]
+        return len(expired)
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> int:
+        submitted_at = datetime.now()
+        with self._lock:
+            next_id = len(self._rows) + 1
+            for offset, values in enumerate(rows):
+                stored = dict(values, id=next_id + offset, submitted_at=values.get('submitted_at') or submitted_at)
+                if stored.get('user_agent'):
+                    stored['user_agent'] = sys.intern(stored['user_agent'])
+                self._store(tuple(stored.get(c) for c in self.columns))
+        return len(rows)
+
+    def count(self) -> int:
+        return len(self._rows)
+
+    def last_id(self) -> int:
+        # Ids are assigned sequentially from 1
+        return len(self._rows)
+
+    def fetch_page(self, limit: int, offset: int, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None,
+                   columns: Optional[Sequence[str]] = None) -> Tuple[List[tuple], int]:
+        with self._lock:
+            rows = self._in_range(self._rows, since, until)
+            if not self._in_order:
+                position = self.columns.index('submitted_at')
+                rows = sorted(rows, key=lambda row: (row[position], row[0]))
+            total = len(rows)
+            end = total - offset
+            start = max(end - limit, 0)
+            page = rows[start:end][::-1] if end > 0 else []
+
+        if columns and tuple(columns) != self.columns:
+            positions = [self.columns.index(c) for c in columns]
+            page = [tuple(row[p] for p in positions) for row in page]
+        return page, total
+
+    def _in_range(self, rows: List[tuple], since: Optional[datetime], until: Optional[datetime]) -> List[tuple]:
+        if since is None and until is None:
+            return rows
+        position = self.columns.index('submitted_at')
+        return [
+            row for row in rows
+            if (since is None or row[position] >= since) and (until is None or row[position] < until)
+        ]
+
+    def id_bounds(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Tuple[int, int]:
+        with self._lock:
+            rows = self._in_range(self._rows, since, until)
+        return (rows[0][0], rows[-1][0]) if rows else (0, 0)
+
+    def fetch_id_range(self, low: int, high: int, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None,
+                       columns: Optional[Sequence[str]] = None) -> List[tuple]:
+        # Ids are list positions + 1
+        with self._lock:
+            rows = self._in_range(self._rows[max(low, 1) - 1:max(high, 1) - 1], since, until)[::-1]
+        if columns and tuple(columns) != self.columns:
+            positions = [self.columns.index(c) for c in columns]
+            rows = [tuple(row[p] for p in positions) for row in rows]
+        return rows
+
+    def count_by_period(self, period: str, since: datetime, max_id: int,
+                        group_by: Optional[str] = None) -> List[Tuple[datetime, Any, int]]:
+        position = self.columns.index('submitted_at')
+        group_position = self.columns.index(group_by) if group_by else None
+        replace = {'second': 0, 'microsecond': 0}
+        if period == 'hour':
+            replace['minute'] = 0
+        with self._lock:
+            rows = self._rows[:max(max_id, 0)]
+        counts = Counter(
+            (row[position].replace(**replace), row[group_position] if group_by else None)
+            for row in rows if row[position] >= since
+        )
+        return [(start, group, count) for (start, group), count in counts.items()]
+
+    def count_by_location(self, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> List[Tuple[Optional[str], Optional[str], int]]:
+        country, region = self.columns.index('country'), self.columns.index('region')
+        with self._lock:
+            rows = self._in_range(self._rows, since, until)
+        counts = Counter((row[country], row[region]) for row in rows)
+        return [(country, region, count) for (country, region), count in counts.items()]
+
+    def set_locations(self, locations: Sequence[Tuple[int, Optional[str], Optional[str]]]) -> int:
+        country, region = self.columns.index('country'), self.columns.index('region')
+        updated = 0
+        with self._lock:
+            for row_id, row_country, row_region in locations:
+                if 0 < row_id <= len(self._rows):
+                    row = list(self._rows[row_id - 1])
+                    row[country], row[region] = row_country, row_region
+                    self._rows[row_id - 1] = tuple(row)
+                    updated += 1
+        return updated
+
+    def iter_rows(self, since_id: int = 0, columns: Optional[Sequence[str]] = None,
+                  batch_size: int = STREAM_BATCH_SIZE) -> Iterator[List[tuple]]:
+        positions = None
+        if columns and tuple(columns) != self.columns:
+            positions = [self.columns.index(c) for c in columns]
+
+        # Ids are list positions + 1, so a batch is a plain slice
+        start = max(since_id, 0)
+        while True:
+            with self._lock:
+                batch = self._rows[start:start + batch_size]
+            if not batch:
+                return
+            start += len(batch)
+            if positions:
+                batch = [tuple(row[p] for p in positions) for row in batch]
+            yield batch
+
+    def clear(self) -> None:
+        """Drop every stored row"""
+        with self._lock:
+            self._rows.clear()
+            self._in_order = True
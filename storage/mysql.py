@@ -0,0 +1,335 @@
+import logging
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+import pymysql
+from database import get_db_connection, verify_database_connection
+from storage.base import Repository, StorageUnavailable, TABLE_COLUMNS, STREAM_BATCH_SIZE
+from storage.receipts import receipt_key
+from storage.user_agents import UserAgentDictionary, user_agent_dictionary
+
+logger = logging.getLogger(__name__)
+
+# Seconds the server waits on a slow stream consumer before aborting the query
+STREAM_NET_WRITE_TIMEOUT = 600
+
+
+def select_columns(table: str, columns: Optional[Sequence[str]] = None) -> str:
+    """Column list for reading ``table`` aliased as ``t`` with user agents decoded
+
+    Rows store a ``user_agent_id``; joining ``user_agents`` as ``ua`` puts the
+    string back in the ``user_agent`` position of the row.
+    """
+    return ', '.join(
+        'ua.user_agent' if column == 'user_agent' else f't.{column}'
+        for column in (columns or TABLE_COLUMNS[table])
+    )
+
+
+def select_from(table: str) -> str:
+    """``FROM`` clause matching :func:`select_columns`"""
+    return f"{table} t LEFT JOIN user_agents ua ON ua.id = t.user_agent_id"
+
+
+class MySQLRepository(Repository):
+    """Production storage backed by the configured MySQL database
+
+    ``connect`` opens the connections, the primary's (and its replicas for
+    reads) unless the table lives on a shard; ``user_agents`` caches the ids
+    of that database's ``user_agents`` table.
+    """
+
+    unavailable_errors = (StorageUnavailable, pymysql.err.OperationalError, pymysql.err.InterfaceError)
+    # Generated columns the caller supplies instead of the database
+    assigned_columns: Tuple[str, ...] = ()
+
+    def __init__(self, table: str, connect: Callable[..., ContextManager[pymysql.Connection]] = get_db_connection,
+                 user_agents: UserAgentDictionary = user_agent_dictionary):
+        super().__init__(table)
+        self.connect = connect
+        self.user_agents = user_agents
+        # user_agent is stored as a reference into the user_agents table
+        self.write_columns = self.assigned_columns + tuple(
+            'user_agent_id' if c == 'user_agent' else c for c in self.insert_columns
+        )
+        self._insert_sql = f"""
+            INSERT INTO {self.table}
+            ({', '.join(self.write_columns)})
+            VALUES ({', '.join(['%s'] * len(self.write_columns))})
+        """
+        self._replay_sql = f"""
+            INSERT INTO {self.table}
+            ({', '.join(self.write_columns)}, submitted_at)
+            VALUES ({', '.join(['%s'] * (len(self.write_columns) + 1))})
+        """
+        self._select_sql = f"SELECT {select_columns(table)} FROM {select_from(table)}"
+
+    def _encode(self, values: Dict[str, Any], user_agent_ids: Dict[str, int]) -> tuple:
+        """Column values for an insert, with the user agent replaced by its id"""
+        user_agent = values.get('user_agent')
+        encoded = dict(values, user_agent_id=user_agent_ids.get(user_agent) if user_agent else None)
+        return tuple(encoded.get(c) for c in self.write_columns)
+
+    def _resolve_user_agents(self, cursor, rows: List[Dict[str, Any]]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Map each distinct user agent to an id, returning (all ids, newly resolved ids)"""
+        ids = {}
+        resolved = {}
+        for user_agent in {row.get('user_agent') for row in rows if row.get('user_agent')}:
+            user_agent_id = self.user_agents.lookup(user_agent)
+            if user_agent_id is None:
+                user_agent_id = resolved[user_agent] = self.user_agents.resolve(cursor, user_agent)
+            ids[user_agent] = user_agent_id
+        return ids, resolved
+
+    def _remember_user_agents(self, resolved: Dict[str, int]) -> None:
+        # Only cache ids whose rows are committed
+        for user_agent, user_agent_id in resolved.items():
+            self.user_agents.remember(user_agent, user_agent_id)
+
+    def _store_receipt(self, cursor, submission_id: str) -> None:
+        cursor.execute(
+            "INSERT INTO submission_receipts (submission_id, table_name) VALUES (%s, %s)",
+            (receipt_key(submission_id), self.table)
+        )
+
+    def verify(self) -> None:
+        # Checks every required table at once and caches the result
+        verify_database_connection()
+
+    def insert(self, values: Dict[str, Any], submission_id: Optional[str] = None) -> tuple:
+        with self.connect() as connection:
+            cursor = connection.cursor()
+
+            if submission_id:
+                self._store_receipt(cursor, submission_id)
+            user_agent_ids, resolved = self._resolve_user_agents(cursor, [values])
+            cursor.execute(self._insert_sql, self._encode(values, user_agent_ids))
+            connection.commit()
+            self._remember_user_agents(resolved)
+
+            # Get the created record
+            cursor.execute(*self.row_query(values.get('id') or cursor.lastrowid))
+            row = cursor.fetchone()
+
+            if not row:
+                raise Exception(f"Failed to retrieve created {self.table} row")
+            return row
+
+    def insert_once(self, values: Dict[str, Any], submission_id: str, submitted_at: datetime) -> bool:
+        with self.connect() as connection:
+            cursor = connection.cursor()
+
+            # The receipt goes first: a duplicate means the row is already stored
+            try:
+                self._store_receipt(cursor, submission_id)
+            except pymysql.err.IntegrityError as e:
+                if e.args[0] != pymysql.constants.ER.DUP_ENTRY:
+                    raise
+                connection.rollback()
+                return False
+
+            user_agent_ids, resolved = self._resolve_user_agents(cursor, [values])
+            cursor.execute(self._replay_sql, self._encode(values, user_agent_ids) + (submitted_at,))
+            connection.commit()
+            self._remember_user_agents(resolved)
+            return True
+
+    def prune_receipts(self, before: datetime) -> int:
+        deleted = 0
+        with self.connect() as connection:
+            cursor = connection.cursor()
+            # Small batches keep each delete's locks short
+            while True:
+                cursor.execute(
+                    "DELETE FROM submission_receipts WHERE table_name = %s AND created_at < %s LIMIT 5000",
+                    (self.table, before)
+                )
+                connection.commit()
+                deleted += cursor.rowcount
+                if cursor.rowcount < 5000:
+                    return deleted
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> int:
+        with self.connect() as connection:
+            cursor = connection.cursor()
+
+            user_agent_ids, resolved = self._resolve_user_agents(cursor, rows)
+            # PyMySQL rewrites these into multi-row INSERT statements
+            if any(row.get('submitted_at') for row in rows):
+                submitted_at = datetime.now()
+                cursor.executemany(self._replay_sql, [
+                    self._encode(row, user_agent_ids) + (row.get('submitted_at') or submitted_at,) for row in rows
+                ])
+            else:
+                cursor.executemany(self._insert_sql, [self._encode(row, user_agent_ids) for row in rows])
+            connection.commit()
+            self._remember_user_agents(resolved)
+            return len(rows)
+
+    def count(self) -> int:
+        with self.connect(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM {self.table}")
+            return cursor.fetchone()[0]
+
+    def last_id(self) -> int:
+        with self.connect(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute(self.last_id_query())
+            return cursor.fetchone()[0]
+
+    # Statements behind the reads below, also EXPLAINed by check_query_plans.py
+
+    def row_query(self, row_id: int) -> Tuple[str, tuple]:
+        return f"{self._select_sql} WHERE t.id = %s", (row_id,)
+
+    def last_id_query(self) -> str:
+        return f"SELECT COALESCE(MAX(id), 0) FROM {self.table}"
+
+    def count_query(self, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None) -> Tuple[str, tuple]:
+        where, params = self.date_filter(since, until)
+        return f"SELECT COUNT(*) FROM {self.table} {where}", params
+
+    def page_query(self, limit: int, offset: int, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None,
+                   columns: Optional[Sequence[str]] = None) -> Tuple[str, tuple]:
+        where, params = self.date_filter(since, until)
+        columns = columns or self.columns
+        # The user_agents join is only needed when the string is requested
+        source = select_from(self.table) if 'user_agent' in columns else f"{self.table} t"
+
+        # Deferred join: OFFSET walks idx_submitted_at alone (it carries the
+        # primary key), and full rows are read only for the page itself
+        query = f"""
+            SELECT {select_columns(self.table, columns)}
+            FROM (
+                SELECT id FROM {self.table}
+                {where}
+                ORDER BY submitted_at DESC, id DESC
+                LIMIT %s OFFSET %s
+            ) page
+            JOIN {source} ON t.id = page.id
+            ORDER BY t.submitted_at DESC, t.id DESC
+        """
+        return query, params + (limit, offset)
+
+    def stream_query(self, since_id: int = 0, columns: Optional[Sequence[str]] = None) -> Tuple[str, tuple]:
+        columns = columns or self.columns
+        source = select_from(self.table) if 'user_agent' in columns else f"{self.table} t"
+        return (f"SELECT {select_columns(self.table, columns)} FROM {source} "
+                f"WHERE t.id > %s ORDER BY t.id", (since_id,))
+
+    def bounds_query(self, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> Tuple[str, tuple]:
+        where, params = self.date_filter(since, until)
+        return f"SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM {self.table} {where}", params
+
+    def range_query(self, low: int, high: int, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None,
+                    columns: Optional[Sequence[str]] = None) -> Tuple[str, tuple]:
+        where, params = self.date_filter(since, until)
+        columns = columns or self.columns
+        source = select_from(self.table) if 'user_agent' in columns else f"{self.table} t"
+        # A primary key range scan; the date filter only trims the ends of the table
+        where = where.replace('WHERE', 'AND').replace('submitted_at', 't.submitted_at')
+        return (f"SELECT {select_columns(self.table, columns)} FROM {source} "
+                f"WHERE t.id >= %s AND t.id < %s {where} ORDER BY t.id DESC", (low, high) + params)
+
+    def period_count_query(self, period: str, since: datetime, max_id: int,
+                           group_by: Optional[str] = None) -> Tuple[str, tuple]:
+        # %% is a literal % once pymysql substitutes the parameters
+        period_format = '%%Y-%%m-%%d %%H:%%i:00' if period == 'minute' else '%%Y-%%m-%%d %%H:00:00'
+        return (f"SELECT DATE_FORMAT(submitted_at, '{period_format}') AS period, {group_by or 'NULL'} AS grp, "
+                f"COUNT(*) FROM {self.table} WHERE submitted_at >= %s AND id <= %s GROUP BY period, grp",
+                (since, max_id))
+
+    def id_histogram_query(self, width: int, since: Optional[datetime] = None,
+                           until: Optional[datetime] = None) -> Tuple[str, tuple]:
+        where, params = self.date_filter(since, until)
+        # Every secondary index carries the primary key, so only an index is read
+        return (f"SELECT id DIV %s AS bucket, COUNT(*) FROM {self.table} {where} GROUP BY bucket",
+                (width,) + params)
+
+    def location_count_query(self, since: Optional[datetime] = None,
+                             until: Optional[datetime] = None) -> Tuple[str, tuple]:
+        where, params = self.date_filter(since, until)
+        return f"SELECT country, region, COUNT(*) FROM {self.table} {where} GROUP BY country, region", params
+
+    def fetch_page(self, limit: int, offset: int, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None,
+                   columns: Optional[Sequence[str]] = None) -> Tuple[List[tuple], int]:
+        # Admin lists and exports read from a replica when one is configured
+        with self.connect(read_only=True) as connection:
+            cursor = connection.cursor()
+
+            cursor.execute(*self.count_query(since, until))
+            total = cursor.fetchone()[0]
+
+            cursor.execute(*self.page_query(limit, offset, since, until, columns))
+            return list(cursor.fetchall()), total
+
+    def id_bounds(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Tuple[int, int]:
+        with self.connect(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute(*self.bounds_query(since, until))
+            low, high = cursor.fetchone()
+            return int(low), int(high)
+
+    def fetch_id_range(self, low: int, high: int, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None,
+                       columns: Optional[Sequence[str]] = None) -> List[tuple]:
+        # Each range uses its own pooled connection, so ranges load in parallel
+        with self.connect(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute(*self.range_query(low, high, since, until, columns))
+            return list(cursor.fetchall())
+
+    def count_by_period(self, period: str, since: datetime, max_id: int,
+                        group_by: Optional[str] = None) -> List[Tuple[datetime, Any, int]]:
+        with self.connect(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute(*self.period_count_query(period, since, max_id, group_by))
+            return [(datetime.fromisoformat(start), group, count) for start, group, count in cursor.fetchall()]
+
+    def count_by_id_bucket(self, width: int, since: Optional[datetime] = None,
+                           until: Optional[datetime] = None) -> List[Tuple[int, int]]:
+        """Rows per block of ``width`` ids as (id // width, count), optionally within a ``submitted_at`` range"""
+        with self.connect(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute(*self.id_histogram_query(width, since, until))
+            return [(int(bucket), count) for bucket, count in cursor.fetchall()]
+
+    def count_by_location(self, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> List[Tuple[Optional[str], Optional[str], int]]:
+        with self.connect(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute(*self.location_count_query(since, until))
+            return list(cursor.fetchall())
+
+    def set_locations(self, locations: Sequence[Tuple[int, Optional[str], Optional[str]]]) -> int:
+        with self.connect() as connection:
+            cursor = connection.cursor()
+            updated = cursor.executemany(
+                f"UPDATE {self.table} SET country = %s, region = %s WHERE id = %s",
+                [(country, region, row_id) for row_id, country, region in locations]
+            )
+            connection.commit()
+            return updated
+
+    def iter_rows(self, since_id: int = 0, columns: Optional[Sequence[str]] = None,
+                  batch_size: int = STREAM_BATCH_SIZE) -> Iterator[List[tuple]]:
+        with self.connect(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute("SET SESSION net_write_timeout = %s", (STREAM_NET_WRITE_TIMEOUT,))
+
+            # Unbuffered cursor: rows are read off the socket as the client consumes them
+            stream = connection.cursor(pymysql.cursors.SSCursor)
+            stream.execute(*self.stream_query(since_id, columns))
+            while True:
+                rows = stream.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            # Closing early skips this on purpose: SSCursor.close() would read the
+            # rest of the result, whereas closing the connection just drops it
+            stream.close()
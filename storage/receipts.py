@@ -0,0 +1,22 @@
+import os
+from storage.schema import create_table_sql
+
+RECEIPTS_TABLE = 'submission_receipts'
+
+# Days a receipt is kept; long enough for any spooled copy to be replayed
+RECEIPT_RETENTION_DAYS = int(os.environ.get('RECEIPT_RETENTION_DAYS', '7'))
+
+SUBMISSION_RECEIPTS_TABLE_SQL = create_table_sql(RECEIPTS_TABLE)
+
+SQLITE_SUBMISSION_RECEIPTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS submission_receipts (
+        submission_id TEXT NOT NULL PRIMARY KEY,
+        table_name VARCHAR(64) NOT NULL,
+        created_at DATETIME NOT NULL
+    )
+"""
+
+
+def receipt_key(submission_id: str) -> bytes:
+    """Binary form of a hex submission id, as stored by MySQL"""
+    return bytes.fromhex(submission_id)
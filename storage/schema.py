@@ -0,0 +1,124 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+# The MySQL schema the application expects. Migrations create and upgrade
+# databases to it, ``migrate.py status`` reports where a database differs,
+# and the query plan checks read its indexes. Change it together with a
+# migration under migrations/.
+
+TABLE_OPTIONS = "ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"
+
+
+def _rating(column: str) -> Tuple[str, str]:
+    return column, f"INT NULL CHECK ({column} >= 1 AND {column} <= 5)"
+
+
+def _country() -> Tuple[str, str]:
+    return 'country', "CHAR(2) NULL COMMENT 'ISO 3166 code located from ip_address'"
+
+
+def _region() -> Tuple[str, str]:
+    return 'region', 'VARCHAR(100) NULL'
+
+
+class TableSchema:
+    """Columns and secondary indexes of one table"""
+
+    def __init__(self, name: str, columns: Sequence[Tuple[str, str]],
+                 indexes: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 unique: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.name = name
+        self.columns = tuple(columns)
+        self.indexes = dict(indexes or {})
+        self.unique = dict(unique or {})
+
+    @property
+    def column_names(self) -> Tuple[str, ...]:
+        return tuple(name for name, _ in self.columns)
+
+    @property
+    def all_indexes(self) -> Dict[str, Tuple[str, ...]]:
+        """Every secondary index, unique or not, by name"""
+        return {**self.unique, **self.indexes}
+
+    def create_sql(self) -> str:
+        definitions = [f"{name} {definition}" for name, definition in self.columns]
+        definitions += [f"UNIQUE KEY {name} ({', '.join(columns)})" for name, columns in self.unique.items()]
+        definitions += [f"INDEX {name} ({', '.join(columns)})" for name, columns in self.indexes.items()]
+        body = ',\n        '.join(definitions)
+        return f"""
+    CREATE TABLE IF NOT EXISTS {self.name} (
+        {body}
+    ) {TABLE_OPTIONS}
+"""
+
+
+SCHEMA: Dict[str, TableSchema] = {
+    table.name: table for table in (
+        TableSchema('user_agents', (
+            ('id', 'INT AUTO_INCREMENT PRIMARY KEY'),
+            ('ua_hash', "BINARY(20) NOT NULL COMMENT 'SHA-1 of user_agent'"),
+            ('user_agent', 'TEXT NOT NULL'),
+        ), unique={'uq_ua_hash': ('ua_hash',)}),
+
+        TableSchema('submission_receipts', (
+            ('submission_id', 'BINARY(16) NOT NULL PRIMARY KEY'),
+            ('table_name', 'VARCHAR(64) NOT NULL'),
+            ('created_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
+        ), indexes={'idx_table_created': ('table_name', 'created_at')}),
+
+        TableSchema('user_registrations', (
+            # BIGINT holds the time-ordered ids of sharded deployments (storage/sharded.py)
+            ('id', 'BIGINT AUTO_INCREMENT PRIMARY KEY'),
+            ('name', 'VARCHAR(255) NOT NULL'),
+            ('email', 'VARCHAR(255) NOT NULL'),
+            ('phone', 'VARCHAR(20) NOT NULL'),
+            ('gender', 'VARCHAR(50) NULL'),
+            ('profession', 'VARCHAR(255) NULL'),
+            ('user_type', "VARCHAR(20) NOT NULL COMMENT 'USER or Creator'"),
+            ('submitted_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
+            ('ip_address', "VARCHAR(45) NULL COMMENT 'IPv4 or IPv6'"),
+            ('user_agent_id', 'INT NULL'),
+            _country(),
+            _region(),
+        ), indexes={
+            # Lists, exports and date filters; carries the primary key for the deferred join
+            'idx_submitted_at': ('submitted_at',),
+            # Support lookups of a registrant by email
+            'idx_email': ('email',),
+        }),
+
+        TableSchema('feedback', (
+            ('id', 'INT AUTO_INCREMENT PRIMARY KEY'),
+            _rating('visual_design'),
+            _rating('ease_of_navigation'),
+            _rating('mobile_responsiveness'),
+            _rating('overall_satisfaction'),
+            _rating('ease_of_tasks'),
+            _rating('quality_of_services'),
+            ('visual_design_issue', 'TEXT NULL'),
+            ('ease_of_navigation_issue', 'TEXT NULL'),
+            ('mobile_responsiveness_issue', 'TEXT NULL'),
+            ('overall_satisfaction_issue', 'TEXT NULL'),
+            ('ease_of_tasks_issue', 'TEXT NULL'),
+            ('quality_of_services_issue', 'TEXT NULL'),
+            ('like_most', 'TEXT NULL'),
+            ('improvements', 'TEXT NULL'),
+            ('features', 'TEXT NULL'),
+            ('legal_challenges', 'TEXT NULL'),
+            ('additional_comments', 'TEXT NULL'),
+            ('contact_willing', "VARCHAR(10) NULL COMMENT 'yes or no'"),
+            ('contact_email', 'VARCHAR(255) NULL'),
+            ('submitted_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
+            ('ip_address', "VARCHAR(45) NULL COMMENT 'IPv4 or IPv6'"),
+            ('user_agent_id', 'INT NULL'),
+            _country(),
+            _region(),
+        ), indexes={
+            'idx_submitted_at': ('submitted_at',),
+        }),
+    )
+}
+
+
+def create_table_sql(table: str) -> str:
+    return SCHEMA[table].create_sql()
@@ -0,0 +1,362 @@
+import os
+import time
+import heapq
+import socket
+import hashlib
+import logging
+import secrets
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+import pymysql
+from database import DB_SHARDS, get_shard_connection
+from storage.base import Repository, StorageUnavailable, STREAM_BATCH_SIZE
+from storage.mysql import MySQLRepository
+from storage.schema import TABLE_OPTIONS
+from storage.user_agents import UserAgentDictionary
+
+logger = logging.getLogger(__name__)
+
+# Seconds a process holds its id generator number before renewing it
+SHARD_ID_LEASE_SECONDS = int(os.environ.get('SHARD_ID_LEASE_SECONDS', '300'))
+# Threads running the per-shard queries of a read, shared by every request of this worker
+SHARD_QUERY_THREADS = int(os.environ.get('SHARD_QUERY_THREADS', str(4 * max(len(DB_SHARDS), 1))))
+
+# Ids are 38 bits of 10 ms ticks since ID_EPOCH, then 7 bits of generator and
+# 8 of sequence: 53 bits in all, so the dashboard's JavaScript reads them exactly
+ID_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+TICKS_PER_SECOND = 100
+GENERATOR_BITS = 7
+SEQUENCE_BITS = 8
+GENERATORS = 1 << GENERATOR_BITS
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+TICK_SHIFT = GENERATOR_BITS + SEQUENCE_BITS
+# A minute of ids; exports cut id ranges from per-minute row counts
+ID_BUCKET_WIDTH = (60 * TICKS_PER_SECOND) << TICK_SHIFT
+
+# Leases of generator numbers, kept on the first shard
+ID_GENERATORS_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS id_generators (
+        generator SMALLINT NOT NULL PRIMARY KEY,
+        owner VARCHAR(255) NULL,
+        leased_until DATETIME(6) NULL
+    ) {TABLE_OPTIONS}
+"""
+
+_query_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_query_pool() -> ThreadPoolExecutor:
+    global _query_pool
+    with _pool_lock:
+        if _query_pool is None:
+            _query_pool = ThreadPoolExecutor(max_workers=SHARD_QUERY_THREADS, thread_name_prefix='shard-query')
+        return _query_pool
+
+
+class IdGenerator:
+    """Globally unique ids that increase with time, without a round trip per id
+
+    Each process leases one of the GENERATORS numbers from the
+    ``id_generators`` table and puts it in every id it makes, so processes
+    never produce the same id; the sequence tells apart the ids of one
+    tick. The lease is renewed on use once half of it has passed, and ids
+    are refused rather than risk a duplicate once it has run out.
+
+    Ids of different processes are ordered by the time they were made, up
+    to the clock difference between the hosts.
+    """
+
+    def __init__(self, connect: Callable[[], ContextManager[pymysql.Connection]],
+                 lease_seconds: int = SHARD_ID_LEASE_SECONDS):
+        self.connect = connect
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        # A forked process starts without its parent's lease
+        self._pid = os.getpid()
+        self._owner = f"{socket.gethostname()}:{self._pid}:{secrets.token_hex(4)}"
+        self._generator: Optional[int] = None
+        self._renew_at = 0.0
+        self._expires_at = 0.0
+        self._last_tick = 0
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            now = time.monotonic()
+            if now >= self._renew_at:
+                self._lease(now)
+
+            tick = int((time.time() - ID_EPOCH) * TICKS_PER_SECOND)
+            if tick > self._last_tick:
+                self._last_tick, self._sequence = tick, 0
+            else:
+                # Same tick, or the clock went back: count on from the last id
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_tick, self._sequence = self._last_tick + 1, 0
+            return (self._last_tick << TICK_SHIFT) | (self._generator << SEQUENCE_BITS) | self._sequence
+
+    def _lease(self, now: float) -> None:
+        # Caller holds the lock; deadlines count from before the request, so they err early
+        try:
+            with self.connect() as connection:
+                cursor = connection.cursor()
+                generator = self._claim(cursor)
+                connection.commit()
+        except Exception as e:
+            if self._generator is not None and now < self._expires_at:
+                logger.warning(f"Could not renew id generator {self._generator}, "
+                               f"{self._expires_at - now:.0f}s of lease left: {e}")
+                self._renew_at = min(now + 5, self._expires_at)
+                return
+            raise StorageUnavailable(f"No id generator leased: {e}") from e
+
+        if generator != self._generator:
+            logger.info(f"Leased id generator {generator} as {self._owner}")
+        self._generator = generator
+        self._renew_at = now + self.lease_seconds / 2
+        self._expires_at = now + self.lease_seconds - 1
+
+    def _claim(self, cursor) -> int:
+        """Renew this process's generator number, or take a free or expired one"""
+        cursor.execute(ID_GENERATORS_TABLE_SQL)
+        cursor.execute(
+            f"INSERT IGNORE INTO id_generators (generator) VALUES {', '.join(['(%s)'] * GENERATORS)}",
+            tuple(range(GENERATORS))
+        )
+        cursor.execute("SELECT generator FROM id_generators WHERE owner IS NULL OR leased_until < NOW(6)")
+        candidates = [row[0] for row in cursor.fetchall()]
+        if self._generator is not None:
+            candidates.insert(0, self._generator)
+
+        for generator in candidates:
+            # Conditional, so two processes can't both take the same number
+            cursor.execute(
+                "UPDATE id_generators SET owner = %s, leased_until = NOW(6) + INTERVAL %s SECOND "
+                "WHERE generator = %s AND (owner = %s OR owner IS NULL OR leased_until < NOW(6))",
+                (self._owner, self.lease_seconds, generator, self._owner)
+            )
+            if cursor.rowcount:
+                return generator
+        raise StorageUnavailable(f"All {GENERATORS} id generators are leased", retry_after=self.lease_seconds)
+
+    def release(self) -> None:
+        """Give the generator number back, so a restarted process needn't wait for it to expire"""
+        with self._lock:
+            if self._generator is None or self._pid != os.getpid():
+                return
+            try:
+                with self.connect() as connection:
+                    cursor = connection.cursor()
+                    cursor.execute(
+                        "UPDATE id_generators SET owner = NULL, leased_until = NULL WHERE generator = %s AND owner = %s",
+                        (self._generator, self._owner)
+                    )
+                    connection.commit()
+            except Exception as e:
+                logger.warning(f"Could not release id generator {self._generator}: {e}")
+            self._generator = None
+            self._renew_at = 0.0
+
+
+class ShardRepository(MySQLRepository):
+    """A table on one shard, whose rows arrive with their id already generated"""
+
+    assigned_columns = ('id',)
+
+    def __init__(self, table: str, shard: str):
+        # Each database numbers its own user_agents rows
+        super().__init__(table, connect=partial(get_shard_connection, shard), user_agents=UserAgentDictionary())
+        self.shard = shard
+
+    def verify(self) -> None:
+        tables = (self.table, 'user_agents', 'submission_receipts')
+        with self.connect() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT table_name FROM information_schema.tables "
+                f"WHERE table_schema = DATABASE() AND table_name IN ({', '.join(['%s'] * len(tables))})",
+                tables
+            )
+            missing = set(tables) - {row[0] for row in cursor.fetchall()}
+        if missing:
+            raise Exception(f"Shard {self.shard} has no table {', '.join(sorted(missing))}. "
+                            "Run 'python migrate.py' against it first.")
+
+
+class ShardedRepository(Repository):
+    """A table spread over several databases by a hash of one column
+
+    Each row is stored on the shard picked by its ``shard_key`` (the email
+    for registrations) under an id from ``ids``, so a resubmission and its
+    receipt land on the same shard. Reads run on every shard at once and
+    merge the results: pages by ``submitted_at``, streams and export ranges
+    by id, counts by adding them up.
+    """
+
+    def __init__(self, table: str, shards: Sequence[Repository], ids: IdGenerator, shard_key: str = 'email'):
+        super().__init__(table)
+        self.shards = list(shards)
+        self.ids = ids
+        self.shard_key = shard_key
+        self.unavailable_errors = tuple(dict.fromkeys(
+            error for shard in self.shards for error in shard.unavailable_errors
+        ))
+
+    def shard_index(self, values: Dict[str, Any]) -> int:
+        """Position in ``shards`` of the shard a row belongs on"""
+        # A stable hash: Python's hash() of a str differs between processes
+        key = (values.get(self.shard_key) or '').strip().lower().encode('utf-8')
+        return int.from_bytes(hashlib.sha1(key).digest()[:8], 'big') % len(self.shards)
+
+    def shard_for(self, values: Dict[str, Any]) -> Repository:
+        return self.shards[self.shard_index(values)]
+
+    def _scatter(self, call: Callable[[Any], Any], items: Optional[Sequence[Any]] = None) -> List[Any]:
+        """``call`` on every shard (or item) in parallel, results in the same order"""
+        items = self.shards if items is None else items
+        if len(items) == 1:
+            return [call(items[0])]
+        pool = _get_query_pool()
+        futures = [pool.submit(call, item) for item in items]
+        return [future.result() for future in futures]
+
+    def verify(self) -> None:
+        self._scatter(lambda shard: shard.verify())
+
+    def insert(self, values: Dict[str, Any], submission_id: Optional[str] = None) -> tuple:
+        values = dict(values, id=self.ids.next_id())
+        return self.shard_for(values).insert(values, submission_id)
+
+    def insert_once(self, values: Dict[str, Any], submission_id: str, submitted_at: datetime) -> bool:
+        values = dict(values, id=self.ids.next_id())
+        return self.shard_for(values).insert_once(values, submission_id, submitted_at)
+
+    def prune_receipts(self, before: datetime) -> int:
+        return sum(self._scatter(lambda shard: shard.prune_receipts(before)))
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> int:
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(self.shard_index(row), []).append(dict(row, id=self.ids.next_id()))
+        # One transaction per shard: if one fails, the other shards' rows stay stored
+        return sum(self._scatter(lambda group: self.shards[group[0]].insert_many(group[1]), list(groups.items())))
+
+    def count(self) -> int:
+        return sum(self._scatter(lambda shard: shard.count()))
+
+    def last_id(self) -> int:
+        return max(self._scatter(lambda shard: shard.last_id()))
+
+    def fetch_page(self, limit: int, offset: int, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None,
+                   columns: Optional[Sequence[str]] = None) -> Tuple[List[tuple], int]:
+        columns = tuple(columns or self.columns)
+        # Rows are merged on (submitted_at, id), which are read even when not requested
+        fetched = columns + tuple(c for c in ('submitted_at', 'id') if c not in columns)
+        order = itemgetter(fetched.index('submitted_at'), fetched.index('id'))
+
+        # The page is among the first offset + limit rows of some shard, so
+        # every shard reads that many: deep pages cost more as shards are added
+        results = self._scatter(lambda shard: shard.fetch_page(offset + limit, 0, since, until, fetched))
+        merged = heapq.merge(*(rows for rows, _ in results), key=order, reverse=True)
+        page = [row[:len(columns)] for row in islice(merged, offset, offset + limit)]
+        return page, sum(total for _, total in results)
+
+    def id_bounds(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Tuple[int, int]:
+        bounds = [bound for bound in self._scatter(lambda shard: shard.id_bounds(since, until)) if bound[1]]
+        if not bounds:
+            return 0, 0
+        return min(low for low, _ in bounds), max(high for _, high in bounds)
+
+    def id_ranges(self, size: int, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None) -> Iterator[Tuple[int, int]]:
+        """Id ranges of about ``size`` rows, cut from every shard's rows per minute of ids
+
+        Generated ids skip whatever the other processes and shards used, so
+        their bounds can't be split evenly. A minute is never split: a range
+        holds more than ``size`` rows only when a single minute did.
+        """
+        counts: Counter = Counter()
+        for histogram in self._scatter(lambda shard: shard.count_by_id_bucket(ID_BUCKET_WIDTH, since, until)):
+            counts.update(dict(histogram))
+
+        top = None
+        rows = 0
+        for bucket in sorted(counts, reverse=True):
+            if top is None:
+                top = (bucket + 1) * ID_BUCKET_WIDTH
+            rows += counts[bucket]
+            if rows >= size:
+                yield bucket * ID_BUCKET_WIDTH, top
+                top, rows = None, 0
+        if top is not None:
+            yield bucket * ID_BUCKET_WIDTH, top
+
+    def fetch_id_range(self, low: int, high: int, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None,
+                       columns: Optional[Sequence[str]] = None) -> List[tuple]:
+        columns = tuple(columns or self.columns)
+        fetched = columns if 'id' in columns else columns + ('id',)
+        results = self._scatter(lambda shard: shard.fetch_id_range(low, high, since, until, fetched))
+        merged = heapq.merge(*results, key=itemgetter(fetched.index('id')), reverse=True)
+        return [row[:len(columns)] for row in merged]
+
+    def count_by_period(self, period: str, since: datetime, max_id: int,
+                        group_by: Optional[str] = None) -> List[Tuple[datetime, Any, int]]:
+        counts: Counter = Counter()
+        for rows in self._scatter(lambda shard: shard.count_by_period(period, since, max_id, group_by)):
+            for start, group, count in rows:
+                counts[start, group] += count
+        return [(start, group, count) for (start, group), count in counts.items()]
+
+    def count_by_location(self, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> List[Tuple[Optional[str], Optional[str], int]]:
+        counts: Counter = Counter()
+        for rows in self._scatter(lambda shard: shard.count_by_location(since, until)):
+            for country, region, count in rows:
+                counts[country, region] += count
+        return [(country, region, count) for (country, region), count in counts.items()]
+
+    def set_locations(self, locations: Sequence[Tuple[int, Optional[str], Optional[str]]]) -> int:
+        # An id doesn't tell which shard holds the row; only that shard matches the update
+        return sum(self._scatter(lambda shard: shard.set_locations(locations)))
+
+    def iter_rows(self, since_id: int = 0, columns: Optional[Sequence[str]] = None,
+                  batch_size: int = STREAM_BATCH_SIZE) -> Iterator[List[tuple]]:
+        columns = tuple(columns or self.columns)
+        # Each shard streams in id order over its own connection; id is read first to merge on
+        streams = [shard.iter_rows(since_id, ('id',) + columns, batch_size) for shard in self.shards]
+        merged = heapq.merge(*(chain.from_iterable(stream) for stream in streams), key=itemgetter(0))
+        try:
+            while True:
+                rows = [row[1:] for row in islice(merged, batch_size)]
+                if not rows:
+                    return
+                yield rows
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def close(self) -> None:
+        self.ids.release()
+
+
+def sharded_repository(table: str, shards: Sequence[str] = DB_SHARDS) -> ShardedRepository:
+    """``table`` spread over ``shards``, the first of which also holds the id generator leases"""
+    return ShardedRepository(
+        table, [ShardRepository(table, shard) for shard in shards],
+        IdGenerator(partial(get_shard_connection, shards[0]))
+    )
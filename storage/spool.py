@@ -0,0 +1,391 @@
+import os
+import json
+import time
+import uuid
+import zlib
+import struct
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from storage import STORAGE_BACKEND, get_repository
+from storage.base import TABLE_COLUMNS
+from storage.cache import shared_cache
+from storage.receipts import RECEIPT_RETENTION_DAYS
+from utils.geoip import geoip
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows; a single development process owns the spool
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# The spool protects against a remote database; local backends don't need it
+SPOOL_ENABLED = os.environ.get(
+    'SPOOL_ENABLED', 'true' if STORAGE_BACKEND == 'mysql' else 'false'
+).lower() == 'true'
+SPOOL_DIR = os.environ.get('SPOOL_DIR', 'instance/spool')
+SPOOL_SEGMENT_BYTES = int(os.environ.get('SPOOL_SEGMENT_BYTES', str(4 * 1024 * 1024)))
+# Seconds a direct insert may take before the submission is spooled instead
+SPOOL_LATENCY_BUDGET = float(os.environ.get('SPOOL_LATENCY_BUDGET', '2'))
+# Seconds between attempts to drain the spool into the database
+SPOOL_REPLAY_INTERVAL = float(os.environ.get('SPOOL_REPLAY_INTERVAL', '5'))
+
+# Each record is its payload length and CRC-32, followed by the JSON payload
+RECORD_HEADER = struct.Struct('>II')
+SEGMENT_SUFFIX = '.seg'
+CHECKPOINT_FILE = 'checkpoint'
+REJECTED_FILE = 'rejected.jsonl'
+
+# Seconds between deletions of expired submission receipts
+RECEIPT_PRUNE_INTERVAL = 3600
+
+
+class SpoolCorruption(Exception):
+    """A record in a spool segment failed its CRC check"""
+
+
+class SpooledSubmission(NamedTuple):
+    submission_id: str
+    submitted_at: datetime
+
+
+class Spool:
+    """Append-only, crash-safe log of submissions waiting for the database
+
+    Each worker claims a slot directory (``slot-N``) with an exclusive file
+    lock, so a restarted worker adopts the segments its predecessor left.
+    Records are framed with a length and CRC-32 and a torn write at the end
+    of a segment is ignored. ``append`` returns once the record is fsynced;
+    appends from concurrent threads share a single fsync.
+    """
+
+    def __init__(self, directory: str = SPOOL_DIR, segment_bytes: int = SPOOL_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._lock_file = None
+        self._file = None
+        self._segment = 0
+        self._size = 0
+        self._durable_size = 0
+        self._appended = 0
+        self._durable = 0
+        self._depth = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    @property
+    def depth(self) -> int:
+        """Submissions accepted but not yet stored in the database"""
+        return self._depth
+
+    def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self.path, self._lock_file = self._claim_slot()
+
+        segments = self._segments()
+        checkpoint = self._read_checkpoint()
+        self._depth = sum(self._count_records(number, checkpoint) for number in segments)
+        # Never append after a possibly torn tail: always start a new segment
+        self._start_segment(segments[-1] + 1 if segments else 1)
+
+        logger.info(f'Spool ready at {self.path} ({self._depth} pending submissions)')
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Durably add a record to the spool"""
+        payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+        data = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            if self._size >= self.segment_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._size += len(data)
+            self._appended += 1
+            ticket = self._appended
+
+        # Group commit: whichever thread gets here first syncs every record
+        # written so far, and the others find theirs already durable
+        with self._lock:
+            if self._durable < ticket:
+                self._sync()
+
+    def replay(self, apply: Callable[[Dict[str, Any]], None]) -> int:
+        """Pass pending records to ``apply`` in order, returning how many were applied
+
+        Stops at the first record ``apply`` raises for; it is retried on the
+        next call. Fully applied segments are deleted.
+        """
+        with self._replay_lock:
+            checkpoint_segment, checkpoint_offset = self._read_checkpoint()
+            applied = 0
+
+            for number in self._segments():
+                if number < checkpoint_segment:
+                    os.remove(self._segment_path(number))
+                    continue
+
+                with self._lock:
+                    active = number == self._segment
+                    end = self._durable_size if active else None
+
+                position = checkpoint_offset if number == checkpoint_segment else 0
+                try:
+                    for next_position, record in self._iter_records(number, position, end):
+                        apply(record)
+                        position = next_position
+                        applied += 1
+                        with self._lock:
+                            self._depth -= 1
+                except SpoolCorruption as e:
+                    self._quarantine(number, e)
+                    continue
+                finally:
+                    self._write_checkpoint(number, position)
+
+                if active:
+                    break
+                os.remove(self._segment_path(number))
+
+            return applied
+
+    def reject(self, record: Dict[str, Any], reason: str) -> None:
+        """Set aside a record the database refuses, so it cannot block the spool"""
+        with open(os.path.join(self.path, REJECTED_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'reason': reason, 'record': record}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _claim_slot(self) -> Tuple[str, Any]:
+        slot = 0
+        while True:
+            path = os.path.join(self.directory, f'slot-{slot}')
+            os.makedirs(path, exist_ok=True)
+            lock_file = open(os.path.join(path, 'lock'), 'a')
+            if fcntl is None:
+                return path, lock_file
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return path, lock_file
+            except OSError:
+                # Held by another live worker
+                lock_file.close()
+                slot += 1
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.path, f'{number:010d}{SEGMENT_SUFFIX}')
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.path)
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+        )
+
+    def _start_segment(self, number: int) -> None:
+        self._file = open(self._segment_path(number), 'ab')
+        self._segment = number
+        self._size = 0
+        self._durable_size = 0
+
+    def _sync(self) -> None:
+        # Caller holds the lock; records only count as pending once durable
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._depth += self._appended - self._durable
+        self._durable = self._appended
+        self._durable_size = self._size
+
+    def _rotate(self) -> None:
+        # Caller holds the lock
+        self._sync()
+        self._file.close()
+        self._start_segment(self._segment + 1)
+
+    def _iter_records(self, number: int, start: int,
+                      end: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (offset after the record, record) from ``start`` up to ``end``"""
+        path = self._segment_path(number)
+        with open(path, 'rb') as f:
+            f.seek(start)
+            position = start
+            while end is None or position < end:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    # Torn write at the tail of a segment left by a crash
+                    return
+                if zlib.crc32(payload) != crc:
+                    raise SpoolCorruption(f'CRC mismatch in {path} at offset {position}')
+                position += RECORD_HEADER.size + length
+                yield position, json.loads(payload)
+
+    def _count_records(self, number: int, checkpoint: Tuple[int, int]) -> int:
+        checkpoint_segment, checkpoint_offset = checkpoint
+        if number < checkpoint_segment:
+            return 0
+        count = 0
+        try:
+            for _ in self._iter_records(number, checkpoint_offset if number == checkpoint_segment else 0):
+                count += 1
+        except SpoolCorruption as e:
+            logger.error(f'Spool segment is corrupt: {e}')
+        return count
+
+    def _quarantine(self, number: int, error: SpoolCorruption) -> None:
+        path = self._segment_path(number)
+        with self._lock:
+            if number == self._segment:
+                # Keep appending to a fresh segment, not the one being moved
+                self._rotate()
+        os.replace(path, path + '.corrupt')
+        logger.error(f'Moved corrupt spool segment aside for manual recovery: {error}')
+        with self._lock:
+            checkpoint = self._read_checkpoint()
+            self._depth = sum(self._count_records(n, checkpoint) for n in self._segments())
+
+    def _read_checkpoint(self) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.path, CHECKPOINT_FILE), encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            return checkpoint['segment'], checkpoint['offset']
+        except (OSError, ValueError, KeyError):
+            return 0, 0
+
+    def _write_checkpoint(self, segment: int, offset: int) -> None:
+        # Not fsynced: replaying a record twice is harmless thanks to receipts
+        path = os.path.join(self.path, CHECKPOINT_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'segment': segment, 'offset': offset}, f)
+        os.replace(path + '.tmp', path)
+
+
+def apply_spooled(record: Dict[str, Any]) -> None:
+    """Store a spooled submission, at most once"""
+    repository = get_repository(record['table'])
+    try:
+        values = geoip.with_location(record['values'])
+        if repository.insert_once(values, record['submission_id'], datetime.fromisoformat(record['submitted_at'])):
+            shared_cache.invalidate(record['table'])
+    except repository.unavailable_errors:
+        raise
+    except Exception as e:
+        logger.error(f"Rejected spooled {record['table']} submission {record['submission_id']}: {e}")
+        spool.reject(record, str(e))
+
+
+class SpoolReplayer(threading.Thread):
+    """Background thread draining the spool into the database"""
+
+    def __init__(self, spool: Spool, interval: float = SPOOL_REPLAY_INTERVAL):
+        super().__init__(name='spool-replayer', daemon=True)
+        self.spool = spool
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._last_prune = 0.0
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.drain()
+            if time.monotonic() - self._last_prune > RECEIPT_PRUNE_INTERVAL:
+                self._prune_receipts()
+
+    def drain(self) -> None:
+        while self.spool.depth and not self._stopped.is_set():
+            try:
+                applied = self.spool.replay(apply_spooled)
+            except Exception as e:
+                logger.warning(f'Spool replay paused ({self.spool.depth} pending): {e}')
+                return
+            if not applied:
+                return
+            logger.info(f'Replayed {applied} spooled submissions ({self.spool.depth} pending)')
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join(timeout=self.interval)
+
+    def _prune_receipts(self) -> None:
+        before = datetime.now() - timedelta(days=RECEIPT_RETENTION_DAYS)
+        try:
+            for table in TABLE_COLUMNS:
+                get_repository(table).prune_receipts(before)
+            self._last_prune = time.monotonic()
+        except Exception as e:
+            logger.warning(f'Could not prune submission receipts: {e}')
+
+
+spool = Spool()
+_replayer: Optional[SpoolReplayer] = None
+
+
+def start_spool() -> None:
+    """Open this worker's spool and start replaying it, if the spool is enabled"""
+    global _replayer
+    if not SPOOL_ENABLED or spool.is_open:
+        return
+    spool.open()
+    _replayer = SpoolReplayer(spool)
+    _replayer.start()
+
+
+def stop_spool() -> None:
+    global _replayer
+    if _replayer is not None:
+        _replayer.stop()
+        _replayer = None
+    spool.close()
+
+
+async def store_submission(table: str, create: Callable[..., Any], values: Dict[str, Any]):
+    """Store a validated submission, spooling it when the database is down or slow
+
+    Returns what ``create`` returns, or a :class:`SpooledSubmission` when the
+    submission was written to the spool for the replayer to store later.
+    """
+    if not spool.is_open:
+        return create(**values)
+
+    submission_id = uuid.uuid4().hex
+    loop = asyncio.get_running_loop()
+
+    # While earlier submissions wait in the spool, new ones queue behind them
+    if not spool.depth:
+        # An executor future can be abandoned on timeout; if the insert still
+        # lands, its receipt makes the replayer skip the spooled copy
+        future = loop.run_in_executor(None, partial(create, **values, submission_id=submission_id))
+        try:
+            return await asyncio.wait_for(future, SPOOL_LATENCY_BUDGET)
+        except asyncio.TimeoutError:
+            logger.warning(f'Database over its {SPOOL_LATENCY_BUDGET}s budget, spooling {table} submission')
+        except get_repository(table).unavailable_errors as e:
+            logger.warning(f'Database unavailable, spooling {table} submission: {e}')
+
+    spooled = SpooledSubmission(submission_id, datetime.now())
+    await loop.run_in_executor(None, spool.append, {
+        'submission_id': submission_id,
+        'table': table,
+        'submitted_at': spooled.submitted_at.isoformat(),
+        'values': values,
+    })
+    return spooled
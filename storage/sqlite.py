@@ -0,0 +1,271 @@
+import os
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from storage.base import Repository, StorageUnavailable, STREAM_BATCH_SIZE
+from storage.receipts import SQLITE_SUBMISSION_RECEIPTS_TABLE_SQL
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'instance/feedback.db')
+
+SCHEMA = {
+    'user_registrations': """
+        CREATE TABLE IF NOT EXISTS user_registrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            phone VARCHAR(20) NOT NULL,
+            gender VARCHAR(50),
+            profession VARCHAR(255),
+            user_type VARCHAR(20) NOT NULL,
+            submitted_at DATETIME NOT NULL,
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            country CHAR(2),
+            region VARCHAR(100)
+        )
+    """,
+    'feedback': """
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            visual_design INTEGER,
+            ease_of_navigation INTEGER,
+            mobile_responsiveness INTEGER,
+            overall_satisfaction INTEGER,
+            ease_of_tasks INTEGER,
+            quality_of_services INTEGER,
+            visual_design_issue TEXT,
+            ease_of_navigation_issue TEXT,
+            mobile_responsiveness_issue TEXT,
+            overall_satisfaction_issue TEXT,
+            ease_of_tasks_issue TEXT,
+            quality_of_services_issue TEXT,
+            like_most TEXT,
+            improvements TEXT,
+            features TEXT,
+            legal_challenges TEXT,
+            additional_comments TEXT,
+            contact_willing VARCHAR(10),
+            contact_email VARCHAR(255),
+            submitted_at DATETIME NOT NULL,
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            country CHAR(2),
+            region VARCHAR(100)
+        )
+    """,
+}
+
+# Columns added after the first release, created in older database files by verify()
+ADDED_COLUMNS = {
+    'country': 'CHAR(2)',
+    'region': 'VARCHAR(100)',
+}
+
+_local = threading.local()
+
+
+def get_sqlite_connection() -> sqlite3.Connection:
+    """Get this thread's connection to the SQLite database, opening it on first use"""
+    connection = getattr(_local, 'connection', None)
+    # Connections must not be shared with processes forked after they were opened
+    if connection is None or _local.pid != os.getpid():
+        directory = os.path.dirname(SQLITE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(SQLITE_PATH, timeout=30)
+        # WAL lets readers proceed while a single writer appends
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        _local.connection = connection
+        _local.pid = os.getpid()
+        logger.info(f'Opened SQLite database: {SQLITE_PATH}')
+    return connection
+
+
+class SQLiteRepository(Repository):
+    """Single-file storage for single-node and edge deployments"""
+
+    unavailable_errors = (StorageUnavailable, sqlite3.OperationalError)
+
+    def __init__(self, table: str):
+        super().__init__(table)
+        self._select = f"SELECT {', '.join(self.columns)} FROM {self.table}"
+        self._insert_sql = (
+            f"INSERT INTO {self.table} ({', '.join(self.insert_columns)}, submitted_at) "
+            f"VALUES ({', '.join(['?'] * len(self.insert_columns))}, ?)"
+        )
+
+    def _store_receipt(self, connection: sqlite3.Connection, submission_id: str) -> None:
+        connection.execute(
+            "INSERT INTO submission_receipts (submission_id, table_name, created_at) VALUES (?, ?, ?)",
+            (submission_id, self.table, datetime.now().isoformat(sep=' '))
+        )
+
+    def verify(self) -> None:
+        connection = get_sqlite_connection()
+        connection.execute(SCHEMA[self.table])
+        existing = {row[1] for row in connection.execute(f"PRAGMA table_info({self.table})")}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in existing:
+                connection.execute(f"ALTER TABLE {self.table} ADD COLUMN {column} {definition}")
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{self.table}_submitted_at ON {self.table} (submitted_at)"
+        )
+        connection.execute(SQLITE_SUBMISSION_RECEIPTS_TABLE_SQL)
+        connection.commit()
+
+    def insert(self, values: Dict[str, Any], submission_id: Optional[str] = None) -> tuple:
+        submitted_at = datetime.now()
+        params = tuple(values.get(c) for c in self.insert_columns)
+
+        connection = get_sqlite_connection()
+        with connection:
+            if submission_id:
+                self._store_receipt(connection, submission_id)
+            cursor = connection.execute(self._insert_sql, params + (submitted_at.isoformat(sep=' '),))
+
+        # Every column is known locally, so the row is built without re-reading it
+        stored = dict(zip(self.insert_columns, params), id=cursor.lastrowid, submitted_at=submitted_at)
+        return tuple(stored[c] for c in self.columns)
+
+    def insert_once(self, values: Dict[str, Any], submission_id: str, submitted_at: datetime) -> bool:
+        connection = get_sqlite_connection()
+        with connection:
+            # The receipt goes first: a duplicate means the row is already stored
+            try:
+                self._store_receipt(connection, submission_id)
+            except sqlite3.IntegrityError:
+                return False
+            connection.execute(
+                self._insert_sql,
+                tuple(values.get(c) for c in self.insert_columns) + (submitted_at.isoformat(sep=' '),)
+            )
+        return True
+
+    def prune_receipts(self, before: datetime) -> int:
+        connection = get_sqlite_connection()
+        with connection:
+            cursor = connection.execute(
+                "DELETE FROM submission_receipts WHERE table_name = ? AND created_at < ?",
+                (self.table, before.isoformat(sep=' '))
+            )
+        return cursor.rowcount
+
+    def insert_many(self, rows: List[Dict[str, Any]]) -> int:
+        submitted_at = datetime.now().isoformat(sep=' ')
+        connection = get_sqlite_connection()
+        with connection:
+            connection.executemany(
+                self._insert_sql,
+                [
+                    tuple(row.get(c) for c in self.insert_columns)
+                    + (row['submitted_at'].isoformat(sep=' ') if row.get('submitted_at') else submitted_at,)
+                    for row in rows
+                ]
+            )
+        return len(rows)
+
+    def count(self) -> int:
+        return get_sqlite_connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def last_id(self) -> int:
+        return get_sqlite_connection().execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.table}").fetchone()[0]
+
+    def fetch_page(self, limit: int, offset: int, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None,
+                   columns: Optional[Sequence[str]] = None) -> Tuple[List[tuple], int]:
+        where, params = self.date_filter(since, until, placeholder='?')
+        params = tuple(value.isoformat(sep=' ') for value in params)
+        columns = tuple(columns or self.columns)
+        select = self._select if columns == self.columns else f"SELECT {', '.join(columns)} FROM {self.table}"
+        submitted_at_index = columns.index('submitted_at') if 'submitted_at' in columns else None
+
+        connection = get_sqlite_connection()
+        total = connection.execute(f"SELECT COUNT(*) FROM {self.table} {where}", params).fetchone()[0]
+        rows = connection.execute(
+            f"{select} {where} ORDER BY submitted_at DESC LIMIT ? OFFSET ?", params + (limit, offset)
+        ).fetchall()
+        return [self._decode(row, submitted_at_index) for row in rows], total
+
+    def id_bounds(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Tuple[int, int]:
+        where, params = self.date_filter(since, until, placeholder='?')
+        params = tuple(value.isoformat(sep=' ') for value in params)
+        return tuple(get_sqlite_connection().execute(
+            f"SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM {self.table} {where}", params
+        ).fetchone())
+
+    def fetch_id_range(self, low: int, high: int, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None,
+                       columns: Optional[Sequence[str]] = None) -> List[tuple]:
+        where, params = self.date_filter(since, until, placeholder='?')
+        params = tuple(value.isoformat(sep=' ') for value in params)
+        where = where.replace('WHERE', 'AND')
+        columns = tuple(columns or self.columns)
+        submitted_at_index = columns.index('submitted_at') if 'submitted_at' in columns else None
+
+        # Threads each use their own connection, and WAL lets them read concurrently
+        rows = get_sqlite_connection().execute(
+            f"SELECT {', '.join(columns)} FROM {self.table} WHERE id >= ? AND id < ? {where} ORDER BY id DESC",
+            (low, high) + params
+        ).fetchall()
+        return [self._decode(row, submitted_at_index) for row in rows]
+
+    def count_by_period(self, period: str, since: datetime, max_id: int,
+                        group_by: Optional[str] = None) -> List[Tuple[datetime, Any, int]]:
+        period_format = '%Y-%m-%d %H:%M:00' if period == 'minute' else '%Y-%m-%d %H:00:00'
+        rows = get_sqlite_connection().execute(
+            f"SELECT strftime('{period_format}', submitted_at) AS period, {group_by or 'NULL'} AS grp, COUNT(*) "
+            f"FROM {self.table} WHERE submitted_at >= ? AND id <= ? GROUP BY period, grp",
+            (since.isoformat(sep=' '), max_id)
+        ).fetchall()
+        return [(datetime.fromisoformat(start), group, count) for start, group, count in rows]
+
+    def count_by_location(self, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> List[Tuple[Optional[str], Optional[str], int]]:
+        where, params = self.date_filter(since, until, placeholder='?')
+        params = tuple(value.isoformat(sep=' ') for value in params)
+        return get_sqlite_connection().execute(
+            f"SELECT country, region, COUNT(*) FROM {self.table} {where} GROUP BY country, region", params
+        ).fetchall()
+
+    def set_locations(self, locations: Sequence[Tuple[int, Optional[str], Optional[str]]]) -> int:
+        connection = get_sqlite_connection()
+        with connection:
+            cursor = connection.executemany(
+                f"UPDATE {self.table} SET country = ?, region = ? WHERE id = ?",
+                [(country, region, row_id) for row_id, country, region in locations]
+            )
+        return cursor.rowcount
+
+    def iter_rows(self, since_id: int = 0, columns: Optional[Sequence[str]] = None,
+                  batch_size: int = STREAM_BATCH_SIZE) -> Iterator[List[tuple]]:
+        columns = tuple(columns or self.columns)
+        submitted_at_index = columns.index('submitted_at') if 'submitted_at' in columns else None
+        # id is read first to track the position whatever the projection
+        query = f"SELECT id, {', '.join(columns)} FROM {self.table} WHERE id > ? ORDER BY id LIMIT ?"
+
+        # Each batch is a short keyset query, so no cursor stays open between
+        # batches and the generator may be resumed from any thread
+        last_id = since_id
+        while True:
+            rows = get_sqlite_connection().execute(query, (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [self._decode(row[1:], submitted_at_index) for row in rows]
+
+    @staticmethod
+    def _decode(row: tuple, submitted_at_index: Optional[int]) -> tuple:
+        """Convert the stored ``submitted_at`` text back into a datetime"""
+        if submitted_at_index is None:
+            return row
+        submitted_at = row[submitted_at_index]
+        if isinstance(submitted_at, str):
+            row = list(row)
+            row[submitted_at_index] = datetime.fromisoformat(submitted_at)
+            row = tuple(row)
+        return row
@@ -0,0 +1,67 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+from storage.schema import create_table_sql
+
+# Distinct user agent strings remembered per process
+USER_AGENT_CACHE_SIZE = int(os.environ.get('USER_AGENT_CACHE_SIZE', '2048'))
+
+USER_AGENTS_TABLE_SQL = create_table_sql('user_agents')
+
+
+def user_agent_hash(user_agent: str) -> bytes:
+    return hashlib.sha1(user_agent.encode('utf-8')).digest()
+
+
+class UserAgentDictionary:
+    """Interns user agent strings into the ``user_agents`` lookup table
+
+    Rows reference a user agent by id; an LRU of string -> id keeps the
+    insert path free of lookups for the few hundred browsers seen in practice.
+    """
+
+    def __init__(self, max_size: int = USER_AGENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._cache: 'OrderedDict[str, int]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, user_agent: str) -> Optional[int]:
+        """Return the cached id for a user agent, if known"""
+        with self._lock:
+            user_agent_id = self._cache.get(user_agent)
+            if user_agent_id is not None:
+                self._cache.move_to_end(user_agent)
+            return user_agent_id
+
+    def remember(self, user_agent: str, user_agent_id: int) -> None:
+        """Cache an id once the transaction that created it has committed"""
+        with self._lock:
+            self._cache[user_agent] = user_agent_id
+            self._cache.move_to_end(user_agent)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def resolve(self, cursor, user_agent: str) -> int:
+        """Find or create the id of a user agent using the caller's transaction"""
+        ua_hash = user_agent_hash(user_agent)
+        cursor.execute("SELECT id FROM user_agents WHERE ua_hash = %s", (ua_hash,))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+
+        # LAST_INSERT_ID(id) returns the existing id if another writer won the race
+        cursor.execute(
+            "INSERT INTO user_agents (ua_hash, user_agent) VALUES (%s, %s) "
+            "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
+            (ua_hash, user_agent)
+        )
+        return cursor.lastrowid
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+user_agent_dictionary = UserAgentDictionary()
@@ -0,0 +1,110 @@
+import io
+import csv
+import logging
+import zipfile
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+
+def _clean_row(row: Dict[Any, Any]) -> Dict[str, Any]:
+    """Normalize a spreadsheet row: text cells, blanks as missing values"""
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        if value is not None:
+            value = str(value).strip()
+        cleaned[str(key).strip()] = value or None
+    return cleaned
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield rows of a CSV file with a header line, one at a time"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        for row in csv.DictReader(text):
+            yield _clean_row(row)
+    finally:
+        # Don't let the wrapper close the underlying upload
+        text.detach()
+
+
+def iter_xlsx_rows(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield rows of the first worksheet of an XLSX file, one at a time"""
+    # Imported lazily so openpyxl is only loaded when a workbook is imported
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except zipfile.BadZipFile:
+        raise ValueError("Uploaded file is not a valid XLSX workbook")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            yield _clean_row(dict(zip(header, values)))
+    finally:
+        workbook.close()
+
+
+def iter_upload_rows(filename: str, stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield rows of an uploaded CSV or XLSX file based on its extension"""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return iter_csv_rows(stream)
+    if name.endswith('.xlsx'):
+        return iter_xlsx_rows(stream)
+    raise ValueError(f"Unsupported file type, expected one of: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most ``size`` items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def registration_values(user_data) -> Dict[str, Any]:
+    """Normalize validated registration data into model values"""
+    return {
+        'name': user_data.name.strip(),
+        'email': user_data.email,
+        'phone': user_data.phone.strip(),
+        'gender': user_data.gender.strip() if user_data.gender else None,
+        'profession': user_data.profession.strip() if user_data.profession else None,
+        'user_type': user_data.user_type.value,
+    }
+
+
+def validate_registrations(rows: List[Tuple[int, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[int, List[str]]]]:
+    """Validate numbered registration rows, returning model values and (row, messages) errors
+
+    Runs in the CPU pool (see utils/executor.py), so it only takes and
+    returns plain data.
+    """
+    from pydantic import ValidationError
+    from schemas import UserRegistrationCreate
+
+    valid = []
+    errors = []
+    for row_number, row in rows:
+        try:
+            user_data = UserRegistrationCreate.model_validate(row)
+        except ValidationError as e:
+            errors.append((row_number, [
+                f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()
+            ]))
+            continue
+        valid.append(registration_values(user_data))
+    return valid, errors
@@ -0,0 +1,316 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Gunicorn workers on this host, each of which starts its own pool
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+# Processes running CPU-bound tasks; 0 runs them in threads instead, e.g.
+# where the platform doesn't allow starting processes. By default the
+# workers share the cores rather than each starting a process per core
+CPU_POOL_PROCESSES = int(os.environ.get(
+    'CPU_POOL_PROCESSES', str(max((os.cpu_count() or 1) // max(WEB_CONCURRENCY, 1), 1))
+))
+# Tasks allowed to wait for a free process before requests are turned away
+CPU_POOL_MAX_QUEUE = int(os.environ.get('CPU_POOL_MAX_QUEUE', '32'))
+# Seconds a task may take, waiting included, before its caller gives up on it
+CPU_TASK_TIMEOUT = float(os.environ.get('CPU_TASK_TIMEOUT', '60'))
+# Seconds between checks for a client that went away while its task runs
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class CPUTaskError(Exception):
+    """A task was not run to completion for its caller"""
+
+    status_code = 500
+    error = "Internal server error"
+    retry_after: Optional[float] = None
+
+
+class ExecutorSaturated(CPUTaskError):
+    """Every process is busy and the queue is full"""
+
+    status_code = 503
+    error = "Service temporarily unavailable"
+    retry_after = 1
+
+
+class TaskTimeout(CPUTaskError):
+    status_code = 504
+    error = "Request took too long"
+
+
+class TaskCancelled(CPUTaskError):
+    """The client disconnected before the task finished"""
+
+    # nginx's code for a request the client closed; nobody receives it
+    status_code = 499
+    error = "Client closed request"
+
+
+def _timed_call(fn: Callable[..., Any], args: tuple) -> Tuple[Any, float]:
+    """Run a task in a pool process, returning its result and run time"""
+    started = time.perf_counter()
+    return fn(*args), time.perf_counter() - started
+
+
+class TaskStats:
+    """Counters for one kind of task"""
+
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.run_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_run_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'cancelled': self.cancelled,
+            'avg_run_ms': round(self.run_seconds / self.completed * 1000, 1) if self.completed else None,
+            'max_run_ms': round(self.max_run_seconds * 1000, 1),
+            'avg_wait_ms': round(self.wait_seconds / self.completed * 1000, 1) if self.completed else None,
+        }
+
+
+class CPUExecutor:
+    """Bounded process pool shared by the CPU-heavy work of a worker
+
+    Excel and export serialization, analytics and bulk validation run here
+    so the event loop, and the GIL, stay free for other requests. At most
+    ``processes`` tasks run at once and ``max_queue`` more may wait; beyond
+    that :meth:`run` refuses new tasks and :meth:`submit` blocks.
+
+    A task that times out or whose client disconnects is cancelled if it
+    has not started. One already running finishes in its process, but
+    nobody waits for it; long jobs are split into tasks (see
+    :mod:`utils.export`) so they stop within one task of being abandoned.
+    """
+
+    def __init__(self, processes: int = CPU_POOL_PROCESSES, max_queue: int = CPU_POOL_MAX_QUEUE):
+        self.processes = processes
+        self.max_queue = max_queue
+        self._pool = None
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(self.workers + max_queue)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.rejected = 0
+        self.abandoned = 0
+        self.restarts = 0
+        self.tasks: Dict[str, TaskStats] = {}
+
+    @property
+    def workers(self) -> int:
+        return self.processes or os.cpu_count() or 1
+
+    @property
+    def queue_depth(self) -> int:
+        """Tasks waiting for a free process"""
+        return max(self.in_flight - self.workers, 0)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.processes:
+                    # spawn: forking a worker that runs threads could copy a held lock
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.processes, mp_context=multiprocessing.get_context('spawn')
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cpu-task')
+            return self._pool
+
+    def _stats(self, name: str) -> TaskStats:
+        # Caller holds the lock
+        if name not in self.tasks:
+            self.tasks[name] = TaskStats()
+        return self.tasks[name]
+
+    def submit(self, fn: Callable[..., Any], *args, block: bool = True) -> Future:
+        """Queue ``fn(*args)`` and return a future of its result
+
+        ``fn`` and its arguments must be picklable. Waits for room in the
+        queue, or raises :class:`ExecutorSaturated` without ``block``.
+        """
+        if not self._slots.acquire(blocking=block):
+            self.rejected += 1
+            raise ExecutorSaturated(f"CPU pool is full ({self.in_flight} tasks)")
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        name = getattr(fn, '__qualname__', repr(fn))
+        submitted = time.perf_counter()
+        try:
+            try:
+                inner = self._get_pool().submit(_timed_call, fn, args)
+            except BrokenProcessPool:
+                self._restart()
+                inner = self._get_pool().submit(_timed_call, fn, args)
+        except Exception:
+            self._finished()
+            raise
+
+        # Callers get the plain result; the run time only feeds the stats
+        outer: Future = Future()
+        outer.task_name = name
+        outer.inner = inner
+
+        def done(inner_future: Future) -> None:
+            self._finished()
+            if inner_future.cancelled():
+                # Given up on before it started; counted by _give_up
+                outer.cancel()
+                return
+            error = inner_future.exception()
+            with self._lock:
+                stats = self._stats(name)
+                if error is not None:
+                    stats.failed += 1
+                else:
+                    result, run_seconds = inner_future.result()
+                    stats.completed += 1
+                    stats.run_seconds += run_seconds
+                    stats.max_run_seconds = max(stats.max_run_seconds, run_seconds)
+                    stats.wait_seconds += max(time.perf_counter() - submitted - run_seconds, 0)
+            if isinstance(error, BrokenProcessPool):
+                self._restart()
+            if not outer.set_running_or_notify_cancel():
+                # Its caller timed out or went away while it ran
+                self.abandoned += 1
+            elif error is not None:
+                outer.set_exception(error)
+            else:
+                outer.set_result(result)
+
+        inner.add_done_callback(done)
+        return outer
+
+    def _finished(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def wait(self, future: Future, timeout: Optional[float] = CPU_TASK_TIMEOUT) -> Any:
+        """Block until a submitted task finishes, raising :class:`TaskTimeout` after ``timeout``"""
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._give_up(future, 'timed_out')
+            raise TaskTimeout(f"Task did not finish within {timeout:g}s")
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = CPU_TASK_TIMEOUT,
+                  request=None) -> Any:
+        """Run ``fn(*args)`` in the pool from a request handler
+
+        Fails fast with :class:`ExecutorSaturated` when the queue is full,
+        raises :class:`TaskTimeout` after ``timeout`` and
+        :class:`TaskCancelled` once ``request``'s client disconnects.
+        """
+        future = self.submit(fn, *args, block=False)
+        waiter = asyncio.wrap_future(future)
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            while True:
+                interval = DISCONNECT_POLL_INTERVAL if request is not None else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._give_up(future, 'timed_out')
+                        raise TaskTimeout(f"Task did not finish within {timeout:g}s")
+                    interval = min(interval or remaining, remaining)
+                done, _ = await asyncio.wait({waiter}, timeout=interval)
+                if done:
+                    return waiter.result()
+                if request is not None and await request.is_disconnected():
+                    self._give_up(future, 'cancelled')
+                    raise TaskCancelled("Client disconnected")
+        except asyncio.CancelledError:
+            # The request itself was cancelled, e.g. on shutdown
+            self.cancel(future)
+            raise
+
+    def cancel(self, future: Future) -> None:
+        """Stop waiting for a task: it is dropped if queued, and its result ignored if running"""
+        future.cancel()
+        future.inner.cancel()
+
+    def _give_up(self, future: Future, outcome: str) -> None:
+        with self._lock:
+            stats = self._stats(future.task_name)
+            setattr(stats, outcome, getattr(stats, outcome) + 1)
+        self.cancel(future)
+        logger.warning('CPU task %s %s (%d tasks in flight)', future.task_name,
+                       outcome.replace('_', ' '), self.in_flight)
+
+    def _restart(self) -> None:
+        """Replace a pool whose processes died, so later tasks get new ones"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self.restarts += 1
+        logger.error('CPU pool processes died; starting a new pool')
+
+    def reset(self, processes: Optional[int] = None) -> None:
+        """Stop the pool, optionally changing its size; the next task starts a new one"""
+        self.shutdown()
+        if processes is not None:
+            self.processes = processes
+            self._slots = threading.Semaphore(self.workers + self.max_queue)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'processes': self.processes,
+            'mode': 'processes' if self.processes else 'threads',
+            'max_queue': self.max_queue,
+            'running': min(self.in_flight, self.workers),
+            'queued': self.queue_depth,
+            'peak_in_flight': self.peak_in_flight,
+            'rejected': self.rejected,
+            'abandoned': self.abandoned,
+            'restarts': self.restarts,
+            'tasks': {name: stats.to_dict() for name, stats in sorted(self.tasks.items())},
+        }
+
+
+# Shared by every request of this worker
+cpu_executor = CPUExecutor()
+
+
+async def run_cancellable(request, fn: Callable[..., Any], *args) -> Any:
+    """Run a blocking job that feeds the pool in the threadpool, stopping it on disconnect
+
+    ``fn`` is called as ``fn(*args, cancelled=event)`` and should raise
+    :class:`TaskCancelled` between tasks once ``event`` is set, which
+    happens when ``request``'s client goes away.
+    """
+    from starlette.concurrency import run_in_threadpool
+
+    cancelled = threading.Event()
+    job = asyncio.ensure_future(run_in_threadpool(fn, *args, cancelled=cancelled))
+    while not job.done():
+        await asyncio.wait({job}, timeout=DISCONNECT_POLL_INTERVAL)
+        if not job.done() and not cancelled.is_set() and await request.is_disconnected():
+            logger.info('Client disconnected; cancelling %s', getattr(fn, '__name__', fn))
+            cancelled.set()
+    return job.result()
@@ -0,0 +1,424 @@
+import io
+import os
+import re
+import csv
+import gzip
+import itertools
+import logging
+import zipfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+from storage.schema import SCHEMA
+
+logger = logging.getLogger(__name__)
+
+# Id ranges read at once, each over its own database connection
+EXPORT_FETCH_CONNECTIONS = int(os.environ.get('EXPORT_FETCH_CONNECTIONS', '4'))
+# Ids per range, which bounds the rows a fetch or serialization task holds
+EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', '20000'))
+
+EXPORT_FORMATS = ('xlsx', 'csv', 'csv.gz', 'parquet')
+MEDIA_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'csv.gz': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Rows per worksheet, header included; larger tables continue on "Name (2)"
+XLSX_MAX_ROWS = 1048576
+# Column widths are the longest value + 2, capped like the original report
+XLSX_MAX_WIDTH = 50
+# Characters XML 1.0 cannot carry, even escaped
+ILLEGAL_XML_CHARACTERS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def column_kind(table: str, column: str) -> str:
+    """How an export writes a column, from its MySQL type in storage/schema.py"""
+    column_type = dict(SCHEMA[table].columns)[column].split()[0].upper()
+    if column_type.endswith('INT'):
+        return 'int'
+    if column_type in ('TIMESTAMP', 'DATETIME'):
+        return 'datetime'
+    return 'str'
+
+
+class ExportTable:
+    """Columns of a table in an export, with their spreadsheet headers"""
+
+    def __init__(self, table: str, sheet: str, fields: Sequence[Tuple[str, str]]):
+        self.table = table
+        self.sheet = sheet
+        self.columns = tuple(column for column, _ in fields)
+        self.headers = tuple(header for _, header in fields)
+        # Ratings and ids stay numeric, so spreadsheets can sum and sort them
+        self.kinds = tuple(column_kind(table, column) for column in self.columns)
+
+
+EXPORT_TABLES = {
+    'user_registrations': ExportTable('user_registrations', 'User Registrations', [
+        ('id', 'ID'), ('name', 'Name'), ('email', 'Email'), ('phone', 'Phone'), ('gender', 'Gender'),
+        ('profession', 'Profession'), ('user_type', 'User Type'), ('submitted_at', 'Submitted At'),
+        ('ip_address', 'IP Address'), ('country', 'Country'), ('region', 'Region'),
+    ]),
+    'feedback': ExportTable('feedback', 'Feedback Submissions', [
+        ('id', 'ID'), ('visual_design', 'Visual Design'), ('visual_design_issue', 'Visual Design Issue'),
+        ('ease_of_navigation', 'Ease of Navigation'), ('ease_of_navigation_issue', 'Navigation Issue'),
+        ('mobile_responsiveness', 'Mobile Responsiveness'), ('mobile_responsiveness_issue', 'Mobile Issue'),
+        ('overall_satisfaction', 'Overall Satisfaction'), ('overall_satisfaction_issue', 'Satisfaction Issue'),
+        ('ease_of_tasks', 'Ease of Tasks'), ('ease_of_tasks_issue', 'Tasks Issue'),
+        ('quality_of_services', 'Quality of Services'), ('quality_of_services_issue', 'Services Issue'),
+        ('like_most', 'Like Most'), ('improvements', 'Improvements'), ('features', 'Features'),
+        ('legal_challenges', 'Legal Challenges'), ('additional_comments', 'Additional Comments'),
+        ('contact_willing', 'Contact Willing'), ('contact_email', 'Contact Email'),
+        ('submitted_at', 'Submitted At'), ('ip_address', 'IP Address'), ('country', 'Country'),
+        ('region', 'Region'),
+    ]),
+}
+
+_fetch_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_fetch_pool() -> ThreadPoolExecutor:
+    """The fetch threads, started on first use
+
+    They are shared by every export in this worker, so concurrent exports
+    queue for connections instead of multiplying them.
+    """
+    global _fetch_pool
+    with _pool_lock:
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPoolExecutor(max_workers=EXPORT_FETCH_CONNECTIONS, thread_name_prefix='export-fetch')
+        return _fetch_pool
+
+
+def _text(value, kind: str) -> str:
+    if value is None:
+        return ''
+    if kind == 'datetime' and isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+def _xlsx_rows(kinds: Sequence[str], rows: List[tuple]) -> Tuple[bytes, List[int]]:
+    widths = [0] * len(kinds)
+    parts = []
+    for row in rows:
+        parts.append('<row>')
+        for position, (value, kind) in enumerate(zip(row, kinds)):
+            text = _text(value, kind)
+            if len(text) > widths[position]:
+                widths[position] = len(text)
+            if kind == 'int' and text:
+                parts.append(f'<c><v>{text}</v></c>')
+                continue
+            text = escape(ILLEGAL_XML_CHARACTERS.sub('', text))
+            if not text:
+                parts.append('<c/>')
+            else:
+                space = ' xml:space="preserve"' if text[0].isspace() or text[-1].isspace() else ''
+                parts.append(f'<c t="inlineStr"><is><t{space}>{text}</t></is></c>')
+        parts.append('</row>')
+    return ''.join(parts).encode('utf-8'), widths
+
+
+def _csv_rows(kinds: Sequence[str], rows: List[tuple]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_text(value, kind) for value, kind in zip(row, kinds)] for row in rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def _arrow_schema(spec: ExportTable):
+    import pyarrow as pa
+
+    types = {'int': pa.int64(), 'datetime': pa.timestamp('us'), 'str': pa.string()}
+    return pa.schema([pa.field(column, types[kind]) for column, kind in zip(spec.columns, spec.kinds)])
+
+
+def _parquet_rows(table: str, rows: List[tuple]) -> bytes:
+    import pyarrow as pa
+
+    spec = EXPORT_TABLES[table]
+    schema = _arrow_schema(spec)
+    convert = {'str': str, 'int': int}
+    arrays = [
+        pa.array([None if value is None else convert[kind](value) for value in values]
+                 if kind in convert else values, type=field.type)
+        for values, kind, field in zip(zip(*rows), spec.kinds, schema)
+    ]
+    batch = pa.Table.from_arrays(arrays, schema=schema)
+    # Arrow IPC is read back without conversion; compression is left to the writer
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_table(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def serialize_chunk(export_format: str, table: str,
+                    rows: List[tuple]) -> Tuple[bytes, Optional[List[int]], int]:
+    """Encode one range of rows; runs in a serializer process
+
+    Returns the bytes, for xlsx the longest value of each column, and the
+    number of rows.
+    Chunks of a format concatenate: xlsx gives ``<row>`` elements, csv.gz a
+    gzip member of its own and parquet an Arrow stream for one row group.
+    """
+    kinds = EXPORT_TABLES[table].kinds
+    if export_format == 'xlsx':
+        return _xlsx_rows(kinds, rows) + (len(rows),)
+    if export_format == 'parquet':
+        return _parquet_rows(table, rows), None, len(rows)
+    data = _csv_rows(kinds, rows)
+    if export_format == 'csv.gz':
+        data = gzip.compress(data, compresslevel=6, mtime=0)
+    return data, None, len(rows)
+
+
+def _fetch_and_serialize(export_format: str, table: str, low: int, high: int,
+                         since: Optional[datetime], until: Optional[datetime]):
+    from storage import get_repository
+    from utils.executor import cpu_executor
+
+    rows = get_repository(table).fetch_id_range(low, high, since, until, EXPORT_TABLES[table].columns)
+    if not rows:
+        return None
+    # Handed straight on, so this connection's thread can start the next range
+    return cpu_executor.submit(serialize_chunk, export_format, table, rows)
+
+
+def serialized_chunks(table: str, export_format: str, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None,
+                      cancelled: Optional[threading.Event] = None) -> Iterator[Tuple[bytes, Optional[List[int]], int]]:
+    """Serialized id ranges of a table, newest first, as (data, widths, rows)
+
+    Ranges are fetched over EXPORT_FETCH_CONNECTIONS connections and
+    serialized in the shared CPU pool while earlier ones are being written
+    out. At most one range per connection and pool process is in flight,
+    so memory stays bounded whatever the size of the table. Closing the
+    generator, or setting ``cancelled``, cancels the ranges not yet
+    serialized.
+    """
+    from storage import get_repository
+    from utils.executor import TaskCancelled, cpu_executor
+
+    fetch_pool = _get_fetch_pool()
+    ranges = get_repository(table).id_ranges(EXPORT_CHUNK_ROWS, since, until)
+    in_flight: deque = deque()
+
+    def submit_next() -> None:
+        bounds = next(ranges, None)
+        if bounds is not None:
+            in_flight.append(fetch_pool.submit(_fetch_and_serialize, export_format, table, *bounds, since, until))
+
+    try:
+        for _ in range(EXPORT_FETCH_CONNECTIONS + cpu_executor.workers):
+            submit_next()
+        while in_flight:
+            if cancelled is not None and cancelled.is_set():
+                raise TaskCancelled(f"Export of {table} cancelled")
+            task = in_flight.popleft().result()
+            submit_next()
+            if task is not None:
+                yield cpu_executor.wait(task)
+    finally:
+        for fetch in in_flight:
+            if not fetch.cancel() and not fetch.exception():
+                # Already fetched and handed to the pool
+                task = fetch.result()
+                if task is not None:
+                    cpu_executor.cancel(task)
+
+
+def export_rows(table: str, export_format: str, since: Optional[datetime] = None,
+                until: Optional[datetime] = None) -> Iterator[bytes]:
+    """A csv or csv.gz export of one table as a stream of bytes
+
+    The first item is the header together with the newest range, so a
+    failing read surfaces before anything is sent.
+    """
+    chunks = serialized_chunks(table, export_format, since, until)
+    try:
+        first = next(chunks, None)
+        header = _csv_rows(('str',) * len(EXPORT_TABLES[table].columns), [EXPORT_TABLES[table].columns])
+        if export_format == 'csv.gz':
+            header = gzip.compress(header, mtime=0)
+        yield header + (first[0] if first else b'')
+        for data, _, _ in chunks:
+            yield data
+    finally:
+        chunks.close()
+
+
+def write_parquet(out: BinaryIO, table: str, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None, cancelled: Optional[threading.Event] = None) -> int:
+    """Write one table as Parquet with a row group per id range, returning the rows"""
+    # Optional dependency, only needed for Parquet exports
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("Parquet exports require pyarrow (pip install pyarrow)")
+
+    rows_written = 0
+    with pq.ParquetWriter(out, _arrow_schema(EXPORT_TABLES[table]), compression='zstd') as writer:
+        for data, _, _ in serialized_chunks(table, 'parquet', since, until, cancelled):
+            batch = pa.ipc.open_stream(data).read_all()
+            writer.write_table(batch)
+            rows_written += batch.num_rows
+    return rows_written
+
+
+XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font></fonts>'
+    '<fills count="3"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF366092"/><bgColor rgb="FF366092"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center"/></xf></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+class _WorkbookWriter:
+    """Streams worksheets into an xlsx zip, one at a time"""
+
+    def __init__(self, out: BinaryIO):
+        # Level 1: deflate runs in this process, so favour speed over size
+        self.zip = zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED, compresslevel=1)
+        self.sheets: List[str] = []
+        self.sheet = None
+        self.rows = 0
+
+    def open_sheet(self, name: str, spec: ExportTable, widths: Sequence[int]) -> None:
+        self.close_sheet()
+        self.sheets.append(name)
+        self.sheet = self.zip.open(f'xl/worksheets/sheet{len(self.sheets)}.xml', 'w')
+        cols = ''.join(
+            f'<col min="{i}" max="{i}" width="{min(width + 2, XLSX_MAX_WIDTH)}" customWidth="1"/>'
+            for i, width in enumerate(widths, start=1)
+        )
+        header = ''.join(f'<c t="inlineStr" s="1"><is><t>{escape(h)}</t></is></c>' for h in spec.headers)
+        self.sheet.write((
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            f'<cols>{cols}</cols><sheetData><row>{header}</row>'
+        ).encode('utf-8'))
+        self.rows = 1
+
+    def write_rows(self, data: bytes, count: int) -> None:
+        self.sheet.write(data)
+        self.rows += count
+
+    def close_sheet(self) -> None:
+        if self.sheet is not None:
+            self.sheet.write(b'</sheetData></worksheet>')
+            self.sheet.close()
+            self.sheet = None
+
+    def close(self) -> None:
+        self.close_sheet()
+        sheets = ''.join(
+            f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>'
+            for i, name in enumerate(self.sheets, start=1)
+        )
+        relationships = ''.join(
+            f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+            f'worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, len(self.sheets) + 1)
+        )
+        overrides = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, len(self.sheets) + 1)
+        )
+        styles_id = len(self.sheets) + 1
+        self.zip.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets}</sheets></workbook>'
+        ))
+        self.zip.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{relationships}<Relationship Id="rId{styles_id}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/></Relationships>'
+        ))
+        self.zip.writestr('xl/styles.xml', XLSX_STYLES)
+        self.zip.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>'
+        ))
+        self.zip.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'
+        ))
+        self.zip.close()
+
+
+def _split_rows(data: bytes, count: int) -> Tuple[bytes, bytes]:
+    """The first ``count`` ``<row>`` elements of a chunk, and the rest"""
+    end = 0
+    for _ in range(count):
+        end = data.index(b'</row>', end) + len(b'</row>')
+    return data[:end], data[end:]
+
+
+def write_xlsx(out: BinaryIO, tables: Sequence[str] = tuple(EXPORT_TABLES), since: Optional[datetime] = None,
+               until: Optional[datetime] = None, cancelled: Optional[threading.Event] = None) -> int:
+    """Write a workbook with a sheet per table, returning the rows written
+
+    Rows are built in the serializer processes and only copied into the zip
+    here. Column widths are sized from the header and the newest range,
+    since they precede the rows in the sheet.
+    """
+    workbook = _WorkbookWriter(out)
+    rows_written = 0
+    try:
+        for table in tables:
+            spec = EXPORT_TABLES[table]
+            chunks = serialized_chunks(table, 'xlsx', since, until, cancelled)
+            first = next(chunks, None)
+            widths = [
+                max(len(header), first[1][i] if first else 0) for i, header in enumerate(spec.headers)
+            ]
+            workbook.open_sheet(spec.sheet, spec, widths)
+            part = 1
+            for data, _, count in itertools.chain([first] if first else [], chunks):
+                while workbook.rows + count > XLSX_MAX_ROWS:
+                    room = XLSX_MAX_ROWS - workbook.rows
+                    head, data = _split_rows(data, room)
+                    workbook.write_rows(head, room)
+                    rows_written += room
+                    count -= room
+                    part += 1
+                    workbook.open_sheet(f'{spec.sheet} ({part})', spec, widths)
+                workbook.write_rows(data, count)
+                rows_written += count
+    finally:
+        workbook.close()
+    return rows_written
@@ -0,0 +1,223 @@
+import os
+import csv
+import gzip
+import logging
+import threading
+import ipaddress
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Local IP range database: a CSV (optionally gzipped) of start IP, end IP,
+# country code and optional region, such as DB-IP's free "lite" downloads
+GEOIP_DATABASE = os.environ.get('GEOIP_DATABASE', 'data/ip_ranges.csv')
+# Distinct client addresses whose location is remembered per process
+GEOIP_CACHE_SIZE = int(os.environ.get('GEOIP_CACHE_SIZE', '65536'))
+# Rows updated per transaction when backfilling locations
+GEOIP_BACKFILL_BATCH_SIZE = int(os.environ.get('GEOIP_BACKFILL_BATCH_SIZE', '1000'))
+
+# DB-IP's city layout: start, end, continent, country, region, city, latitude, longitude
+CITY_LAYOUT_COLUMNS = 8
+
+Address = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+Location = Tuple[Optional[str], Optional[str]]
+UNKNOWN: Location = (None, None)
+
+
+def parse_ip(value: Optional[str]) -> Optional[Address]:
+    """The client address of an ``ip_address`` value, or None if it isn't one
+
+    Values taken from ``x-forwarded-for`` may list the proxies after the
+    client; IPv4 addresses mapped into IPv6 are looked up as IPv4.
+    """
+    if not value:
+        return None
+    try:
+        address = ipaddress.ip_address(value.split(',', 1)[0].strip())
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+def _parse_bound(value: str) -> Address:
+    value = value.strip()
+    # Some databases store ranges as integers
+    return ipaddress.ip_address(int(value) if value.isdigit() else value)
+
+
+def read_ranges(path: str) -> Iterable[Tuple[Address, Address, str, Optional[str]]]:
+    """Yield (start, end, country, region) from a range database file"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        for line, row in enumerate(csv.reader(f), 1):
+            if len(row) < 3 or row[0].startswith('#'):
+                continue
+            try:
+                start, end = _parse_bound(row[0]), _parse_bound(row[1])
+            except ValueError:
+                if line == 1:
+                    # Header row
+                    continue
+                raise ValueError(f"{path}:{line}: invalid IP range {row[0]!r} - {row[1]!r}")
+            if len(row) >= CITY_LAYOUT_COLUMNS:
+                country, region = row[3], row[4]
+            else:
+                country, region = row[2], row[3] if len(row) > 3 else None
+            yield start, end, country.strip().upper() or None, (region or '').strip() or None
+
+
+class IPRangeIndex:
+    """Non-overlapping IP ranges in sorted arrays, searched by bisection
+
+    Each address family keeps the range starts and ends as integers plus,
+    per range, an index into a table of the distinct (country, region)
+    pairs, so a few million ranges take tens of megabytes and a lookup is
+    one binary search.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[Any, Any, Optional[str], Optional[str]]] = ()):
+        self.locations: List[Location] = []
+        location_ids: Dict[Location, int] = {}
+        families: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+        for start, end, country, region in ranges:
+            if start.version != end.version or start > end:
+                raise ValueError(f"Invalid IP range {start} - {end}")
+            location = (country, region)
+            if location not in location_ids:
+                location_ids[location] = len(self.locations)
+                self.locations.append(location)
+            families[start.version].append((int(start), int(end), location_ids[location]))
+
+        self._starts: Dict[int, Any] = {}
+        self._ends: Dict[int, Any] = {}
+        self._location_ids: Dict[int, array] = {}
+        for version, entries in families.items():
+            entries.sort()
+            starts = [entry[0] for entry in entries]
+            ends = [entry[1] for entry in entries]
+            if version == 4:
+                starts, ends = array('I', starts), array('I', ends)
+            # IPv6 bounds don't fit a machine integer and stay Python ints
+            self._starts[version] = starts
+            self._ends[version] = ends
+            self._location_ids[version] = array('I', (entry[2] for entry in entries))
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts in self._starts.values())
+
+    def lookup(self, address: Address) -> Location:
+        """The (country, region) of an address, or (None, None) outside every range"""
+        value = int(address)
+        starts = self._starts[address.version]
+        position = bisect_right(starts, value) - 1
+        if position < 0 or value > self._ends[address.version][position]:
+            return UNKNOWN
+        return self.locations[self._location_ids[address.version][position]]
+
+
+class GeoIPResolver:
+    """Locates client addresses with the range database, without network calls
+
+    The database is loaded into an :class:`IPRangeIndex` on first use and
+    the locations of recently seen addresses are kept in an LRU. Without a
+    database file every address is unknown.
+    """
+
+    def __init__(self, path: str = GEOIP_DATABASE, cache_size: int = GEOIP_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._index: Optional[IPRangeIndex] = None
+        self._cache: 'OrderedDict[str, Location]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def index(self) -> IPRangeIndex:
+        if self._index is None:
+            with self._load_lock:
+                if self._index is None:
+                    self._index = self._load()
+        return self._index
+
+    def _load(self, path: Optional[str] = None) -> IPRangeIndex:
+        path = path or self.path
+        if not os.path.exists(path):
+            logger.warning(f'No IP range database at {path}; locations will be unknown')
+            return IPRangeIndex()
+        index = IPRangeIndex(read_ranges(path))
+        logger.info(f'Loaded {len(index)} IP ranges from {path}')
+        return index
+
+    def locate(self, ip_address: Optional[str]) -> Location:
+        """The (country, region) of a stored ``ip_address`` value"""
+        if not ip_address:
+            return UNKNOWN
+        with self._lock:
+            location = self._cache.get(ip_address)
+            if location is not None:
+                self._cache.move_to_end(ip_address)
+                return location
+
+        address = parse_ip(ip_address)
+        location = self.index.lookup(address) if address is not None else UNKNOWN
+        with self._lock:
+            self._cache[ip_address] = location
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return location
+
+    def with_location(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """``values`` with ``country`` and ``region`` filled in from ``ip_address``"""
+        if values.get('country') is not None:
+            return values
+        country, region = self.locate(values.get('ip_address'))
+        return dict(values, country=country, region=region)
+
+    def reload(self, path: Optional[str] = None) -> None:
+        """Read the database again, e.g. after downloading a newer one"""
+        index = self._load(path)
+        with self._lock:
+            self.path = path or self.path
+            self._index = index
+            self._cache.clear()
+
+
+# Shared by every request of this worker
+geoip = GeoIPResolver()
+
+
+def backfill_locations(table: str, batch_size: int = GEOIP_BACKFILL_BATCH_SIZE, since_id: int = 0) -> Tuple[int, int]:
+    """Fill in ``country`` and ``region`` of stored rows that have none
+
+    Walks the table in id order and updates the rows in batches of
+    ``batch_size``. Addresses outside every range are left empty, so a
+    later run with a newer database can still place them. Returns the rows
+    scanned and updated.
+    """
+    from storage import get_repository
+
+    repository = get_repository(table)
+    scanned = updated = 0
+    pending: List[Tuple[int, str, Optional[str]]] = []
+    batches = repository.iter_rows(since_id, ('id', 'ip_address', 'country'), batch_size)
+    try:
+        for rows in batches:
+            scanned += len(rows)
+            for row_id, ip_address, country in rows:
+                if country is None and ip_address:
+                    country, region = geoip.locate(ip_address)
+                    if country is not None:
+                        pending.append((row_id, country, region))
+            if len(pending) >= batch_size:
+                updated += repository.set_locations(pending)
+                pending = []
+    finally:
+        batches.close()
+    if pending:
+        updated += repository.set_locations(pending)
+    return scanned, updated
@@ -0,0 +1,277 @@
+import os
+import json
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from models import UserRegistration, Feedback
+from storage import get_repository
+from utils.timeseries import TIMESERIES_SYNC_OVERLAP, SyncWatermark, overlap_floor
+
+logger = logging.getLogger(__name__)
+
+# Events queued for a dashboard before it is considered too slow and dropped
+LIVE_FEED_BUFFER = int(os.environ.get('LIVE_FEED_BUFFER', '100'))
+# Seconds between keep-alive comments on an idle stream
+LIVE_FEED_HEARTBEAT = float(os.environ.get('LIVE_FEED_HEARTBEAT', '15'))
+# Seconds between checks for rows inserted by other workers (0 disables)
+LIVE_FEED_POLL_INTERVAL = float(os.environ.get('LIVE_FEED_POLL_INTERVAL', '2'))
+# Most rows replayed per table when a dashboard reconnects
+LIVE_FEED_REPLAY_LIMIT = int(os.environ.get('LIVE_FEED_REPLAY_LIMIT', '500'))
+# Reconnection delay suggested to clients, in milliseconds
+LIVE_FEED_RETRY_MS = 3000
+
+# Tables in event id order, with the model and event name of their rows
+FEED_TABLES = ('user_registrations', 'feedback')
+FEED_MODELS = {'user_registrations': UserRegistration, 'feedback': Feedback}
+EVENT_TYPES = {'user_registrations': 'registration', 'feedback': 'feedback'}
+
+# (table, id) pairs remembered so rows published locally are not re-sent by the poller
+RECENT_EVENTS = 10000
+
+
+def format_cursor(cursor: Dict[str, int]) -> str:
+    """Encode the last id delivered for each table as an SSE event id"""
+    return '-'.join(str(cursor[table]) for table in FEED_TABLES)
+
+
+def parse_cursor(value: Optional[str]) -> Optional[Dict[str, int]]:
+    """Decode a ``Last-Event-ID``, returning None if it is missing or malformed"""
+    if not value:
+        return None
+    parts = value.strip().split('-')
+    if len(parts) != len(FEED_TABLES) or not all(part.isdigit() for part in parts):
+        return None
+    return dict(zip(FEED_TABLES, (int(part) for part in parts)))
+
+
+def format_event(event: str, cursor: Dict[str, int], data: Dict[str, Any]) -> str:
+    return f"id: {format_cursor(cursor)}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def read_after(model, since_id: int, limit: int, after: Optional[int] = None) -> list:
+    """Read rows of ``model`` with an id above ``since_id``, stopping at ``limit`` of them above ``after``
+
+    ``after`` defaults to ``since_id``; rows between the two are read too
+    but don't count towards the limit.
+    """
+    after = since_id if after is None else after
+    items = []
+    newer = 0
+    batches = model.stream(since_id)
+    try:
+        for batch in batches:
+            for item in batch:
+                if item.id > after:
+                    if newer == limit:
+                        return items
+                    newer += 1
+                items.append(item)
+    finally:
+        batches.close()
+    return items
+
+
+def read_unclaimed(model, watermark: SyncWatermark, limit: int) -> list:
+    """Read at most ``limit`` rows of ``model`` that ``watermark`` hasn't claimed yet
+
+    Rows from ``watermark.scan_from`` up are read again each time, so one
+    that commits after a higher id is still found; ``claim`` skips the rest.
+    """
+    items = []
+    head = watermark.head
+    batches = model.stream(watermark.scan_from)
+    try:
+        for batch in batches:
+            for item in batch:
+                head = max(head, item.id)
+                if watermark.claim(item.id):
+                    items.append(item)
+            if len(items) >= limit:
+                break
+    finally:
+        batches.close()
+    watermark.advance(head)
+    return items
+
+
+def start_watermark(table: str) -> SyncWatermark:
+    """A watermark for a poller starting now, with the rows already committed claimed"""
+    repository = get_repository(table)
+    watermark = SyncWatermark(overlap_floor(repository))
+    head = watermark.head
+    batches = repository.iter_rows(watermark.scan_from, ('id',))
+    try:
+        for rows in batches:
+            for row in rows:
+                watermark.claim(row[0])
+            head = max(head, rows[-1][0])
+    finally:
+        batches.close()
+    watermark.advance(head)
+    return watermark
+
+
+def resume_floor(table: str, cursor_id: int, overlap: float = TIMESERIES_SYNC_OVERLAP) -> int:
+    """Id a replay reads from: the rows submitted up to ``overlap`` seconds before ``cursor_id``
+
+    Any of them may have committed after the dashboard received the cursor.
+    """
+    repository = get_repository(table)
+    rows = repository.fetch_id_range(cursor_id, cursor_id + 1, columns=('submitted_at',))
+    if not rows:
+        return cursor_id
+    low, _ = repository.id_bounds(rows[0][0] - timedelta(seconds=overlap))
+    return min(low - 1, cursor_id) if low else cursor_id
+
+
+class Subscriber:
+    """A connected dashboard and the events waiting to be sent to it"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=LIVE_FEED_BUFFER)
+        self.dropped = False
+
+
+class LiveFeedHub:
+    """Fans newly inserted rows out to the dashboards connected to this worker
+
+    The create endpoints publish rows as they are inserted. Rows written by
+    other workers are picked up by one poller per worker, which only runs
+    while a dashboard is connected, so the database sees a single cheap
+    ``id > last`` query per interval however many admins are watching. Its
+    ``last`` trails behind by ``TIMESERIES_SYNC_OVERLAP`` seconds of ids, like
+    the time series syncs, so rows committing out of id order still arrive.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._recent: 'OrderedDict[tuple, None]' = OrderedDict()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, table: str, item: Dict[str, Any]) -> None:
+        """Send an inserted row to every connected dashboard; safe from any thread"""
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(table, item)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, table, item)
+
+    def _dispatch(self, table: str, item: Dict[str, Any]) -> None:
+        key = (table, item['id'])
+        if key in self._recent:
+            return
+        self._recent[key] = None
+        if len(self._recent) > RECENT_EVENTS:
+            self._recent.popitem(last=False)
+
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait((table, item))
+            except asyncio.QueueFull:
+                # Never let one slow dashboard hold events for everyone; it
+                # resumes from its last event id when it reconnects
+                subscriber.dropped = True
+                self._subscribers.discard(subscriber)
+                logger.warning('Dropped a live feed client that fell behind')
+
+    async def subscribe(self) -> Subscriber:
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        if self._poller is None and LIVE_FEED_POLL_INTERVAL > 0:
+            self._poller = asyncio.create_task(self._poll())
+        return subscriber
+
+    async def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        if not self._subscribers and self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+
+    async def _poll(self) -> None:
+        """Publish rows inserted by other workers"""
+        try:
+            watermarks = {table: await run_in_threadpool(start_watermark, table) for table in FEED_TABLES}
+        except Exception as e:
+            logger.error(f'Live feed poller could not start: {str(e)}')
+            self._poller = None
+            return
+
+        while True:
+            await asyncio.sleep(LIVE_FEED_POLL_INTERVAL)
+            for table in FEED_TABLES:
+                try:
+                    items = await run_in_threadpool(
+                        read_unclaimed, FEED_MODELS[table], watermarks[table], LIVE_FEED_REPLAY_LIMIT
+                    )
+                except Exception as e:
+                    logger.error(f'Error polling {table} for the live feed: {str(e)}')
+                    continue
+                # Rows this worker published itself are skipped by _dispatch
+                for item in items:
+                    self._dispatch(table, item.to_dict())
+
+    async def events(self, subscriber: Subscriber, cursor: Optional[Dict[str, int]]) -> AsyncIterator[str]:
+        """Server-sent events for one dashboard
+
+        Without a ``cursor`` the stream starts at the newest rows. With one,
+        rows after it are replayed first, along with the rows of the overlap
+        window before it, which the dashboard skips if it already has them.
+        If more than ``LIVE_FEED_REPLAY_LIMIT`` were missed a ``reset`` event
+        tells the dashboard to reload instead.
+        """
+        yield f"retry: {LIVE_FEED_RETRY_MS}\n\n"
+
+        replayed: Set[tuple] = set()
+        if cursor is not None:
+            backlog: List[tuple] = []
+            for table in FEED_TABLES:
+                floor = await run_in_threadpool(resume_floor, table, cursor[table])
+                items = await run_in_threadpool(
+                    read_after, FEED_MODELS[table], floor, LIVE_FEED_REPLAY_LIMIT + 1, cursor[table]
+                )
+                if sum(item.id > cursor[table] for item in items) > LIVE_FEED_REPLAY_LIMIT:
+                    cursor = None
+                    break
+                backlog.extend((table, item) for item in items)
+
+            if cursor is not None:
+                for table, item in backlog:
+                    cursor[table] = max(cursor[table], item.id)
+                    replayed.add((table, item.id))
+                    yield format_event(EVENT_TYPES[table], cursor, item.to_dict())
+            else:
+                cursor = {table: await run_in_threadpool(FEED_MODELS[table].last_id) for table in FEED_TABLES}
+                yield format_event('reset', cursor, {})
+        else:
+            cursor = {table: await run_in_threadpool(FEED_MODELS[table].last_id) for table in FEED_TABLES}
+            yield format_event('ready', cursor, {})
+
+        while not subscriber.dropped:
+            try:
+                table, item = await asyncio.wait_for(subscriber.queue.get(), LIVE_FEED_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": heartbeat\n\n"
+                continue
+            if (table, item['id']) in replayed:
+                continue
+            cursor[table] = max(cursor[table], item['id'])
+            yield format_event(EVENT_TYPES[table], cursor, item)
+
+
+live_feed_hub = LiveFeedHub()
@@ -0,0 +1,207 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+# 'json' for one JSON object per line, 'text' for the plain development format
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# Records waiting for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+# Fraction of DEBUG records kept, and of access log lines kept
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '0.01'))
+LOG_ACCESS_SAMPLE_RATE = float(os.environ.get('LOG_ACCESS_SAMPLE_RATE', '1'))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as a single-line JSON object
+
+    Fields passed with ``extra=`` are added as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a random fraction of high-volume records
+
+    DEBUG records are kept at ``debug_rate`` and access log lines at
+    ``access_rate``; everything else always passes.
+    """
+
+    def __init__(self, debug_rate: float = LOG_DEBUG_SAMPLE_RATE, access_rate: float = LOG_ACCESS_SAMPLE_RATE):
+        super().__init__()
+        self.debug_rate = debug_rate
+        self.access_rate = access_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG:
+            return self.debug_rate >= 1 or random.random() < self.debug_rate
+        if record.name == 'uvicorn.access':
+            return self.access_rate >= 1 or random.random() < self.access_rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the writer thread without formatting or waiting
+
+    The stdlib handler formats the message on the calling thread; here the
+    record is queued as is, so ``%`` arguments are only merged by the writer
+    thread. When the queue is full the record is dropped and counted rather
+    than stalling the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.dropped:
+                self._report_dropped()
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _report_dropped(self) -> None:
+        notice = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            'Dropped %d log records while the log queue was full', (self.dropped,), None
+        )
+        self.queue.put_nowait(notice)
+        self.dropped = 0
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """Stream handler that leaves flushing to the listener"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingQueueListener(QueueListener):
+    """Queue listener that flushes once the queue runs empty
+
+    A burst of records becomes a few large writes instead of one write and
+    flush per record.
+    """
+
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_stream: Optional[TextIO] = None
+_lock = threading.Lock()
+
+
+def _build_output_handler() -> logging.Handler:
+    output = BufferedStreamHandler(_stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT))
+    return output
+
+
+def _start_listener() -> None:
+    """Give the queue handler a fresh queue and writer thread"""
+    global _listener
+    log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+    _handler.queue = log_queue
+    _handler.dropped = 0
+    _listener = BatchingQueueListener(log_queue, _build_output_handler(), respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork() -> None:
+    # Threads don't survive fork and the queue's lock may have been held by
+    # the parent's writer thread, so each child starts its own
+    global _listener
+    if _handler is not None:
+        _listener = None
+        _start_listener()
+
+
+def setup_logging(stream: Optional[TextIO] = None) -> None:
+    """Route all logging through a queue drained by a background writer thread
+
+    Request handlers then only pay for creating a record and a non-blocking
+    queue put; formatting and the stdout write happen on the writer thread.
+    Records are written to ``stream``, stdout by default. Safe to call more
+    than once.
+    """
+    global _handler, _stream
+    with _lock:
+        if _handler is not None:
+            return
+        _stream = stream
+
+        _handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _handler.addFilter(SamplingFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(_handler)
+        root.setLevel(LOG_LEVEL)
+        # Skip the stack walk that finds each call site; no format uses it
+        logging._srcfile = None
+
+        _start_listener()
+        atexit.register(stop_logging)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def route_server_logs() -> None:
+    """Send uvicorn's error and access logs through the queue as well
+
+    Gunicorn's uvicorn worker attaches its own synchronous stream handlers;
+    dropping them lets the records propagate to the root queue handler.
+    """
+    for name in ('uvicorn', 'uvicorn.error', 'uvicorn.access'):
+        server_logger = logging.getLogger(name)
+        server_logger.handlers = []
+        server_logger.propagate = True
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,245 @@
+import gc
+import os
+import sys
+import time
+import logging
+import threading
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Attribute memory retained after each request to its route
+MEMORY_TRACKING = os.environ.get('MEMORY_TRACKING', 'true').lower() == 'true'
+# Requests per route ignored while caches and pools warm up
+MEMORY_WARMUP_REQUESTS = int(os.environ.get('MEMORY_WARMUP_REQUESTS', '50'))
+# Requests per route needed, after warm-up, before it can be flagged
+MEMORY_MIN_REQUESTS = int(os.environ.get('MEMORY_MIN_REQUESTS', '200'))
+# Average bytes retained per request above which a route is flagged; RSS
+# moves in pages, so smaller thresholds mostly catch neighbours' growth
+MEMORY_RETAINED_THRESHOLD = int(os.environ.get('MEMORY_RETAINED_THRESHOLD', '4096'))
+
+# Seconds between RSS samples while an export runs, and exports remembered
+PEAK_POLL_INTERVAL = 0.01
+EXPORT_HISTORY = 20
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class _Statm:
+    """Reads resident memory from an open /proc/self/statm, reopened after fork"""
+
+    def __init__(self):
+        self._pid = None
+        self._fd = None
+
+    def rss(self) -> Optional[int]:
+        pid = os.getpid()
+        try:
+            if self._pid != pid:
+                # /proc/self is resolved when opened, so a forked worker needs its own fd
+                self._fd = os.open('/proc/self/statm', os.O_RDONLY)
+                self._pid = pid
+            return int(os.pread(self._fd, 128, 0).split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            return None
+
+
+_statm = _Statm()
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size of this process, None where /proc is missing"""
+    return _statm.rss()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Highest resident set size this process has reached"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _retained_now() -> Optional[int]:
+    # The Python heap is the sharper signal when tracemalloc is running
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return rss_bytes()
+
+
+class RouteMemory:
+    """Memory left behind by requests to one route"""
+
+    __slots__ = ('requests', 'measured', 'retained', 'grew')
+
+    def __init__(self):
+        self.requests = 0
+        self.measured = 0
+        self.retained = 0
+        self.grew = 0
+
+    @property
+    def retained_per_request(self) -> float:
+        return self.retained / self.measured if self.measured else 0.0
+
+    @property
+    def flagged(self) -> bool:
+        return (self.measured >= MEMORY_MIN_REQUESTS
+                and self.retained_per_request > MEMORY_RETAINED_THRESHOLD)
+
+
+class MemoryTracker:
+    """Per-worker memory gauges: retention per route and peaks per export
+
+    Concurrent requests share one process, so a single request's delta is
+    noisy; a route that keeps memory shows up as steady net growth over
+    hundreds of requests while others average out near zero.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, RouteMemory] = {}
+        self.exports: Deque[Dict[str, object]] = deque(maxlen=EXPORT_HISTORY)
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    def record_request(self, route: str, before: Optional[int], after: Optional[int]) -> None:
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes.setdefault(route, RouteMemory())
+        stats.requests += 1
+        if before is None or after is None or stats.requests <= MEMORY_WARMUP_REQUESTS:
+            return
+        delta = after - before
+        stats.measured += 1
+        stats.retained += delta
+        if delta > 0:
+            stats.grew += 1
+        if stats.measured == MEMORY_MIN_REQUESTS and stats.flagged:
+            logger.warning('%s retains %.0f bytes per request', route, stats.retained_per_request)
+
+    def route_report(self) -> List[Dict[str, object]]:
+        report = [
+            {
+                'route': route,
+                'requests': stats.requests,
+                'retained_bytes': stats.retained,
+                'retained_per_request': round(stats.retained_per_request, 1),
+                'grew_fraction': round(stats.grew / stats.measured, 3) if stats.measured else 0.0,
+                'flagged': stats.flagged,
+            }
+            for route, stats in list(self.routes.items())
+        ]
+        return sorted(report, key=lambda r: r['retained_bytes'], reverse=True)
+
+    @contextmanager
+    def track_peak(self, name: str) -> Iterator[None]:
+        """Record the resident memory peak while the block runs
+
+        RSS is polled from a helper thread, so the peak of C-level work such
+        as openpyxl serialization is seen too.
+        """
+        before = rss_bytes()
+        if before is None:
+            yield
+            return
+
+        peak = [before]
+        done = threading.Event()
+
+        def poll():
+            while not done.wait(PEAK_POLL_INTERVAL):
+                current = rss_bytes()
+                if current is not None and current > peak[0]:
+                    peak[0] = current
+
+        poller = threading.Thread(target=poll, name='memory-peak', daemon=True)
+        started = time.perf_counter()
+        started_at = datetime.now()
+        poller.start()
+        try:
+            yield
+        finally:
+            done.set()
+            poller.join()
+            after = rss_bytes() or before
+            self.exports.append({
+                'name': name,
+                'started_at': started_at,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+                'rss_before': before,
+                'rss_after': after,
+                'peak_rss': max(peak[0], after),
+                'peak_growth': max(peak[0], after) - before,
+            })
+
+    def start_tracing(self, frames: int = 1) -> None:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self.baseline = tracemalloc.take_snapshot()
+
+    def stop_tracing(self) -> None:
+        with self._lock:
+            tracemalloc.stop()
+            self.baseline = None
+
+    def snapshot_diff(self, group_by: str = 'lineno', limit: int = 25, rebase: bool = False) -> List[Dict[str, object]]:
+        """Allocations grown since the baseline snapshot, largest first"""
+        with self._lock:
+            if not tracemalloc.is_tracing() or self.baseline is None:
+                raise RuntimeError('tracemalloc is not running')
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+            stats = snapshot.compare_to(self.baseline, group_by)
+            if rebase:
+                self.baseline = snapshot
+
+        return [
+            {
+                'location': ' <- '.join(f'{frame.filename}:{frame.lineno}' for frame in stat.traceback),
+                'size_diff': stat.size_diff,
+                'size': stat.size,
+                'count_diff': stat.count_diff,
+                'count': stat.count,
+            }
+            for stat in stats[:limit]
+        ]
+
+
+memory_tracker = MemoryTracker()
+
+
+def object_type_counts(limit: int = 25) -> Dict[str, int]:
+    """Most common live object types; walks the whole heap, so only on demand"""
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+    return dict(counts.most_common(limit))
+
+
+class MemoryTrackingMiddleware:
+    """Attribute the memory retained by each request to its route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not MEMORY_TRACKING:
+            await self.app(scope, receive, send)
+            return
+
+        before = _retained_now()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router fills in the matched route; unmatched paths are skipped
+            route = scope.get('route')
+            if route is not None:
+                memory_tracker.record_request(f"{scope['method']} {route.path}", before, _retained_now())
@@ -0,0 +1,204 @@
+import os
+import re
+import hashlib
+import logging
+import importlib.util
+from typing import Dict, List, Optional, Tuple
+from database import get_db_connection
+from storage.schema import SCHEMA
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+# NNN_description.sql or NNN_description.py; Python migrations define upgrade(cursor)
+MIGRATION_PATTERN = re.compile(r'^(\d{3})_(\w+)\.(sql|py)$')
+
+SCHEMA_MIGRATIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT NOT NULL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(40) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+class Migration:
+    """One numbered file under migrations/"""
+
+    def __init__(self, path: str):
+        match = MIGRATION_PATTERN.match(os.path.basename(path))
+        self.path = path
+        self.version = int(match.group(1))
+        self.name = os.path.basename(path)
+        with open(path, 'rb') as f:
+            self.checksum = hashlib.sha1(f.read().replace(b'\r\n', b'\n')).hexdigest()
+
+    def apply(self, cursor) -> None:
+        if self.path.endswith('.py'):
+            spec = importlib.util.spec_from_file_location(f'migration_{self.version:03d}', self.path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            module.upgrade(cursor)
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for statement in split_statements(f.read()):
+                cursor.execute(statement)
+
+
+def split_statements(sql: str) -> List[str]:
+    """Statements of a SQL file, split on semicolons that end a line"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [s.strip() for s in re.split(r';\s*$', '\n'.join(lines), flags=re.MULTILINE) if s.strip()]
+
+
+def discover_migrations() -> List[Migration]:
+    migrations = [
+        Migration(os.path.join(MIGRATIONS_DIR, name))
+        for name in os.listdir(MIGRATIONS_DIR) if MIGRATION_PATTERN.match(name)
+    ]
+    versions = [m.version for m in migrations]
+    duplicates = {v for v in versions if versions.count(v) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate migration versions: {', '.join(map(str, sorted(duplicates)))}")
+    return sorted(migrations, key=lambda m: m.version)
+
+
+def applied_migrations(cursor) -> Dict[int, Tuple[str, str]]:
+    """Applied migrations as {version: (name, checksum)}"""
+    cursor.execute(SCHEMA_MIGRATIONS_TABLE_SQL)
+    cursor.execute("SELECT version, name, checksum FROM schema_migrations")
+    return {version: (name, checksum) for version, name, checksum in cursor.fetchall()}
+
+
+def migration_status() -> List[Dict[str, object]]:
+    """Every known migration with whether it was applied and still matches its file"""
+    with get_db_connection() as connection:
+        applied = applied_migrations(connection.cursor())
+        connection.commit()
+
+    status = []
+    for migration in discover_migrations():
+        record = applied.pop(migration.version, None)
+        status.append({
+            'version': migration.version,
+            'name': migration.name,
+            'applied': record is not None,
+            'modified': record is not None and record[1] != migration.checksum,
+        })
+    # Recorded in the database but gone from migrations/
+    for version, (name, _) in sorted(applied.items()):
+        status.append({'version': version, 'name': name, 'applied': True, 'modified': False, 'missing': True})
+    return status
+
+
+def apply_migrations(target: Optional[int] = None) -> List[str]:
+    """Apply pending migrations in order, up to ``target`` if given
+
+    MySQL commits DDL implicitly, so each migration is recorded as soon as
+    it has run; one that fails part-way must be safe to run again.
+    """
+    applied_names = []
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        applied = applied_migrations(cursor)
+        connection.commit()
+
+        for migration in discover_migrations():
+            if migration.version in applied or (target is not None and migration.version > target):
+                continue
+            logger.info(f"Applying {migration.name}...")
+            migration.apply(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, migration.checksum)
+            )
+            connection.commit()
+            applied_names.append(migration.name)
+    return applied_names
+
+
+def live_indexes(cursor, table: str) -> Dict[str, Tuple[str, ...]]:
+    """Secondary indexes of a table as {name: columns}"""
+    cursor.execute("""
+        SELECT INDEX_NAME, COLUMN_NAME
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME <> 'PRIMARY'
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (table,))
+    indexes: Dict[str, List[str]] = {}
+    for name, column in cursor.fetchall():
+        indexes.setdefault(name, []).append(column)
+    return {name: tuple(columns) for name, columns in indexes.items()}
+
+
+def live_columns(cursor, table: str) -> List[str]:
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def schema_drift(cursor) -> List[Tuple[str, str, str]]:
+    """Differences between the database and storage/schema.py as (table, kind, detail)
+
+    Kinds: missing_table, missing_column, extra_column, missing_index,
+    changed_index and extra_index.
+    """
+    drift = []
+    for table, expected in SCHEMA.items():
+        columns = live_columns(cursor, table)
+        if not columns:
+            drift.append((table, 'missing_table', table))
+            continue
+        drift += [(table, 'missing_column', c) for c in expected.column_names if c not in columns]
+        drift += [(table, 'extra_column', c) for c in columns if c not in expected.column_names]
+
+        indexes = live_indexes(cursor, table)
+        for name, index_columns in expected.all_indexes.items():
+            if name not in indexes:
+                drift.append((table, 'missing_index', f"{name} ({', '.join(index_columns)})"))
+            elif indexes[name] != index_columns:
+                drift.append((table, 'changed_index', f"{name} ({', '.join(indexes[name])}), "
+                                                      f"expected ({', '.join(index_columns)})"))
+        drift += [
+            (table, 'extra_index', f"{name} ({', '.join(index_columns)})")
+            for name, index_columns in indexes.items() if name not in expected.all_indexes
+        ]
+    return drift
+
+
+def add_column_if_missing(cursor, table: str, column: str) -> bool:
+    """Add a column as defined in storage/schema.py unless it exists"""
+    if column in live_columns(cursor, table):
+        return False
+    definition = dict(SCHEMA[table].columns)[column]
+    logger.info(f"Adding {table}.{column}")
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+
+def sync_indexes(cursor, table: str, drop_extra: bool = False) -> List[str]:
+    """Create or rebuild indexes to match storage/schema.py, in one ALTER
+
+    Indexes the schema doesn't know are kept unless ``drop_extra``; they
+    cost every write, so drop them once nothing else relies on them.
+    """
+    expected = SCHEMA[table]
+    indexes = live_indexes(cursor, table)
+    changes = []
+    for name, columns in expected.all_indexes.items():
+        if indexes.get(name) == columns:
+            continue
+        if name in indexes:
+            changes.append(f"DROP INDEX {name}")
+        kind = 'UNIQUE INDEX' if name in expected.unique else 'INDEX'
+        changes.append(f"ADD {kind} {name} ({', '.join(columns)})")
+    if drop_extra:
+        changes += [f"DROP INDEX {name}" for name in indexes if name not in expected.all_indexes]
+    if changes:
+        logger.info(f"Altering {table}: {', '.join(changes)}")
+        cursor.execute(f"ALTER TABLE {table} {', '.join(changes)}")
+    return changes
@@ -0,0 +1,268 @@
+import os
+import csv
+import gzip
+import logging
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+import pymysql
+from database import get_db_connection
+from storage.mysql import select_columns
+
+logger = logging.getLogger(__name__)
+
+# Tables partitioned by month on submitted_at
+PARTITIONED_TABLES = ('user_registrations', 'feedback')
+
+# Months of empty partitions kept ready ahead of the current one
+PARTITION_PRECREATE_MONTHS = int(os.environ.get('PARTITION_PRECREATE_MONTHS', '3'))
+# Months of data kept online; older partitions are archived then dropped
+PARTITION_RETENTION_MONTHS = int(os.environ.get('PARTITION_RETENTION_MONTHS', '24'))
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', 'archive')
+ARCHIVE_FORMATS = ('csv.gz', 'parquet')
+
+# Catch-all partition for rows beyond the last pre-created month
+FUTURE_PARTITION = 'p_future'
+
+# Rows fetched per round trip while archiving a partition
+ARCHIVE_BATCH_SIZE = 10000
+
+
+def month_start(day: date) -> date:
+    """Return the first day of the month containing ``day``"""
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Return the first day of the month ``months`` after ``month``"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding rows submitted during ``month``"""
+    return f"p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Month held by a partition, or None for the catch-all partition"""
+    try:
+        return datetime.strptime(name, 'p%Y%m').date()
+    except ValueError:
+        return None
+
+
+def partition_definition(month: date) -> str:
+    """SQL definition of the monthly partition for ``month``
+
+    submitted_at is a TIMESTAMP, which MySQL only range-partitions through
+    UNIX_TIMESTAMP(); queries filtering on submitted_at still get pruned.
+    """
+    boundary = add_months(month, 1)
+    return (f"PARTITION {partition_name(month)} "
+            f"VALUES LESS THAN (UNIX_TIMESTAMP('{boundary:%Y-%m-%d} 00:00:00'))")
+
+
+def future_partition_definition() -> str:
+    return f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE"
+
+
+def get_partitions(cursor, table: str) -> List[str]:
+    """Return the partition names of a table in order (empty if unpartitioned)"""
+    cursor.execute("""
+        SELECT PARTITION_NAME
+        FROM INFORMATION_SCHEMA.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def partition_table(table: str, today: Optional[date] = None) -> bool:
+    """Convert a table to monthly RANGE partitions on submitted_at
+
+    MySQL requires the partitioning column in every unique key, so the
+    primary key becomes (id, submitted_at); id stays AUTO_INCREMENT and
+    unique in practice. Returns False if the table was already partitioned.
+    """
+    current = month_start(today or date.today())
+
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        if get_partitions(cursor, table):
+            logger.info(f"{table} is already partitioned")
+            return False
+
+        cursor.execute(f"SELECT MIN(submitted_at) FROM {table}")
+        oldest = cursor.fetchone()[0]
+        first = month_start(oldest.date()) if oldest else current
+        last = add_months(current, PARTITION_PRECREATE_MONTHS)
+
+        months = []
+        month = first
+        while month <= last:
+            months.append(month)
+            month = add_months(month, 1)
+
+        definitions = [partition_definition(m) for m in months] + [future_partition_definition()]
+        logger.info(f"Partitioning {table} into {len(months)} monthly partitions "
+                    f"({partition_name(first)} to {partition_name(last)})")
+
+        # Rebuilds the table; run during a quiet period
+        cursor.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, submitted_at)")
+        cursor.execute(f"ALTER TABLE {table} PARTITION BY RANGE (UNIX_TIMESTAMP(submitted_at)) "
+                       f"({', '.join(definitions)})")
+        connection.commit()
+        return True
+
+
+def precreate_partitions(table: str, today: Optional[date] = None) -> List[str]:
+    """Split the catch-all partition so the coming months have their own"""
+    target = add_months(month_start(today or date.today()), PARTITION_PRECREATE_MONTHS)
+
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        existing = [m for m in (partition_month(p) for p in get_partitions(cursor, table)) if m]
+        if not existing:
+            raise Exception(f"{table} is not partitioned. Run 'manage_partitions.py init' first.")
+
+        months = []
+        month = add_months(max(existing), 1)
+        while month <= target:
+            months.append(month)
+            month = add_months(month, 1)
+
+        if months:
+            # p_future is normally empty, so this only rewrites metadata
+            definitions = [partition_definition(m) for m in months] + [future_partition_definition()]
+            cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} "
+                           f"INTO ({', '.join(definitions)})")
+            connection.commit()
+            logger.info(f"Created {table} partitions: {', '.join(partition_name(m) for m in months)}")
+
+        return [partition_name(m) for m in months]
+
+
+def _archive_path(table: str, partition: str, archive_format: str) -> str:
+    directory = os.path.join(ARCHIVE_DIR, table)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{table}_{partition}.{archive_format}")
+
+
+def _write_csv_gz(cursor, path: str) -> int:
+    rows_written = 0
+    with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([column[0] for column in cursor.description])
+        while True:
+            rows = cursor.fetchmany(ARCHIVE_BATCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            rows_written += len(rows)
+    return rows_written
+
+
+def _write_parquet(cursor, path: str) -> int:
+    # Optional dependency, only needed for Parquet archives
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("Parquet archives require pyarrow (pip install pyarrow)")
+
+    integer_types = {
+        pymysql.constants.FIELD_TYPE.TINY, pymysql.constants.FIELD_TYPE.SHORT,
+        pymysql.constants.FIELD_TYPE.LONG, pymysql.constants.FIELD_TYPE.LONGLONG,
+        pymysql.constants.FIELD_TYPE.INT24,
+    }
+    time_types = {pymysql.constants.FIELD_TYPE.TIMESTAMP, pymysql.constants.FIELD_TYPE.DATETIME}
+    fields = []
+    for column in cursor.description:
+        if column[1] in integer_types:
+            fields.append(pa.field(column[0], pa.int64()))
+        elif column[1] in time_types:
+            fields.append(pa.field(column[0], pa.timestamp('us')))
+        else:
+            fields.append(pa.field(column[0], pa.string()))
+    schema = pa.schema(fields)
+
+    rows_written = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        while True:
+            rows = cursor.fetchmany(ARCHIVE_BATCH_SIZE)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, fields)],
+                schema=schema
+            ))
+            rows_written += len(rows)
+    return rows_written
+
+
+def archive_partition(table: str, partition: str, archive_format: str = 'csv.gz') -> Tuple[str, int]:
+    """Write a partition's rows to a compressed file, then drop the partition
+
+    The partition is only dropped once the file is complete and holds as many
+    rows as the partition did.
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format '{archive_format}'")
+
+    path = _archive_path(table, partition, archive_format)
+    partial_path = path + '.partial'
+
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {table} PARTITION ({partition})")
+        expected = cursor.fetchone()[0]
+
+        # Unbuffered cursor streams the partition instead of loading it in memory
+        stream = connection.cursor(pymysql.cursors.SSCursor)
+        try:
+            # Archives hold user agent strings, not ids into user_agents
+            stream.execute(
+                f"SELECT {select_columns(table)} FROM {table} PARTITION ({partition}) t "
+                f"LEFT JOIN user_agents ua ON ua.id = t.user_agent_id ORDER BY t.id"
+            )
+            if archive_format == 'parquet':
+                written = _write_parquet(stream, partial_path)
+            else:
+                written = _write_csv_gz(stream, partial_path)
+        finally:
+            stream.close()
+
+        if written != expected:
+            raise Exception(f"Archived {written} rows from {table}.{partition} but expected {expected}")
+
+        os.replace(partial_path, path)
+        cursor.execute(f"ALTER TABLE {table} DROP PARTITION {partition}")
+        connection.commit()
+
+    logger.info(f"Archived {written} rows from {table}.{partition} to {path}")
+    return path, written
+
+
+def archive_expired_partitions(table: str, archive_format: str = 'csv.gz',
+                               today: Optional[date] = None) -> List[str]:
+    """Archive and drop partitions older than the retention window"""
+    cutoff = add_months(month_start(today or date.today()), -PARTITION_RETENTION_MONTHS)
+
+    with get_db_connection() as connection:
+        partitions = get_partitions(connection.cursor(), table)
+
+    archived = []
+    for partition in partitions:
+        month = partition_month(partition)
+        if month is not None and month < cutoff:
+            path, _ = archive_partition(table, partition, archive_format)
+            archived.append(path)
+    return archived
+
+
+def maintain_partitions(archive_format: str = 'csv.gz', today: Optional[date] = None):
+    """Pre-create upcoming partitions and archive expired ones for every table"""
+    for table in PARTITIONED_TABLES:
+        precreate_partitions(table, today)
+        archive_expired_partitions(table, archive_format, today)
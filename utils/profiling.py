@@ -0,0 +1,268 @@
+import io
+import os
+import re
+import sys
+import uuid
+import pstats
+import cProfile
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from routers.auth import verify_admin_api_key
+
+logger = logging.getLogger(__name__)
+
+# Where per-request profiles are stored, and how many are kept
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join('instance', 'profiles'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '50'))
+# Seconds between samples of the always-on sampler (0 disables it)
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', '0.1'))
+# Seconds between samples while sampling a single request
+PROFILE_REQUEST_INTERVAL = 0.001
+# Distinct stacks kept before further ones are counted as [other]
+PROFILE_MAX_STACKS = 20000
+
+# Request modes: deterministic cProfile (pstats) or stack sampling (folded stacks)
+PROFILE_MODES = {'cprofile': 'pstats', 'sample': 'folded'}
+PROFILE_ID_PATTERN = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{8}\.(pstats|folded)$')
+
+# Innermost frames of threads that are waiting rather than working
+IDLE_FRAMES = {
+    ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'), ('selectors.py', 'select'),
+    ('base_events.py', 'run_forever'), ('runners.py', 'run'),
+    ('thread.py', '_worker'),
+}
+
+
+def folded_stack(frame) -> Optional[str]:
+    """Stack of ``frame`` in flamegraph folded form (root first), None if idle"""
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+        return None
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_qualname}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Counts the stacks of busy threads, sampled from a background thread
+
+    Unlike cProfile this sees every thread, including threadpool workers,
+    and costs one ``sys._current_frames()`` walk per interval.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        with self._lock:
+            self.samples += 1
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = folded_stack(frame)
+                if stack is None:
+                    continue
+                if stack not in self.counts and len(self.counts) >= PROFILE_MAX_STACKS:
+                    stack = '[other]'
+                self.counts[stack] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+            self.samples = 0
+
+    def collapsed(self) -> str:
+        """Folded stacks with counts, the input format of flamegraph.pl and speedscope"""
+        with self._lock:
+            return ''.join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+    def hot_functions(self, limit: int = 50) -> List[Tuple[str, int, int]]:
+        """(function, self samples, total samples) for the busiest functions"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        with self._lock:
+            for stack, count in self.counts.items():
+                names = stack.split(';')
+                own[names[-1]] += count
+                for name in set(names):
+                    total[name] += count
+        return [(name, own[name], count) for name, count in total.most_common(limit)]
+
+    def report(self, limit: int = 50) -> str:
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms",
+                 f"{'self':>8} {'total':>8}  function"]
+        for name, own, total in self.hot_functions(limit):
+            lines.append(f"{own:>8} {total:>8}  {name}")
+        return '\n'.join(lines) + '\n'
+
+
+hot_path_sampler = StackSampler(PROFILE_SAMPLE_INTERVAL)
+
+
+def start_profiling() -> None:
+    """Start the always-on sampler for this worker"""
+    if PROFILE_SAMPLE_INTERVAL > 0:
+        hot_path_sampler.start()
+        logger.info(f'Sampling hot paths every {PROFILE_SAMPLE_INTERVAL * 1000:g} ms')
+
+
+def stop_profiling() -> None:
+    hot_path_sampler.stop()
+
+
+def profile_path(profile_id: str) -> str:
+    """Path of a stored profile; rejects ids that could escape PROFILE_DIR"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        raise ValueError(f"Invalid profile id '{profile_id}'")
+    return os.path.join(PROFILE_DIR, profile_id)
+
+
+def list_profiles() -> List[Dict[str, object]]:
+    """Stored profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if PROFILE_ID_PATTERN.match(name):
+            stat = os.stat(os.path.join(PROFILE_DIR, name))
+            profiles.append({
+                'id': name,
+                'format': name.rsplit('.', 1)[1],
+                'size': stat.st_size,
+                'created_at': datetime.fromtimestamp(stat.st_mtime),
+            })
+    return sorted(profiles, key=lambda p: p['id'], reverse=True)
+
+
+def profile_report(profile_id: str, limit: int = 50) -> str:
+    """Human-readable summary of a stored profile"""
+    path = profile_path(profile_id)
+    if profile_id.endswith('.folded'):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
+
+
+def _save_profile(profile_id: str, profiler: Optional[cProfile.Profile], sampler: Optional[StackSampler]) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = profile_path(profile_id)
+    if profiler is not None:
+        profiler.dump_stats(path)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(sampler.collapsed())
+
+    # Ids sort by time, so the oldest profiles are dropped first
+    stored = sorted(name for name in os.listdir(PROFILE_DIR) if PROFILE_ID_PATTERN.match(name))
+    for name in stored[:-PROFILE_KEEP]:
+        os.remove(os.path.join(PROFILE_DIR, name))
+
+
+def _requested_mode(scope) -> Optional[str]:
+    """Profiling mode asked for by an admin, from ``X-Profile`` or ``?profile=``"""
+    headers = dict(scope['headers'])
+    mode = headers.get(b'x-profile', b'').decode('latin-1').strip().lower()
+    if not mode:
+        query = scope.get('query_string', b'').decode('latin-1')
+        match = re.search(r'(?:^|&)profile=(\w+)', query)
+        mode = match.group(1).lower() if match else ''
+    if mode not in PROFILE_MODES:
+        return None
+    try:
+        verify_admin_api_key(headers.get(b'x-api-key', b'').decode('latin-1') or None)
+    except HTTPException:
+        return None
+    return mode
+
+
+_profile_lock = threading.Lock()
+
+
+class ProfilingMiddleware:
+    """Profile single requests on demand for admins
+
+    A request carrying a valid admin key and ``X-Profile: cprofile`` (or
+    ``sample``) runs under the profiler, including its streamed body. The
+    profile is stored under PROFILE_DIR and its id returned in the
+    ``X-Profile-Id`` response header. cProfile only sees the event loop
+    thread, and anything else running on it meanwhile; ``sample`` also
+    covers threadpool work. One request is profiled at a time per worker.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = _requested_mode(scope) if scope['type'] == 'http' else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not _profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, self._with_header(send, b'x-profile-status', b'busy'))
+            return
+
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.{PROFILE_MODES[mode]}"
+        profiler = cProfile.Profile() if mode == 'cprofile' else None
+        sampler = StackSampler(PROFILE_REQUEST_INTERVAL) if mode == 'sample' else None
+        try:
+            if profiler is not None:
+                profiler.enable()
+            else:
+                sampler.start()
+            try:
+                await self.app(scope, receive, self._with_header(send, b'x-profile-id', profile_id.encode()))
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                else:
+                    sampler.stop()
+                try:
+                    await run_in_threadpool(_save_profile, profile_id, profiler, sampler)
+                    logger.info('Stored %s profile %s for %s', mode, profile_id, scope['path'])
+                except Exception as e:
+                    logger.error(f'Error storing profile {profile_id}: {str(e)}')
+        finally:
+            _profile_lock.release()
+
+    @staticmethod
+    def _with_header(send, name: bytes, value: bytes):
+        async def wrapped(message):
+            if message['type'] == 'http.response.start':
+                message = {**message, 'headers': [*message.get('headers', []), (name, value)]}
+            await send(message)
+        return wrapped
@@ -0,0 +1,162 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+import pymysql
+from storage.base import TABLE_COLUMNS
+from storage.mysql import MySQLRepository
+from storage.schema import SCHEMA
+from storage.sharded import ID_BUCKET_WIDTH
+from utils.export import EXPORT_CHUNK_ROWS, EXPORT_TABLES
+from utils.migrations import live_indexes
+
+logger = logging.getLogger(__name__)
+
+# Estimated rows above which a full scan, filesort or temporary table fails a plan
+PLAN_MAX_SCAN_ROWS = int(os.environ.get('PLAN_MAX_SCAN_ROWS', '1000'))
+
+# Offset of the deep page checked, like a user paging far back in the admin list
+DEEP_PAGE_OFFSET = 10000
+# Rows per page of the admin list
+LIST_PAGE_SIZE = 50
+
+
+class PlannedQuery:
+    """A statement the application runs, with the columns an index could serve"""
+
+    def __init__(self, name: str, table: str, sql: str, params: tuple = (),
+                 filter_columns: Sequence[str] = (), order_columns: Sequence[str] = ()):
+        self.name = name
+        self.table = table
+        self.sql = sql
+        self.params = params
+        self.filter_columns = tuple(filter_columns)
+        self.order_columns = tuple(order_columns)
+
+
+def application_queries(now: Optional[datetime] = None) -> List[PlannedQuery]:
+    """The reads behind models.py, the admin lists and the exports, for both tables"""
+    from models import UserRegistration, Feedback
+
+    now = now or datetime.now()
+    since = now - timedelta(days=30)
+    summary_fields = {'user_registrations': UserRegistration.SUMMARY_FIELDS, 'feedback': Feedback.SUMMARY_FIELDS}
+    by_date = ('submitted_at',)
+    newest_first = ('submitted_at', 'id')
+
+    queries = []
+    for table in TABLE_COLUMNS:
+        repository = MySQLRepository(table)
+        queries += [
+            PlannedQuery(f'{table}: created row', table, *repository.row_query(1)),
+            PlannedQuery(f'{table}: last id', table, repository.last_id_query()),
+            PlannedQuery(f'{table}: count', table, *repository.count_query()),
+            PlannedQuery(f'{table}: count in date range', table, *repository.count_query(since, now),
+                         filter_columns=by_date),
+            PlannedQuery(f'{table}: first page', table, *repository.page_query(LIST_PAGE_SIZE, 0),
+                         order_columns=newest_first),
+            PlannedQuery(f'{table}: deep page', table,
+                         *repository.page_query(LIST_PAGE_SIZE, DEEP_PAGE_OFFSET),
+                         order_columns=newest_first),
+            PlannedQuery(f'{table}: summary page', table,
+                         *repository.page_query(LIST_PAGE_SIZE, 0, columns=summary_fields[table]),
+                         order_columns=newest_first),
+            PlannedQuery(f'{table}: page in date range', table,
+                         *repository.page_query(LIST_PAGE_SIZE, 0, since, now),
+                         filter_columns=by_date, order_columns=newest_first),
+            PlannedQuery(f'{table}: export bounds', table, *repository.bounds_query(since, now),
+                         filter_columns=by_date),
+            PlannedQuery(f'{table}: export range', table,
+                         *repository.range_query(1, 1 + EXPORT_CHUNK_ROWS, since, now,
+                                                 EXPORT_TABLES[table].columns),
+                         filter_columns=('id',), order_columns=('id',)),
+            PlannedQuery(f'{table}: sharded export histogram', table,
+                         *repository.id_histogram_query(ID_BUCKET_WIDTH, since, now),
+                         filter_columns=by_date),
+            PlannedQuery(f'{table}: stream export', table, *repository.stream_query(0),
+                         filter_columns=('id',), order_columns=('id',)),
+            PlannedQuery(f'{table}: locations in date range', table, *repository.location_count_query(since, now),
+                         filter_columns=by_date),
+        ]
+    return queries
+
+
+def explain(cursor, query: PlannedQuery) -> List[Dict[str, object]]:
+    cursor.execute(f"EXPLAIN {query.sql}", query.params)
+    return list(cursor.fetchall())
+
+
+def plan_problems(query: PlannedQuery, plan: List[Dict[str, object]],
+                  max_rows: int = PLAN_MAX_SCAN_ROWS) -> List[str]:
+    """What is wrong with a plan: large full scans, filesorts and temporary tables"""
+    problems = []
+    for step in plan:
+        table = step.get('table') or ''
+        # Derived tables are the already-limited page of ids
+        if table.startswith('<'):
+            continue
+        rows = step.get('rows') or 0
+        extra = step.get('Extra') or ''
+        if step.get('type') == 'ALL' and rows > max_rows:
+            problems.append(f"full scan of {table} (~{rows} rows)")
+        if 'Using filesort' in extra and rows > max_rows:
+            problems.append(f"filesort over ~{rows} rows of {table}")
+        if 'Using temporary' in extra and rows > max_rows:
+            problems.append(f"temporary table over ~{rows} rows of {table}")
+    return problems
+
+
+def suggest_index(query: PlannedQuery, indexes: Dict[str, Tuple[str, ...]]) -> Optional[str]:
+    """An index that would serve the query, unless an existing one already leads with its columns
+
+    Filter columns come first and the ORDER BY columns follow, so the index
+    both narrows the rows and returns them in order. InnoDB appends the
+    primary key to every secondary index, so a trailing ``id`` is dropped.
+    """
+    columns = list(query.filter_columns)
+    columns += [c for c in query.order_columns if c not in columns]
+    if columns and columns[-1] == 'id' and len(columns) > 1:
+        columns.pop()
+    if not columns or columns == ['id']:
+        return None
+    if any(list(existing[:len(columns)]) == columns for existing in indexes.values()):
+        return None
+    return f"ALTER TABLE {query.table} ADD INDEX idx_{'_'.join(columns)} ({', '.join(columns)})"
+
+
+def check_query_plans(connection, max_rows: int = PLAN_MAX_SCAN_ROWS,
+                      analyze: bool = False) -> List[Dict[str, object]]:
+    """EXPLAIN every application query and report problems and missing indexes
+
+    EXPLAIN row counts are estimates from table statistics, so run this
+    against a database of realistic size (see generate_data.py);
+    ``analyze`` refreshes the statistics first.
+    """
+    cursor = connection.cursor(pymysql.cursors.DictCursor)
+    plain = connection.cursor()
+    if analyze:
+        for table in TABLE_COLUMNS:
+            plain.execute(f"ANALYZE TABLE {table}")
+            plain.fetchall()
+    indexes = {table: live_indexes(plain, table) for table in TABLE_COLUMNS}
+
+    results = []
+    for query in application_queries():
+        plan = explain(cursor, query)
+        problems = plan_problems(query, plan, max_rows)
+        # A plan that only works thanks to an index the schema doesn't define
+        # will regress once 'migrate.py sync-indexes --drop-extra' runs
+        expected = SCHEMA[query.table].all_indexes
+        unmanaged = sorted({
+            step['key'] for step in plan
+            if step.get('key') and step['key'] != 'PRIMARY' and step.get('table') in ('t', query.table)
+            and step['key'] not in expected
+        })
+        results.append({
+            'name': query.name,
+            'plan': plan,
+            'problems': problems,
+            'unmanaged_indexes': unmanaged,
+            'suggestion': suggest_index(query, indexes[query.table]) if problems else None,
+        })
+    return results
@@ -0,0 +1,102 @@
+import os
+import time
+import fcntl
+import asyncio
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Also share export builds between workers through a lock file and result file
+SINGLE_FLIGHT_SHARED = os.environ.get('SINGLE_FLIGHT_SHARED', 'false').lower() == 'true'
+SINGLE_FLIGHT_DIR = os.environ.get('SINGLE_FLIGHT_DIR', os.path.join('instance', 'flights'))
+# Seconds a shared result file is kept before being cleaned up
+SINGLE_FLIGHT_FILE_TTL = 3600
+
+
+class SingleFlight:
+    """Runs identical concurrent calls once and hands every caller the result
+
+    The first caller for a key starts ``fn`` in the threadpool; callers that
+    arrive with the same key while it runs await the same future. Results are
+    shared objects, so callers must not modify them. The call carries on if
+    the caller that started it goes away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.shared = 0
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        future = self._flights.get(key)
+        if future is None:
+            future = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+            self._flights[key] = future
+            future.add_done_callback(lambda done: self._land(key, done))
+        else:
+            self.shared += 1
+            logger.debug('Joined in-flight call for %s', key)
+        return await asyncio.shield(future)
+
+    def _land(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._flights.get(key) is future:
+            del self._flights[key]
+        if not future.cancelled():
+            # Marks the error as seen even if every caller went away
+            future.exception()
+
+
+single_flight = SingleFlight()
+
+
+def _prune_results(directory: str) -> None:
+    cutoff = time.time() - SINGLE_FLIGHT_FILE_TTL
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith('.result') and os.path.getmtime(path) < cutoff:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def shared_build(key: str, build: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+    """Build bytes once for a burst of identical requests across workers
+
+    Callers take an exclusive lock per key. The holder builds and stores the
+    result; callers that were already waiting when it was stored read it
+    instead of building again. Without SINGLE_FLIGHT_SHARED this simply
+    calls ``build``. Runs blocking, so call it from a thread.
+    """
+    if not SINGLE_FLIGHT_SHARED:
+        return build()
+
+    os.makedirs(SINGLE_FLIGHT_DIR, exist_ok=True)
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    result_path = os.path.join(SINGLE_FLIGHT_DIR, name + '.result')
+    waiting_since = time.time()
+
+    with open(os.path.join(SINGLE_FLIGHT_DIR, name + '.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            try:
+                # Stored after this caller arrived, so built by the flight it joined
+                if os.path.getmtime(result_path) >= waiting_since:
+                    with open(result_path, 'rb') as f:
+                        logger.debug('Reused result built by another worker for %s', key)
+                        return f.read()
+            except FileNotFoundError:
+                pass
+
+            result = build()
+            if result is not None:
+                partial_path = f"{result_path}.{os.getpid()}.partial"
+                with open(partial_path, 'wb') as f:
+                    f.write(result)
+                os.replace(partial_path, result_path)
+                _prune_results(SINGLE_FLIGHT_DIR)
+            return result
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,230 @@
+import os
+import gzip
+import time
+import hashlib
+import logging
+import mimetypes
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Optional
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+logger = logging.getLogger(__name__)
+
+# Directory served under /static, which also holds the admin dashboard
+STATIC_DIR = os.environ.get('STATIC_DIR', 'templates')
+# Seconds between checks of a file for changes on disk (0 checks on every request)
+STATIC_CHECK_INTERVAL = float(os.environ.get('STATIC_CHECK_INTERVAL', '2'))
+# Cache lifetime of assets requested with their current ?v= content hash
+STATIC_IMMUTABLE_MAX_AGE = int(os.environ.get('STATIC_IMMUTABLE_MAX_AGE', str(365 * 24 * 3600)))
+# Cache lifetime of assets requested without a version; revalidated with the ETag afterwards
+STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', '300'))
+
+# Files smaller than this gain nothing from compression
+MIN_COMPRESS_BYTES = 256
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml', 'image/svg+xml')
+# Preferred first when a client accepts several
+ENCODINGS = ('br', 'gzip')
+
+
+def _brotli():
+    # Optional dependency: without it assets are only precompressed with gzip
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+class StaticAsset:
+    """One file held in memory with its precompressed variants"""
+
+    def __init__(self, path: str, content: bytes, modified: float, mtime_ns: int, size: int):
+        self.path = path
+        # Responses add "; charset=utf-8" to text types
+        self.media_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.version = hashlib.sha256(content).hexdigest()[:16]
+        self.last_modified = formatdate(modified, usegmt=True)
+        self.modified = int(modified)
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.checked = time.monotonic()
+        self.bodies: Dict[str, bytes] = {'identity': content}
+        if len(content) >= MIN_COMPRESS_BYTES and self.media_type.startswith(COMPRESSIBLE_TYPES):
+            self._precompress(content)
+
+    def _precompress(self, content: bytes) -> None:
+        variants = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+        brotli = _brotli()
+        if brotli is not None:
+            variants['br'] = brotli.compress(content, quality=11)
+        # A variant is only kept when it is actually smaller
+        self.bodies.update({name: body for name, body in variants.items() if len(body) < len(content)})
+
+    def etag(self, encoding: str) -> str:
+        # Each encoding is its own representation, so caches never mix them up
+        return f'"{self.version}"' if encoding == 'identity' else f'"{self.version}-{encoding}"'
+
+    def encoding_for(self, accept_encoding: str) -> str:
+        """The smallest stored variant the client accepts"""
+        accepted = set()
+        for part in accept_encoding.lower().split(','):
+            name, _, params = part.strip().partition(';')
+            if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                continue
+            accepted.add(name.strip())
+        for encoding in ENCODINGS:
+            if encoding in self.bodies and (encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
+
+
+class AssetStore:
+    """Files of a directory served from memory with ETags and precompressed bodies
+
+    Each file is read and compressed once; a request re-reads it only when
+    the file's modification time or size changed, checking at most every
+    ``STATIC_CHECK_INTERVAL`` seconds.
+    """
+
+    def __init__(self, directory: str = STATIC_DIR, check_interval: float = STATIC_CHECK_INTERVAL):
+        self.directory = os.path.abspath(directory)
+        self.check_interval = check_interval
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def _full_path(self, path: str) -> Optional[str]:
+        full_path = os.path.realpath(os.path.join(self.directory, path))
+        # Reject anything that resolves outside the directory
+        if os.path.commonpath([full_path, self.directory]) != self.directory:
+            return None
+        return full_path
+
+    def _read(self, path: str, full_path: str) -> Optional[StaticAsset]:
+        try:
+            with open(full_path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                content = f.read()
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return None
+        return StaticAsset(path, content, stat.st_mtime, stat.st_mtime_ns, stat.st_size)
+
+    def load(self) -> int:
+        """Read and compress every file of the directory, returning how many"""
+        loaded = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, self.directory).replace(os.sep, '/')
+                asset = self._read(path, full_path)
+                if asset is not None:
+                    with self._lock:
+                        self._assets[path] = asset
+                    loaded += 1
+        logger.info(f'Loaded {loaded} static files from {self.directory}')
+        return loaded
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """The current version of a file, re-read if it changed on disk"""
+        path = path.lstrip('/')
+        asset = self._assets.get(path)
+        now = time.monotonic()
+        if asset is not None and now - asset.checked < self.check_interval:
+            return asset
+
+        full_path = self._full_path(path)
+        if full_path is None:
+            return None
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            stat = None
+        if stat is None or not os.path.isfile(full_path):
+            with self._lock:
+                self._assets.pop(path, None)
+            return None
+        if asset is not None and (stat.st_mtime_ns, stat.st_size) == (asset.mtime_ns, asset.size):
+            asset.checked = now
+            return asset
+
+        asset = self._read(path, full_path)
+        if asset is not None:
+            logger.info(f'Reloaded static file {path}')
+            with self._lock:
+                self._assets[path] = asset
+        return asset
+
+    def url(self, path: str, prefix: str = '/static') -> str:
+        """A versioned URL of a file, cacheable for ``STATIC_IMMUTABLE_MAX_AGE``"""
+        asset = self.get(path)
+        return f"{prefix}/{path}" + (f"?v={asset.version}" if asset is not None else '')
+
+    def response(self, request: Request, path: str, cache_control: Optional[str] = None) -> Response:
+        """Serve a file, answering conditional requests with 304 Not Modified"""
+        asset = self.get(path)
+        if asset is None:
+            return PlainTextResponse('Not Found', status_code=404)
+
+        if cache_control is None:
+            if request.query_params.get('v') == asset.version:
+                cache_control = f'public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable'
+            else:
+                cache_control = f'public, max-age={STATIC_MAX_AGE}'
+        encoding = asset.encoding_for(request.headers.get('accept-encoding', ''))
+        headers = {
+            'ETag': asset.etag(encoding),
+            'Last-Modified': asset.last_modified,
+            'Cache-Control': cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+        if _not_modified(request, asset):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        # The server drops the body of HEAD requests but keeps its Content-Length
+        return Response(asset.bodies[encoding], media_type=asset.media_type, headers=headers)
+
+    def stats(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [
+                {'path': asset.path, 'version': asset.version,
+                 'bytes': {name: len(body) for name, body in asset.bodies.items()}}
+                for asset in self._assets.values()
+            ]
+
+
+def _not_modified(request: Request, asset: StaticAsset) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        # Weak comparison: W/ prefixes added by proxies still match
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        # The body is the same whichever encoding the client cached
+        return '*' in tags or any(asset.etag(encoding) in tags for encoding in asset.bodies)
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= asset.modified
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class StaticAssets:
+    """ASGI app serving an :class:`AssetStore`, mounted like ``StaticFiles``"""
+
+    def __init__(self, store: AssetStore):
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+        if request.method not in ('GET', 'HEAD'):
+            response = PlainTextResponse('Method Not Allowed', status_code=405, headers={'Allow': 'GET, HEAD'})
+        else:
+            response = self.store.response(request, scope['path'])
+        await response(scope, receive, send)
+
+
+# Shared by every request of this worker
+static_assets = AssetStore()
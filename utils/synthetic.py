@@ -0,0 +1,306 @@
+import random
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Rating fields; each has an ``<field>_issue`` text, required below 3
+RATING_FIELDS = (
+    'visual_design', 'ease_of_navigation', 'mobile_responsiveness',
+    'overall_satisfaction', 'ease_of_tasks', 'quality_of_services',
+)
+
+# Free-text answers and how likely a happy respondent is to fill each in;
+# unhappy respondents write more
+TEXT_FIELDS = {
+    'like_most': 0.7,
+    'improvements': 0.45,
+    'features': 0.4,
+    'legal_challenges': 0.3,
+    'additional_comments': 0.2,
+}
+
+# Overall mood of a respondent, skewed positive like most product surveys
+MOOD_WEIGHTS = {1: 5, 2: 8, 3: 17, 4: 36, 5: 34}
+# Each rating deviates from the respondent's mood by this much
+RATING_NOISE = (-1, 0, 0, 0, 0, 1)
+# Chance of skipping a single rating question
+RATING_SKIP = 0.03
+
+# Traffic by hour of day (local time): quiet nights, busy office hours and evenings
+HOUR_WEIGHTS = (
+    2, 1, 1, 1, 1, 2, 4, 7, 10, 13, 15, 16,
+    15, 14, 14, 13, 12, 12, 13, 15, 16, 14, 9, 5,
+)
+WEEKEND_FACTOR = 0.6
+# The last month sees this many times the traffic of the first
+TRAFFIC_GROWTH = 3.0
+# Share of days with a campaign, and how much busier those days are
+CAMPAIGN_DAY_RATE = 0.03
+CAMPAIGN_FACTOR = (3, 8)
+
+FIRST_NAMES = (
+    'Aarav', 'Aditi', 'Aditya', 'Ananya', 'Arjun', 'Deepika', 'Divya', 'Farhan', 'Gaurav', 'Ishaan',
+    'Kavya', 'Karan', 'Lakshmi', 'Manish', 'Meera', 'Mohammed', 'Neha', 'Nikhil', 'Pooja', 'Pranav',
+    'Priya', 'Rahul', 'Riya', 'Rohan', 'Sakshi', 'Sanjay', 'Shreya', 'Siddharth', 'Sneha', 'Suresh',
+    'Tanvi', 'Varun', 'Vikram', 'Yash', 'Zoya', 'Harpreet', 'Joseph', 'Fatima', 'Anil', 'Kiran',
+)
+LAST_NAMES = (
+    'Sharma', 'Verma', 'Gupta', 'Singh', 'Kumar', 'Patel', 'Shah', 'Mehta', 'Iyer', 'Nair',
+    'Reddy', 'Rao', 'Das', 'Banerjee', 'Chatterjee', 'Mukherjee', 'Joshi', 'Kulkarni', 'Desai', 'Pillai',
+    'Khan', 'Ahmed', 'Fernandes', 'DSouza', 'Gill', 'Sandhu', 'Menon', 'Bhat', 'Agarwal', 'Jain',
+)
+EMAIL_DOMAINS = {
+    'gmail.com': 62, 'yahoo.com': 9, 'outlook.com': 8, 'hotmail.com': 5, 'rediffmail.com': 3,
+    'icloud.com': 3, 'lawfirm.in': 4, 'nls.ac.in': 2, 'nlu.edu.in': 2, 'protonmail.com': 2,
+}
+GENDERS = {'Male': 50, 'Female': 41, 'Other': 2, 'Prefer not to say': 4, None: 3}
+PROFESSIONS = {
+    'Advocate': 30, 'Law Student': 28, 'Legal Consultant': 10, 'Corporate Lawyer': 8,
+    'Paralegal': 5, 'Judge': 1, 'Law Professor': 3, 'Legal Researcher': 4,
+    'Company Secretary': 3, 'Other': 6, None: 2,
+}
+USER_TYPES = {'USER': 85, 'Creator': 15}
+CONTACT_WILLING = {'yes': 30, 'no': 55, None: 15}
+
+# Address blocks of large Indian ISPs and clouds, by share of traffic
+IPV4_PREFIXES = {
+    '49.36': 14, '106.51': 12, '117.96': 10, '223.181': 10, '157.32': 8, '103.21': 8,
+    '182.69': 7, '122.161': 6, '27.60': 6, '59.89': 5, '14.139': 5, '13.232': 3,
+}
+IPV6_PREFIXES = ('2401:4900', '2409:40c0', '2405:201')
+IPV6_SHARE = 0.12
+
+# (template, versions, weight) of browsers; each version is a distinct user agent
+USER_AGENT_FAMILIES = (
+    ('Mozilla/5.0 (Linux; Android {os}; {device}) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/{v}.0.0.0 Mobile Safari/537.36', range(108, 131), 38),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/{v}.0.0.0 Safari/537.36', range(108, 131), 24),
+    ('Mozilla/5.0 (iPhone; CPU iPhone OS {ios} like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/{v}.0 Mobile/15E148 Safari/604.1', range(15, 19), 12),
+    ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+     'Version/{v}.0 Safari/605.1.15', range(15, 19), 5),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/{v}.0.0.0 Safari/537.36 Edg/{v}.0.0.0', range(110, 131), 8),
+    ('Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:{v}.0) Gecko/20100101 Firefox/{v}.0', range(110, 133), 5),
+    ('Mozilla/5.0 (Linux; Android {os}; {device}) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'SamsungBrowser/{v}.0 Chrome/117.0.0.0 Mobile Safari/537.36', range(20, 27), 5),
+    ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+     'Chrome/{v}.0.0.0 Safari/537.36', range(108, 131), 2),
+    ('curl/{v}.0.1', range(7, 9), 1),
+)
+ANDROID_DEVICES = ('SM-A546E', 'SM-M336BU', 'RMX3630', 'CPH2487', 'V2202', 'Redmi Note 12', 'Pixel 7', 'K')
+IOS_VERSIONS = ('15_8', '16_6', '17_4', '17_5_1', '18_0')
+
+# Sentence fragments for free-text answers, per field
+TEXT_PHRASES = {
+    'like_most': (
+        'The clean and simple layout', 'How quickly I could find case law', 'The drafting templates',
+        'Search results are relevant', 'Works well on my phone', 'The community of lawyers',
+        'Clear explanations of procedure', 'Being able to save research for later',
+    ),
+    'improvements': (
+        'Search could be faster on large queries', 'Add more High Court judgments',
+        'The dashboard feels cluttered', 'Filters reset when going back',
+        'Please add Hindi and regional language support', 'Notifications are too frequent',
+        'Document upload fails on slow connections', 'Pricing should be clearer',
+    ),
+    'features': (
+        'Citation export in common formats', 'A cause list tracker', 'Offline access to saved documents',
+        'Collaboration with juniors on drafts', 'Alerts for new judgments on saved topics',
+        'Integration with e-courts filing', 'A mobile app', 'Voice search',
+    ),
+    'legal_challenges': (
+        'Keeping track of hearing dates across courts', 'Finding recent tribunal orders',
+        'Drafting under tight deadlines', 'Access to affordable research tools',
+        'Clients expect quick updates on their matters', 'Managing documents across many cases',
+    ),
+    'additional_comments': (
+        'Keep up the good work', 'Looking forward to the next release',
+        'I would recommend this to colleagues', 'Happy to help test new features',
+        'Support replied quickly when I had a problem', 'Thank you',
+    ),
+}
+ISSUE_PHRASES = {
+    'visual_design': ('Colours make the text hard to read', 'Too much going on on the home page',
+                      'Fonts are too small', 'Icons are not self-explanatory'),
+    'ease_of_navigation': ('Hard to find my saved documents', 'Menus are confusing',
+                           'Back button loses my place', 'Too many clicks to reach search'),
+    'mobile_responsiveness': ('Tables overflow on my phone', 'Buttons are too small to tap',
+                              'The page keeps reloading on mobile', 'Forms are cut off on small screens'),
+    'overall_satisfaction': ('Did not meet my expectations', 'Too many bugs', 'Missing the content I need',
+                             'Not worth the price'),
+    'ease_of_tasks': ('Drafting takes longer than on paper', 'Search returns irrelevant results',
+                      'Uploading documents often fails', 'Could not export my research'),
+    'quality_of_services': ('Support took days to reply', 'Judgments are missing or outdated',
+                            'Summaries contain mistakes', 'Frequent downtime'),
+}
+CONNECTORS = ('. ', '. Also, ', '; ', '. ', ', and ')
+
+
+def _cumulative(weights: Dict[Any, float]) -> Tuple[List[Any], List[float]]:
+    return list(weights), list(accumulate(weights.values()))
+
+
+class SyntheticData:
+    """Deterministic generator of realistic registrations and feedback
+
+    The same seed, period and counts always produce the same rows, so runs
+    at scale can be compared. Each table draws from its own random stream,
+    and rows come out in ``submitted_at`` order, spread over ``months``
+    months with growing traffic, weekly and daily cycles and occasional
+    campaign spikes. Generated feedback always passes ``FeedbackCreate``.
+    """
+
+    def __init__(self, seed: int = 42, months: int = 12, end: Optional[date] = None):
+        self.seed = seed
+        self.end = end or date.today()
+        self.start = self.end - timedelta(days=max(1, round(months * 30.44)))
+
+        rng = random.Random(f'{seed}:user_agents')
+        self.user_agents: List[str] = []
+        agent_weights: List[float] = []
+        for template, versions, weight in USER_AGENT_FAMILIES:
+            versions = list(versions)
+            for rank, version in enumerate(reversed(versions)):
+                self.user_agents.append(template.format(
+                    v=version, os=rng.randint(10, 14), device=rng.choice(ANDROID_DEVICES),
+                    ios=rng.choice(IOS_VERSIONS),
+                ))
+                # Recent versions dominate, with a long tail of old ones
+                agent_weights.append(weight / (rank + 1) ** 1.2)
+        self._agent_weights = list(accumulate(agent_weights))
+
+        self._genders = _cumulative(GENDERS)
+        self._professions = _cumulative(PROFESSIONS)
+        self._user_types = _cumulative(USER_TYPES)
+        self._domains = _cumulative(EMAIL_DOMAINS)
+        self._contact = _cumulative(CONTACT_WILLING)
+        self._moods = _cumulative(MOOD_WEIGHTS)
+        self._prefixes = _cumulative(IPV4_PREFIXES)
+        self._hours = list(accumulate(HOUR_WEIGHTS))
+
+    def _choice(self, rng: random.Random, table: Tuple[List[Any], List[float]]) -> Any:
+        return rng.choices(table[0], cum_weights=table[1])[0]
+
+    def timestamps(self, rng: random.Random, count: int) -> Iterator[datetime]:
+        """``count`` ascending timestamps between start and end"""
+        days = (self.end - self.start).days
+        weights = []
+        for offset in range(days):
+            day = self.start + timedelta(days=offset)
+            weight = 1 + (TRAFFIC_GROWTH - 1) * offset / days
+            if day.weekday() >= 5:
+                weight *= WEEKEND_FACTOR
+            if rng.random() < CAMPAIGN_DAY_RATE:
+                weight *= rng.uniform(*CAMPAIGN_FACTOR)
+            weights.append(weight)
+
+        # Largest remainders make the per-day counts add up to exactly ``count``
+        total = sum(weights)
+        exact = [count * weight / total for weight in weights]
+        per_day = [int(share) for share in exact]
+        by_remainder = sorted(range(days), key=lambda i: exact[i] - per_day[i], reverse=True)
+        for i in by_remainder[:count - sum(per_day)]:
+            per_day[i] += 1
+
+        hours = list(range(24))
+        for offset, day_count in enumerate(per_day):
+            if not day_count:
+                continue
+            midnight = datetime.combine(self.start + timedelta(days=offset), datetime.min.time())
+            seconds = sorted(
+                hour * 3600 + rng.randrange(3600)
+                for hour in rng.choices(hours, cum_weights=self._hours, k=day_count)
+            )
+            for second in seconds:
+                yield midnight + timedelta(seconds=second)
+
+    def _ip_address(self, rng: random.Random) -> str:
+        if rng.random() < IPV6_SHARE:
+            return f"{rng.choice(IPV6_PREFIXES)}:{rng.getrandbits(16):x}:{rng.getrandbits(16):x}::{rng.getrandbits(16):x}"
+        return f"{self._choice(rng, self._prefixes)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+
+    def _user_agent(self, rng: random.Random) -> Optional[str]:
+        if rng.random() < 0.01:
+            return None
+        return rng.choices(self.user_agents, cum_weights=self._agent_weights)[0]
+
+    def _email(self, rng: random.Random, first: str, last: str, number: int) -> str:
+        first, last = first.lower(), last.lower()
+        pattern = rng.randrange(4)
+        if pattern == 0:
+            local = f"{first}.{last}{number}"
+        elif pattern == 1:
+            local = f"{first}{last[0]}{number}"
+        elif pattern == 2:
+            local = f"{first}_{number}"
+        else:
+            local = f"{last}.{first}{number}"
+        return f"{local}@{self._choice(rng, self._domains)}"
+
+    def _text(self, rng: random.Random, phrases: Sequence[str], long_tail: float = 0.05) -> str:
+        # Mostly a sentence or two, occasionally a long paragraph
+        sentences = 1
+        while rng.random() < 0.35:
+            sentences += 1
+        if rng.random() < long_tail:
+            sentences += rng.randrange(5, 25)
+        parts = [rng.choice(phrases)]
+        for _ in range(sentences - 1):
+            connector, phrase = rng.choice(CONNECTORS), rng.choice(phrases)
+            if not connector.startswith('.') and not phrase.startswith('I '):
+                phrase = phrase[0].lower() + phrase[1:]
+            parts += (connector, phrase)
+        return ''.join(parts) + '.'
+
+    def registrations(self, count: int) -> Iterator[Dict[str, Any]]:
+        rng = random.Random(f'{self.seed}:user_registrations')
+        for number, submitted_at in enumerate(self.timestamps(rng, count), 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            yield {
+                'name': f"{first} {last}",
+                # The running number keeps emails unique at any scale
+                'email': self._email(rng, first, last, number),
+                # Indian mobile numbers start with 6 to 9
+                'phone': f"{'+91' if rng.random() < 0.6 else ''}{rng.randrange(6 * 10 ** 9, 10 ** 10)}",
+                'gender': self._choice(rng, self._genders),
+                'profession': self._choice(rng, self._professions),
+                'user_type': self._choice(rng, self._user_types),
+                'submitted_at': submitted_at,
+                'ip_address': self._ip_address(rng),
+                'user_agent': self._user_agent(rng),
+            }
+
+    def feedback(self, count: int) -> Iterator[Dict[str, Any]]:
+        rng = random.Random(f'{self.seed}:feedback')
+        for number, submitted_at in enumerate(self.timestamps(rng, count), 1):
+            mood = self._choice(rng, self._moods)
+            row: Dict[str, Any] = {}
+            for field in RATING_FIELDS:
+                rating = None
+                if rng.random() >= RATING_SKIP:
+                    rating = min(5, max(1, mood + rng.choice(RATING_NOISE)))
+                row[field] = rating
+                # Required below 3, and some middling ratings are explained too
+                explain = rating is not None and (rating < 3 or (rating == 3 and rng.random() < 0.2))
+                row[f'{field}_issue'] = self._text(rng, ISSUE_PHRASES[field], 0.02) if explain else None
+
+            chattiness = 1.0 if mood >= 4 else 1.4
+            for field, probability in TEXT_FIELDS.items():
+                if rng.random() < probability * chattiness:
+                    row[field] = self._text(rng, TEXT_PHRASES[field])
+                else:
+                    row[field] = None
+
+            contact_willing = self._choice(rng, self._contact)
+            row['contact_willing'] = contact_willing
+            row['contact_email'] = None
+            if contact_willing == 'yes':
+                row['contact_email'] = self._email(
+                    rng, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), number
+                )
+            row['submitted_at'] = submitted_at
+            row['ip_address'] = self._ip_address(rng)
+            row['user_agent'] = self._user_agent(rng)
+            yield row
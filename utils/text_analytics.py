@@ -0,0 +1,300 @@
+import os
+import re
+import heapq
+import asyncio
+import logging
+import threading
+from collections import Counter, deque
+from datetime import date, datetime
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from starlette.concurrency import run_in_threadpool
+from storage import get_repository
+from utils.executor import cpu_executor
+from utils.timeseries import SyncWatermark, overlap_floor
+
+logger = logging.getLogger(__name__)
+
+# Ratings at or below this mark a feedback as low-rated
+LOW_RATING_MAX = int(os.environ.get('LOW_RATING_MAX', '2'))
+# Feedback rows tokenized per CPU pool task when rebuilding the counts
+TEXT_ANALYTICS_CHUNK_ROWS = int(os.environ.get('TEXT_ANALYTICS_CHUNK_ROWS', '2000'))
+# Seconds between reads of feedback stored by other workers and spool replays (0 disables)
+TEXT_ANALYTICS_SYNC_INTERVAL = float(os.environ.get('TEXT_ANALYTICS_SYNC_INTERVAL', '15'))
+
+TEXT_FIELDS = ('improvements', 'features', 'legal_challenges')
+RATING_FIELDS = (
+    'visual_design', 'ease_of_navigation', 'mobile_responsiveness',
+    'overall_satisfaction', 'ease_of_tasks', 'quality_of_services',
+)
+# Columns read per feedback row, in the order count_terms() expects
+SOURCE_COLUMNS = ('id', 'submitted_at') + RATING_FIELDS + TEXT_FIELDS
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOP_WORDS = frozenset("""
+    a about above after again all also am an and any are as at be because been before being below between both
+    but by can could did do does doing don't down during each few for from further had has have having he her
+    here hers him his how i i'm if in into is it it's its itself just let me more most my no nor not now of off
+    on once only or other our ours out over own please same she should so some such than that that's the their
+    them then there these they this those through to too under until up us very was we were what when where
+    which while who whom why will with would you your yours
+""".split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased words of a free-text answer, without stop words and single characters"""
+    if not text:
+        return []
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOP_WORDS and not token.isdigit()
+    ]
+
+
+def bigrams(tokens: Sequence[str]) -> List[str]:
+    return [f'{first} {second}' for first, second in zip(tokens, tokens[1:])]
+
+
+class TermCounts:
+    """Term and bigram counts of one text field over one day
+
+    ``occurrences`` counts every use, ``documents`` the answers using a term
+    at least once and ``low_rated`` those answers whose feedback has a low
+    rating. Bigrams are counted alongside terms, keyed "first second".
+    """
+
+    __slots__ = ('answers', 'low_rated_answers', 'occurrences', 'documents', 'low_rated')
+
+    def __init__(self):
+        self.answers = 0
+        self.low_rated_answers = 0
+        self.occurrences: Counter = Counter()
+        self.documents: Counter = Counter()
+        self.low_rated: Counter = Counter()
+
+    def add(self, tokens: List[str], low_rated: bool) -> None:
+        terms = tokens + bigrams(tokens)
+        distinct = set(terms)
+        self.answers += 1
+        self.occurrences.update(terms)
+        self.documents.update(distinct)
+        if low_rated:
+            self.low_rated_answers += 1
+            self.low_rated.update(distinct)
+
+    def merge(self, other: 'TermCounts') -> None:
+        self.answers += other.answers
+        self.low_rated_answers += other.low_rated_answers
+        self.occurrences.update(other.occurrences)
+        self.documents.update(other.documents)
+        self.low_rated.update(other.low_rated)
+
+
+def count_terms(rows: Iterable[tuple]) -> Dict[Tuple[str, date], TermCounts]:
+    """Counts per (field, day) of feedback rows read as SOURCE_COLUMNS
+
+    Runs in the CPU pool (see utils/executor.py) when rebuilding, so it only
+    takes and returns plain data.
+    """
+    counts: Dict[Tuple[str, date], TermCounts] = {}
+    ratings_end = 2 + len(RATING_FIELDS)
+    for row in rows:
+        submitted_at = row[1]
+        ratings = [rating for rating in row[2:ratings_end] if rating is not None]
+        low_rated = bool(ratings) and min(ratings) <= LOW_RATING_MAX
+        for field, text in zip(TEXT_FIELDS, row[ratings_end:]):
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            key = (field, submitted_at.date())
+            if key not in counts:
+                counts[key] = TermCounts()
+            counts[key].add(tokens, low_rated)
+    return counts
+
+
+class FeedbackTermIndex:
+    """Daily term, bigram and low-rating counts of the free-text feedback fields
+
+    Counts are rebuilt in bulk at startup, tokenizing the stored feedback in
+    the CPU pool. Afterwards feedback created by this worker is counted as
+    it is inserted and a background task counts rows stored elsewhere, so
+    queries merge a few precomputed counters instead of reading any text.
+    """
+
+    def __init__(self):
+        self.days: Dict[str, Dict[date, TermCounts]] = {field: {} for field in TEXT_FIELDS}
+        # All-time counts, so queries without a window merge nothing
+        self.totals: Dict[str, TermCounts] = {field: TermCounts() for field in TEXT_FIELDS}
+        self.seeded = False
+        # Where syncs read from and the recent ids already counted (see utils/timeseries.py)
+        self._sync = SyncWatermark(0)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _merge(self, counts: Dict[Tuple[str, date], TermCounts]) -> None:
+        # Caller holds the lock
+        for (field, day), day_counts in counts.items():
+            self.totals[field].merge(day_counts)
+            existing = self.days[field].get(day)
+            if existing is None:
+                self.days[field][day] = day_counts
+            else:
+                existing.merge(day_counts)
+
+    def record(self, feedback: Any) -> None:
+        """Count a feedback just inserted by this worker"""
+        counts = count_terms([tuple(getattr(feedback, column) for column in SOURCE_COLUMNS)])
+        with self._lock:
+            # Before the rebuild the database read counts it, and syncs count what this misses
+            if self.seeded and self._sync.claim(feedback.id):
+                self._merge(counts)
+
+    def rebuild(self) -> int:
+        """Recount every stored feedback, returning the rows read"""
+        repository = get_repository('feedback')
+        # Rows above this id are left to sync(), so none is counted twice
+        head = overlap_floor(repository)
+        with self._lock:
+            self.seeded = False
+            self.days = {field: {} for field in TEXT_FIELDS}
+            self.totals = {field: TermCounts() for field in TEXT_FIELDS}
+
+        rows_read = 0
+        # Keeps every pool process busy while bounding the rows held in memory
+        window: deque = deque()
+        batches = repository.iter_rows(0, SOURCE_COLUMNS, TEXT_ANALYTICS_CHUNK_ROWS)
+        try:
+            for rows in batches:
+                rows = [row for row in rows if row[0] <= head]
+                if not rows:
+                    break
+                rows_read += len(rows)
+                window.append(cpu_executor.submit(count_terms, rows))
+                if len(window) > cpu_executor.workers:
+                    self._absorb(cpu_executor.wait(window.popleft()))
+            while window:
+                self._absorb(cpu_executor.wait(window.popleft()))
+        except BaseException:
+            for future in window:
+                cpu_executor.cancel(future)
+            raise
+        finally:
+            batches.close()
+
+        with self._lock:
+            self._sync = SyncWatermark(head)
+            self.seeded = True
+        logger.info(f'Counted feedback terms of {rows_read} rows up to id {head}')
+        return rows_read
+
+    def _absorb(self, counts: Dict[Tuple[str, date], TermCounts]) -> None:
+        with self._lock:
+            self._merge(counts)
+
+    def sync(self) -> int:
+        """Count feedback stored since the last sync that this worker hasn't counted"""
+        added = 0
+        watermark = self._sync
+        head = watermark.head
+        batches = get_repository('feedback').iter_rows(watermark.scan_from, SOURCE_COLUMNS)
+        try:
+            for rows in batches:
+                with self._lock:
+                    new = [row for row in rows if watermark.claim(row[0])]
+                # Claimed rows are this sync's to count, whatever record() sees meanwhile
+                counts = count_terms(new)
+                with self._lock:
+                    self._merge(counts)
+                head = max(head, rows[-1][0])
+                added += len(new)
+        finally:
+            batches.close()
+        with self._lock:
+            watermark.advance(head)
+        return added
+
+    def query(self, field: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              limit: int = 20, min_documents: int = 3) -> Dict[str, Any]:
+        """Top terms and bigrams of a field, and the terms most tied to low ratings
+
+        The window is whole days: the days of ``since`` and ``until`` are
+        both included.
+        """
+        with self._lock:
+            if since is None and until is None:
+                return self._summarize(field, self.totals[field], limit, min_documents)
+            total = TermCounts()
+            for day, day_counts in self.days[field].items():
+                if (since is None or day >= since.date()) and (until is None or day <= until.date()):
+                    total.merge(day_counts)
+        return self._summarize(field, total, limit, min_documents)
+
+    def _summarize(self, field: str, total: TermCounts, limit: int, min_documents: int) -> Dict[str, Any]:
+        def top(bigram: bool) -> List[Dict[str, Any]]:
+            ranked = heapq.nlargest(
+                limit, (item for item in total.occurrences.items() if (' ' in item[0]) == bigram),
+                key=itemgetter(1)
+            )
+            return [{'term': term, 'count': count, 'documents': total.documents[term]} for term, count in ranked]
+
+        # Lift: how much likelier an answer using the term is to come with a low rating
+        base_rate = total.low_rated_answers / total.answers if total.answers else 0
+        low_rating_terms = []
+        if base_rate:
+            for term, low_rated in total.low_rated.items():
+                documents = total.documents[term]
+                if documents >= min_documents:
+                    share = low_rated / documents
+                    low_rating_terms.append({
+                        'term': term, 'documents': documents, 'low_rated': low_rated,
+                        'low_rated_share': round(share, 4), 'lift': round(share / base_rate, 3),
+                    })
+            low_rating_terms.sort(key=lambda item: (-item['lift'], -item['documents'], item['term']))
+
+        return {
+            'field': field,
+            'seeded': self.seeded,
+            'answers': total.answers,
+            'low_rated_answers': total.low_rated_answers,
+            'top_terms': top(False),
+            'top_bigrams': top(True),
+            'low_rating_terms': low_rating_terms[:limit],
+        }
+
+    async def _run(self) -> None:
+        while not self.seeded:
+            try:
+                await run_in_threadpool(self.rebuild)
+            except Exception as e:
+                logger.error(f'Could not count feedback terms: {str(e)}')
+                await asyncio.sleep(max(TEXT_ANALYTICS_SYNC_INTERVAL, 5))
+
+        while TEXT_ANALYTICS_SYNC_INTERVAL > 0:
+            await asyncio.sleep(TEXT_ANALYTICS_SYNC_INTERVAL)
+            try:
+                await run_in_threadpool(self.sync)
+            except Exception as e:
+                logger.error(f'Error syncing feedback terms: {str(e)}')
+
+    def start(self) -> None:
+        """Rebuild in the background and keep following the table; call from the event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Shared by every request of this worker
+feedback_terms = FeedbackTermIndex()
+
+
+def start_text_analytics() -> None:
+    feedback_terms.start()
+
+
+def stop_text_analytics() -> None:
+    feedback_terms.stop()
@@ -0,0 +1,260 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from starlette.concurrency import run_in_threadpool
+from storage import get_repository
+from storage.base import Repository
+
+logger = logging.getLogger(__name__)
+
+# Hours of per-minute buckets kept
+TIMESERIES_MINUTE_HOURS = int(os.environ.get('TIMESERIES_MINUTE_HOURS', '48'))
+# Days of hourly buckets kept
+TIMESERIES_RETENTION_DAYS = int(os.environ.get('TIMESERIES_RETENTION_DAYS', '90'))
+# Seconds between reads of rows inserted by other workers, imports and spool replays (0 disables)
+TIMESERIES_SYNC_INTERVAL = float(os.environ.get('TIMESERIES_SYNC_INTERVAL', '5'))
+# Seconds a sync keeps re-reading ids it already passed, for rows whose
+# transaction commits after a higher id; rows committing later are missed
+TIMESERIES_SYNC_OVERLAP = float(os.environ.get('TIMESERIES_SYNC_OVERLAP', '60'))
+
+PERIOD_SECONDS = {'minute': 60, 'hour': 3600}
+# Columns a table's counts are split by, giving series named "table:value"
+SPLIT_COLUMNS = {'user_registrations': 'user_type', 'feedback': None}
+
+# Buckets are numbered on the wall clock the timestamps are stored in, so
+# hours line up with local hours whatever the server's time zone
+EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_number(when: datetime, seconds: int) -> int:
+    return int((when - EPOCH).total_seconds()) // seconds
+
+
+def bucket_start(number: int, seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=number * seconds)
+
+
+def overlap_floor(repository: Repository, overlap: float = TIMESERIES_SYNC_OVERLAP,
+                  now: Optional[datetime] = None) -> int:
+    """Highest id a full read should cover, leaving the last ``overlap`` seconds of rows to syncs
+
+    Those rows are then counted one by one, so any that commit late are
+    still counted once.
+    """
+    head = repository.last_id()
+    low, _ = repository.id_bounds((now or datetime.now()) - timedelta(seconds=overlap))
+    return min(low - 1, head) if low else head
+
+
+class SyncWatermark:
+    """Where a table's syncs read from, trailing the highest id they reached
+
+    Ids are not committed in order: an AUTO_INCREMENT id can commit after a
+    higher one, and ids generated on several hosts (storage/sharded.py) skew
+    with their clocks. Each sync therefore starts from the highest id seen at
+    least ``overlap`` seconds earlier, and ``counted`` remembers the ids above
+    that point which were already counted. Callers hold their own lock.
+    """
+
+    def __init__(self, start: int, overlap: float = TIMESERIES_SYNC_OVERLAP):
+        self.scan_from = start
+        self.head = start
+        self.overlap = overlap
+        self.counted: Set[int] = set()
+        self._marks: Deque[Tuple[float, int]] = deque()
+
+    def claim(self, row_id: int) -> bool:
+        """True the first time an id still within reach of the syncs is seen"""
+        if row_id <= self.scan_from or row_id in self.counted:
+            return False
+        self.counted.add(row_id)
+        return True
+
+    def advance(self, head: int, now: Optional[float] = None) -> None:
+        """Note the highest id a sync read, moving the start of later syncs up to an old enough head"""
+        now = time.monotonic() if now is None else now
+        self.head = max(self.head, head)
+        self._marks.append((now, self.head))
+        while len(self._marks) > 1 and self._marks[1][0] <= now - self.overlap:
+            self._marks.popleft()
+        if self._marks[0][0] <= now - self.overlap and self._marks[0][1] > self.scan_from:
+            self.scan_from = self._marks[0][1]
+            self.counted = {row_id for row_id in self.counted if row_id > self.scan_from}
+
+
+class RingBuffer:
+    """Counts for the most recent ``size`` consecutive buckets
+
+    Each slot remembers which bucket it holds, so slots of buckets that
+    passed without submissions read as zero without ever being cleared.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.counts = [0] * size
+        self.buckets = [-1] * size
+        self.newest = -1
+
+    def add(self, bucket: int, count: int = 1) -> None:
+        if bucket <= self.newest - self.size:
+            return
+        self.newest = max(self.newest, bucket)
+        slot = bucket % self.size
+        if self.buckets[slot] != bucket:
+            self.buckets[slot] = bucket
+            self.counts[slot] = 0
+        self.counts[slot] += count
+
+    def window(self, last: int, count: int) -> List[int]:
+        """Counts of the ``count`` buckets ending with ``last``, oldest first"""
+        values = []
+        for bucket in range(last - count + 1, last + 1):
+            slot = bucket % self.size
+            values.append(self.counts[slot] if self.buckets[slot] == bucket and bucket > last - self.size else 0)
+        return values
+
+
+class SubmissionTimeSeries:
+    """Registrations and feedback per minute and per hour, kept in memory
+
+    Rows created through the models are counted as they are inserted.
+    Everything else, such as rows inserted by other workers, bulk imports
+    and spool replays, is read by a background task that follows each
+    table's ids. At startup the buckets are seeded with one grouped query
+    per table and period.
+    """
+
+    def __init__(self, minute_hours: int = TIMESERIES_MINUTE_HOURS,
+                 retention_days: int = TIMESERIES_RETENTION_DAYS):
+        self.sizes = {'minute': minute_hours * 60, 'hour': retention_days * 24}
+        self.series: Dict[str, Dict[str, RingBuffer]] = {}
+        self.seeded = False
+        # Per table, where syncs read from and the recent ids already counted
+        self._sync: Dict[str, SyncWatermark] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _buffers(self, name: str) -> Dict[str, RingBuffer]:
+        # Caller holds the lock
+        buffers = self.series.get(name)
+        if buffers is None:
+            buffers = self.series[name] = {period: RingBuffer(size) for period, size in self.sizes.items()}
+        return buffers
+
+    def _add(self, table: str, submitted_at: datetime, group: Any, count: int = 1,
+             periods: Tuple[str, ...] = tuple(PERIOD_SECONDS)) -> None:
+        # Caller holds the lock
+        names = [table] if group is None else [table, f'{table}:{group}']
+        for name in names:
+            buffers = self._buffers(name)
+            for period in periods:
+                buffers[period].add(bucket_number(submitted_at, PERIOD_SECONDS[period]), count)
+
+    def record(self, table: str, row_id: int, submitted_at: datetime, group: Any = None) -> None:
+        """Count a row just inserted by this worker"""
+        with self._lock:
+            # Before seeding the database read counts it, and syncs count what this misses
+            if self.seeded and self._sync[table].claim(row_id):
+                self._add(table, submitted_at, group)
+
+    def seed(self, now: Optional[datetime] = None) -> None:
+        """Fill the buckets from the database"""
+        now = now or datetime.now()
+        for table, split in SPLIT_COLUMNS.items():
+            repository = get_repository(table)
+            # Rows above this id are left to sync(), so none is counted twice
+            floor = overlap_floor(repository, now=now)
+            counts = {}
+            for period, size in self.sizes.items():
+                since = now - timedelta(seconds=size * PERIOD_SECONDS[period])
+                counts[period] = repository.count_by_period(period, since, floor, split)
+            with self._lock:
+                self._sync[table] = SyncWatermark(floor)
+                for period, rows in counts.items():
+                    for start, group, count in rows:
+                        self._add(table, start, group, count, periods=(period,))
+        with self._lock:
+            self.seeded = True
+        logger.info('Seeded submission time series up to ids %s',
+                    {table: watermark.scan_from for table, watermark in self._sync.items()})
+
+    def sync(self) -> int:
+        """Count rows inserted since the last sync that this worker hasn't counted"""
+        added = 0
+        for table, split in SPLIT_COLUMNS.items():
+            columns = ('id', 'submitted_at') + ((split,) if split else ())
+            watermark = self._sync[table]
+            head = watermark.head
+            batches = get_repository(table).iter_rows(watermark.scan_from, columns)
+            try:
+                for rows in batches:
+                    with self._lock:
+                        for row in rows:
+                            if watermark.claim(row[0]):
+                                self._add(table, row[1], row[2] if split else None)
+                                added += 1
+                    head = max(head, rows[-1][0])
+            finally:
+                batches.close()
+            with self._lock:
+                watermark.advance(head)
+        return added
+
+    def query(self, period: str, count: int, until: Optional[datetime] = None) -> Dict[str, Any]:
+        """The last ``count`` buckets of every series up to ``until``, oldest first"""
+        count = min(count, self.sizes[period])
+        seconds = PERIOD_SECONDS[period]
+        last = bucket_number(until or datetime.now(), seconds)
+        with self._lock:
+            series = {name: buffers[period].window(last, count) for name, buffers in sorted(self.series.items())}
+        for table in SPLIT_COLUMNS:
+            series.setdefault(table, [0] * count)
+        return {
+            'resolution': period,
+            'start': bucket_start(last - count + 1, seconds),
+            'bucket_seconds': seconds,
+            'seeded': self.seeded,
+            'series': series,
+        }
+
+    async def _run(self) -> None:
+        while not self.seeded:
+            try:
+                await run_in_threadpool(self.seed)
+            except Exception as e:
+                logger.error(f'Could not seed the submission time series: {str(e)}')
+                await asyncio.sleep(max(TIMESERIES_SYNC_INTERVAL, 5))
+
+        while TIMESERIES_SYNC_INTERVAL > 0:
+            await asyncio.sleep(TIMESERIES_SYNC_INTERVAL)
+            try:
+                await run_in_threadpool(self.sync)
+            except Exception as e:
+                logger.error(f'Error syncing the submission time series: {str(e)}')
+
+    def start(self) -> None:
+        """Seed in the background and keep following the tables; call from the event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Shared by every request of this worker
+submission_timeseries = SubmissionTimeSeries()
+
+
+def start_timeseries() -> None:
+    submission_timeseries.start()
+
+
+def stop_timeseries() -> None:
+    submission_timeseries.stop()